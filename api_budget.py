@@ -0,0 +1,241 @@
+"""
+kabuステーション API の呼び出し予算の管理。
+
+- urllib のグローバル opener にハンドラを差し込み、全ラッパー（kabusapi_*.py）の
+  リクエストをエンドポイント別に数える（ラッパー側の変更は不要）。
+- 区分ごと（発注系 / 情報系 / 取引余力 / 銘柄登録）の秒間上限 const.api_rate_limits に対し、
+  直近 window_sec の呼び出し数から残り枠（headroom）を出す。HTTP 429 も記録する。
+- 起動時に /apisoftlimit を読み、商品別の1注文あたり上限（万円）を保持する。
+  ※ /apisoftlimit が返すのは発注金額の上限で、呼び出し回数の上限ではない。
+    回数の上限はドキュメント記載の値を const に持つ。
+- 低優先度の呼び出し（候補銘柄の板の巡回・ユニバース更新）は、上限の
+  api_low_priority_reserve 分を高優先度（保有管理・発注）のために残して許可する。
+- 複数スレッドから並行に呼ぶ場合は acquire() で枠を予約してから呼ぶ（予約は実際の
+  呼び出しが数えられた時点で置き換わり、呼ばれなければ window_sec で消える）。
+"""
+from collections import Counter, deque
+from typing import Optional, Dict, Any, Deque, Tuple
+from urllib.parse import urlparse
+import logging
+import threading
+import time
+import urllib.request
+
+from const import api_rate_limits, api_budget_window_sec, api_low_priority_reserve
+
+logger = logging.getLogger(__name__)
+
+# エンドポイント（/kabusapi/ 直後のパス）→ 区分
+_CATEGORY = {
+    "sendorder": "order",
+    "cancelorder": "order",
+    "wallet": "wallet",
+    "register": "register",
+    "unregister": "register",
+    "token": "token",
+}
+
+_RESERVED = "(reserved)"
+
+# /apisoftlimit のキー ↔ 商品
+_SOFT_LIMIT_KEYS = ("Stock", "Margin", "Future", "FutureMini", "FutureMicro", "Option", "MiniOption")
+
+
+def endpoint_of(url: str) -> str:
+    """'http://host/kabusapi/board/1001@1' → 'board'（wallet/cash などは先頭のみ）。"""
+    path = urlparse(url).path
+    i = path.find("/kabusapi/")
+    path = path[i + len("/kabusapi/"):] if i >= 0 else path.lstrip("/")
+    return path.split("/", 1)[0] or "?"
+
+
+def category_of(endpoint: str) -> str:
+    return _CATEGORY.get(endpoint, "info")
+
+
+class ApiBudget:
+    def __init__(self, limits: Optional[Dict[str, float]] = None,
+                 window_sec: float = api_budget_window_sec,
+                 low_priority_reserve: float = api_low_priority_reserve):
+        self.limits = dict(api_rate_limits if limits is None else limits)
+        self.window_sec = float(window_sec)
+        self.low_priority_reserve = float(low_priority_reserve)
+        self.soft_limits: Dict[str, float] = {}
+        self.totals: Counter = Counter()       # 起動からの累計（"GET board" 形式）
+        self.rejected: Counter = Counter()     # HTTP 429 の回数
+        self._calls: Deque[Tuple[float, str, str]] = deque()   # (時刻, 区分, エンドポイント)
+        self._lock = threading.Lock()
+        self._acquire_lock = threading.Lock()
+
+    # --- 記録 ---
+    def note(self, method: str, url: str, now: Optional[float] = None) -> None:
+        ep = endpoint_of(url)
+        cat = category_of(ep)
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            for rec in self._calls:
+                if rec[2] == _RESERVED and rec[1] == cat:
+                    self._calls.remove(rec)   # acquire() の予約を実際の呼び出しに置き換える
+                    break
+            self._calls.append((now, cat, ep))
+            self.totals[f"{method} {ep}"] += 1
+            self._expire(now)
+
+    def note_rejected(self, method: str, url: str) -> None:
+        ep = endpoint_of(url)
+        with self._lock:
+            self.rejected[f"{method} {ep}"] += 1
+        logger.warning(f"API 呼び出し上限に到達 (429): {method} {ep}")
+
+    def _expire(self, now: float) -> None:
+        edge = now - self.window_sec
+        while self._calls and self._calls[0][0] <= edge:
+            self._calls.popleft()
+
+    # --- 参照 ---
+    def used(self, category: str, now: Optional[float] = None) -> int:
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._expire(now)
+            return sum(1 for _, c, _ in self._calls if c == category)
+
+    def remaining(self, category: str, now: Optional[float] = None) -> int:
+        """直近 window_sec 内で、あと何回呼べるか（上限未設定の区分は大きな値）。"""
+        limit = self.limits.get(category)
+        if limit is None:
+            return 1 << 30
+        return max(0, int(limit * self.window_sec) - self.used(category, now))
+
+    def headroom(self, category: str, now: Optional[float] = None) -> float:
+        """残り枠の割合 0.0〜1.0。"""
+        limit = self.limits.get(category)
+        if not limit:
+            return 1.0
+        return self.remaining(category, now) / (limit * self.window_sec)
+
+    def allow(self, category: str, n: int = 1, low_priority: bool = False,
+              now: Optional[float] = None) -> bool:
+        """n 回の呼び出しが今の窓に収まるか。低優先度は予約分を残して判定する。"""
+        limit = self.limits.get(category)
+        if limit is None:
+            return True
+        cap = limit * self.window_sec
+        if low_priority:
+            cap *= (1.0 - self.low_priority_reserve)
+        return self.used(category, now) + n <= cap
+
+    def wait(self, category: str, now: Optional[float] = None) -> float:
+        """次の1回が上限に収まるまで待つ秒数（0 なら即時可）。"""
+        limit = self.limits.get(category)
+        if limit is None:
+            return 0.0
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._expire(now)
+            ts = [t for t, c, _ in self._calls if c == category]
+        over = len(ts) + 1 - int(limit * self.window_sec)
+        if over <= 0:
+            return 0.0
+        return max(0.0, ts[over - 1] + self.window_sec - now)
+
+    def acquire(self, category: str, low_priority: bool = False, timeout: Optional[float] = None) -> bool:
+        """
+        1回分の枠が空くまで待って予約する（並行に呼ぶスレッド間で上限を超えないように）。
+        timeout 秒以内に空かなければ False。
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._acquire_lock:
+            while True:
+                now = time.monotonic()
+                if self.allow(category, low_priority=low_priority, now=now):
+                    with self._lock:
+                        self._calls.append((now, category, _RESERVED))
+                    return True
+                wait = max(self.wait(category, now), 0.005)
+                if deadline is not None and now + wait > deadline:
+                    return False
+                time.sleep(wait)
+
+    def stats(self, now: Optional[float] = None) -> Dict[str, Any]:
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._expire(now)
+            window = Counter(ep for _, _, ep in self._calls if ep != _RESERVED)
+        return {
+            "window_sec": self.window_sec,
+            "window_calls": dict(window),
+            "headroom": {c: round(self.headroom(c, now), 2) for c in self.limits},
+            "totals": dict(self.totals),
+            "rejected": dict(self.rejected),
+            "soft_limits": dict(self.soft_limits),
+        }
+
+    # --- /apisoftlimit ---
+    def load_soft_limits(self, fetch=None) -> Dict[str, float]:
+        """商品別の1注文あたり上限（万円）を読み込む。失敗時は空のまま（発注側で判定しない）。"""
+        if fetch is None:
+            from kabusapi_apisoftlimit import get_apisoftlimit
+            fetch = get_apisoftlimit
+        try:
+            res = fetch()
+        except Exception as e:
+            logger.warning(f"ソフトリミットの取得に失敗しました: {e}")
+            return self.soft_limits
+        if isinstance(res, dict):
+            self.soft_limits = {k: float(res[k]) for k in _SOFT_LIMIT_KEYS
+                                if isinstance(res.get(k), (int, float))}
+            logger.info(f"ソフトリミット(万円): {self.soft_limits}")
+        return self.soft_limits
+
+    def order_within_soft_limit(self, product: str, amount_yen: float) -> bool:
+        """1注文の金額が /apisoftlimit の上限内か（上限不明なら True）。"""
+        lim = self.soft_limits.get(product)
+        return lim is None or amount_yen <= lim * 10_000
+
+
+class _BudgetHandler(urllib.request.BaseHandler):
+    # HTTPErrorProcessor(1000) より先に 429 を見る
+    handler_order = 400
+
+    def __init__(self, budget: ApiBudget):
+        self.budget = budget
+
+    def http_request(self, req):
+        self.budget.note(req.get_method(), req.full_url)
+        return req
+
+    def http_response(self, req, res):
+        if res.status == 429:
+            self.budget.note_rejected(req.get_method(), req.full_url)
+        elif res.status == 401 and endpoint_of(req.full_url) != "token":
+            # 保存していたトークンが無効（kabuステーション再起動など）→ 次回取り直す
+            from kabusapi_token import invalidate_token
+            invalidate_token()
+        return res
+
+    https_request = http_request
+    https_response = http_response
+
+
+_budget: Optional[ApiBudget] = None
+_installed = False
+
+
+def get_budget() -> ApiBudget:
+    """既定の予算（未インストールでも数えないだけで使える）。"""
+    global _budget
+    if _budget is None:
+        _budget = ApiBudget()
+    return _budget
+
+
+def install_budget(load_soft_limits: bool = True) -> ApiBudget:
+    """既定の予算を urllib のグローバル opener に組み込み、ソフトリミットを読む。"""
+    global _installed
+    budget = get_budget()
+    if not _installed:
+        urllib.request.install_opener(urllib.request.build_opener(_BudgetHandler(budget)))
+        _installed = True
+    if load_soft_limits and not budget.soft_limits:
+        budget.load_soft_limits()
+    return budget
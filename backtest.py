@@ -0,0 +1,281 @@
+"""
+記録済みの板スナップショットを使ったスキャルプ戦略のリプレイ（バックテスト）。
+
+- 入力: 日付ディレクトリ配下の <銘柄コード>.brd（board_recorder の固定長ログ）
+  または <銘柄コード>.jsonl（1行 = /board 応答1件）。
+  受信時刻は "_ts"（epoch 秒）、無ければ CurrentPriceTime を使う。
+- 判定: day_price_judge.rank_buy_candidates / decide_prices_scalp をそのまま使う。
+- 約定: Buy1 join の買い指値は「自分より前の数量 + 自分の数量」ぶん同値以下で出来るか、
+  Buy1 が自分の値段を割り込んだ時点で約定とみなす。利確売りも同様（Sell 側）。
+- 取消: 実運用と同じ QueueTracker.should_cancel で判定する。
+ネットワークには一切アクセスしない。
+
+使い方: python backtest.py board_log/20250820 board_log/20250821 ...
+"""
+from dataclasses import dataclass, field
+from typing import Optional, Dict, Any, List, Iterable, Tuple, Union
+from datetime import datetime
+import contextlib
+import heapq
+import io
+import json
+import mmap
+import os
+import statistics
+import sys
+
+from const import max_positions as default_max_positions, total_limit
+from day_price_judge import ScalpParams, rank_buy_candidates
+from queue_model import QueueTracker, level_qty_at
+from board_recorder import open_day, BoardLogReader
+
+# 銘柄ごとの時刻順の板（.brd は BoardLogReader のまま渡すと再生時に1件ずつ dict へ戻す）
+BoardRows = Union[List[Dict[str, Any]], BoardLogReader]
+
+
+def board_ts(board: Dict[str, Any]) -> float:
+    """板の受信時刻(epoch 秒)。"_ts" が無ければ CurrentPriceTime から求める。"""
+    ts = board.get("_ts")
+    if ts is not None:
+        return float(ts)
+    for k in ("CurrentPriceTime", "BidTime", "AskTime"):
+        v = board.get(k)
+        if v:
+            try:
+                return datetime.fromisoformat(v).timestamp()
+            except Exception:
+                continue
+    return 0.0
+
+
+def load_board_log(day_dir: str, lazy: bool = False) -> Dict[str, BoardRows]:
+    """
+    day_dir 配下の <銘柄>.brd / <銘柄>.jsonl を読み、{銘柄: 時刻順の板リスト} を返す。
+    lazy なら .brd は mmap した BoardLogReader のまま返す（板 dict は再生のたびに作り、メモリに溜めない）。
+    .jsonl は mmap して行単位に読む。
+    """
+    out: Dict[str, BoardRows] = {}
+    for sym, reader in open_day(day_dir).items():
+        out[sym] = reader if lazy else list(reader.to_boards())
+    for name in sorted(os.listdir(day_dir)):
+        if not name.endswith(".jsonl"):
+            continue
+        path = os.path.join(day_dir, name)
+        if os.path.getsize(path) == 0:
+            continue
+        rows = []
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for line in iter(mm.readline, b""):
+                line = line.strip()
+                if line:
+                    rows.append(json.loads(line))
+        rows.sort(key=board_ts)
+        out[name[:-len(".jsonl")]] = rows
+    return out
+
+
+@dataclass
+class SimOrder:
+    symbol: str
+    side: int          # 2: 買い, 1: 売り（kabu API の Side と同じ）
+    price: float
+    qty: float
+    placed_at: float
+    ahead: float       # 発注時点で同値に並んでいた数量
+    consumed: float = 0.0
+
+    def on_board(self, board: Dict[str, Any], prev: Optional[Dict[str, Any]]) -> bool:
+        """板の更新を受けて約定したかどうかを返す。"""
+        if self.side == 2:
+            b1 = (board.get("Buy1") or {}).get("Price")
+            if b1 is not None and float(b1) < self.price - 1e-9:
+                return True
+        else:
+            s1 = (board.get("Sell1") or {}).get("Price")
+            if s1 is not None and float(s1) > self.price + 1e-9:
+                return True
+
+        vol, pvol = board.get("TradingVolume"), (prev or {}).get("TradingVolume")
+        cur = board.get("CurrentPrice")
+        if vol is None or pvol is None or cur is None:
+            return False
+        dv = max(0.0, float(vol) - float(pvol))
+        cur = float(cur)
+        if (self.side == 2 and cur <= self.price + 1e-9) or (self.side == 1 and cur >= self.price - 1e-9):
+            self.consumed += dv
+        return self.consumed >= self.ahead + self.qty
+
+
+@dataclass
+class Trade:
+    symbol: str
+    qty: float
+    entry_time: float
+    entry_price: float
+    exit_time: float
+    exit_price: float
+    reason: str        # "tp" / "stop" / "eod"
+
+    @property
+    def pnl(self) -> float:
+        return (self.exit_price - self.entry_price) * self.qty
+
+    @property
+    def hold_sec(self) -> float:
+        return self.exit_time - self.entry_time
+
+
+@dataclass
+class ReplayResult:
+    trades: List[Trade] = field(default_factory=list)
+    entries: int = 0
+    fills: int = 0
+    cancels: int = 0
+    days: int = 0
+
+    def merge(self, other: "ReplayResult") -> None:
+        self.trades.extend(other.trades)
+        self.entries += other.entries
+        self.fills += other.fills
+        self.cancels += other.cancels
+        self.days += other.days
+
+    def summary(self) -> Dict[str, Any]:
+        holds = [t.hold_sec for t in self.trades]
+        wins = [t for t in self.trades if t.pnl > 0]
+        return {
+            "days": self.days,
+            "entries": self.entries,
+            "fills": self.fills,
+            "cancels": self.cancels,
+            "fill_rate": round(self.fills / self.entries, 4) if self.entries else 0.0,
+            "trades": len(self.trades),
+            "win_rate": round(len(wins) / len(self.trades), 4) if self.trades else 0.0,
+            "pnl": round(sum(t.pnl for t in self.trades), 2),
+            "pnl_per_day": round(sum(t.pnl for t in self.trades) / self.days, 2) if self.days else 0.0,
+            "avg_hold_sec": round(statistics.fmean(holds), 2) if holds else 0.0,
+            "median_hold_sec": round(statistics.median(holds), 2) if holds else 0.0,
+            "eod_exits": sum(1 for t in self.trades if t.reason == "eod"),
+        }
+
+
+class ReplayEngine:
+    """
+    TradeBot と同じ手順（板を共有した候補評価 → Buy1 join → 並び監視で取消 → 約定後に利確売り）を
+    記録済みの板で再生する。
+    """
+
+    def __init__(self, params: Optional[ScalpParams] = None, max_positions: int = default_max_positions,
+                 qty: float = 100, eval_interval_sec: float = 1.0, max_board_age_sec: float = 5.0,
+                 use_stop: bool = False, limit: float = total_limit):
+        self.params = params or ScalpParams()
+        self.max_positions = max_positions
+        self.qty = float(qty)
+        self.eval_interval_sec = eval_interval_sec
+        self.max_board_age_sec = max_board_age_sec
+        self.use_stop = use_stop
+        self.limit = limit
+
+    def run(self, days: Iterable[Dict[str, BoardRows]]) -> ReplayResult:
+        total = ReplayResult()
+        for boards_by_symbol in days:
+            total.merge(self.run_day(boards_by_symbol))
+        return total
+
+    def run_day(self, boards_by_symbol: Dict[str, BoardRows]) -> ReplayResult:
+        p = self.params
+        res = ReplayResult(days=1)
+        latest: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        entries: Dict[str, Tuple[SimOrder, QueueTracker, Dict[str, Any]]] = {}
+        holdings: Dict[str, Tuple[float, float, Dict[str, Any]]] = {}   # symbol -> (entry_time, entry_price, plan)
+        exits: Dict[str, SimOrder] = {}
+        notional = 0.0
+        next_eval = None
+
+        stream = heapq.merge(*[_keyed(sym, rows) for sym, rows in boards_by_symbol.items()])
+        sink = io.StringIO()
+        for ts, sym, _, board in stream:
+            prev = latest.get(sym, (None, None))[1]
+            latest[sym] = (ts, board)
+
+            # --- 約定・取消判定（板が来た銘柄のみ） ---
+            if sym in entries:
+                order, tracker, plan = entries[sym]
+                if order.on_board(board, prev):
+                    del entries[sym]
+                    res.fills += 1
+                    notional += order.price * order.qty
+                    holdings[sym] = (ts, order.price, plan)
+                else:
+                    tracker.update(board, now=ts)
+                    if tracker.should_cancel(p.max_queue_eta_sec, p.queue_min_fill_prob,
+                                             p.queue_hard_timeout_sec, now=ts):
+                        del entries[sym]
+                        res.cancels += 1
+
+            if sym in holdings and sym not in exits:
+                t0, px, plan = holdings[sym]
+                tp = px + p.take_profit_yen
+                ask_lv = level_qty_at(board, "Sell", tp)
+                exits[sym] = SimOrder(sym, 1, tp, self.qty, ts, ask_lv or 0.0)
+            elif sym in exits:
+                t0, px, plan = holdings[sym]
+                bid = (board.get("Buy1") or {}).get("Price")
+                if exits[sym].on_board(board, prev):
+                    res.trades.append(Trade(sym, self.qty, t0, px, ts, exits[sym].price, "tp"))
+                    notional += exits[sym].price * self.qty
+                    del exits[sym], holdings[sym]
+                elif self.use_stop and bid is not None and float(bid) <= plan["stop_price"]:
+                    res.trades.append(Trade(sym, self.qty, t0, px, ts, float(bid), "stop"))
+                    notional += float(bid) * self.qty
+                    del exits[sym], holdings[sym]
+
+            # --- 候補評価（eval_interval_sec ごと、全銘柄の最新板を共有） ---
+            if next_eval is None:
+                next_eval = ts
+            if ts < next_eval:
+                continue
+            next_eval = ts + self.eval_interval_sec
+            free = self.max_positions - len(entries) - len(holdings)
+            if free <= 0:
+                continue
+            fresh = [b for s, (bts, b) in latest.items()
+                     if s not in entries and s not in holdings and ts - bts <= self.max_board_age_sec]
+            if not fresh:
+                continue
+            with contextlib.redirect_stdout(sink):
+                plans = rank_buy_candidates(fresh, p)
+            sink.seek(0); sink.truncate()
+            for plan in plans[:free]:
+                s = str(plan.get("target_symbol"))
+                if s in entries or s in holdings:
+                    continue
+                if notional + plan["buy_price"] * self.qty > self.limit:
+                    break
+                order = SimOrder(s, 2, float(plan["buy_price"]), self.qty, ts,
+                                 float((plan.get("notes") or {}).get("bid_qty") or 0.0))
+                tracker = QueueTracker.from_plan(plan, self.qty, p.queue_bid_flow_share, now=ts)
+                entries[s] = (order, tracker, plan)
+                res.entries += 1
+
+        # --- 引け: 未決済は最終 Bid で評価 ---
+        for sym, (t0, px, plan) in holdings.items():
+            ts, board = latest[sym]
+            bid = (board.get("Buy1") or {}).get("Price") or board.get("CurrentPrice") or px
+            res.trades.append(Trade(sym, self.qty, t0, px, ts, float(bid), "eod"))
+        return res
+
+
+def _keyed(sym: str, rows: BoardRows):
+    for i, b in enumerate(rows):
+        yield board_ts(b), sym, i, b
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("usage: python backtest.py <day_dir> [<day_dir> ...]")
+        sys.exit(1)
+    engine = ReplayEngine()
+    result = engine.run(load_board_log(d) for d in sys.argv[1:])
+    for k, v in result.summary().items():
+        print(f"{k}: {v}")
@@ -0,0 +1,235 @@
+"""
+TradeBot.execute_trade 1 tick あたりの所要時間・API 呼び出し数・メモリ確保量のベンチマーク。
+
+mock_server の代替サーバをプロセス内で起動し、シナリオごとに板・建玉を用意して
+tick → 板を1つ進める → tick ... を繰り返す。
+
+シナリオ:
+  flat         … 候補なし・保有なし（ガードと板取得だけ）
+  holding      … 保有1銘柄、利確売りが約定しないまま監視を続ける
+  buy_fill     … Buy1 join が約定 → 利確売り → 約定 を繰り返す
+  buy_timeout  … Buy1 join が約定せず取消を繰り返す
+  margin_fill  … 信用デイトレで買い建て/売り建て（Sell1 join）→ 返済 を繰り返す
+  stop_exit    … 約定後に取引所側の逆指値（損切り）を置き、利確値に届いたら利確の指値に置き換える
+
+出力: tick 時間の p50/p99/mean/max (ms)、エンドポイント別の tick あたり API 呼び出し数、
+      tracemalloc による tick あたりのピーク確保量 (KiB)。--json で結果を保存できる。
+      板取得の間隔（TradeBot.board_interval_sec）は 0 にして測る（待ち時間ではなく処理のコストを測るため）。
+
+使い方: python bench_tick.py [--ticks 30] [--scenario flat,holding] [--json bench.json]
+"""
+from collections import Counter
+from typing import Dict, Any, List
+import argparse
+import contextlib
+import json
+import logging
+import os
+import socket
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# const は import 時に接続先(base_url)を確定するため、mock_server/main は
+# run_bench() で KABUSAPI_BASE_URL を設定してから読み込む。
+SYMBOLS = ["1001", "1002", "1003"]
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _pct(xs: List[float], q: float) -> float:
+    if not xs:
+        return 0.0
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(round(q * (len(xs) - 1))))]
+
+
+# --- シナリオ: (板の供給, Bot の初期化) ---
+def _flat(bot, market) -> None:
+    bot.params.exit_eta_limit_sec = 0.0   # どの銘柄も候補にならない
+
+
+def _holding(bot, market) -> None:
+    sym = SYMBOLS[0]
+    market.positions[sym] = {"Symbol": sym, "SymbolName": f"MOCK{sym}", "Exchange": 1, "SecurityType": 1,
+                             "Side": "2", "Price": 100.0, "LeavesQty": 100.0, "HoldQty": 0.0}
+    bot.positions[sym] = {"symbol": sym, "state": "holding", "buy_price": 150.0, "qty": 100.0}
+    bot.max_positions = 1
+
+
+def _permissive(bot) -> None:
+    p = bot.params
+    p.exit_eta_limit_sec = 1e9
+    p.depth_ratio_limit = 1e9
+    p.max_queue_eta_sec = 1e9
+
+
+def _buy_fill(bot, market) -> None:
+    _permissive(bot)
+    p = bot.params
+    p.queue_min_fill_prob = 0.0
+    p.queue_hard_timeout_sec = 1e9
+
+
+def _buy_timeout(bot, market) -> None:
+    _permissive(bot)
+    bot.params.queue_hard_timeout_sec = 0.0   # 次の tick で必ず取消
+
+
+def _margin_fill(bot, market) -> None:
+    _buy_fill(bot, market)
+    bot.margin_sides = ["buy", "sell"]
+    bot.margin.kinds = ["cash", "margin"]
+
+
+def _stop_exit(bot, market) -> None:
+    _buy_fill(bot, market)
+    bot.exit_style = "stop"
+
+
+SCENARIOS: Dict[str, Dict[str, Any]] = {
+    "flat":        {"book": {}, "setup": _flat},
+    "holding":     {"book": {"move_prob": 0.0}, "setup": _holding},
+    "buy_fill":    {"book": {"volume_per_step": 200_000}, "setup": _buy_fill},
+    "buy_timeout": {"book": {"move_prob": 0.0, "trade_at": "ask"}, "setup": _buy_timeout},
+    "margin_fill": {"book": {"volume_per_step": 200_000}, "setup": _margin_fill},
+    "stop_exit":   {"book": {"volume_per_step": 200_000, "move_prob": 0.3}, "setup": _stop_exit},
+}
+
+
+def _market(book_kw: Dict[str, Any]):
+    from mock_server import MockMarket, ScriptedBook
+    return MockMarket({s: ScriptedBook(s, price=100.0, seed=i, **book_kw) for i, s in enumerate(SYMBOLS)})
+
+
+def _run(server, name: str, ticks: int, trace_alloc: bool) -> Dict[str, Any]:
+    sc = SCENARIOS[name]
+    server.market = _market(sc["book"])
+    with tempfile.TemporaryDirectory(prefix=f"bench_{name}_") as workdir:
+        cwd = os.getcwd()
+        os.chdir(workdir)
+        try:
+            return _run_in(server, name, sc, ticks, trace_alloc)
+        finally:
+            os.chdir(cwd)
+
+
+def _run_in(server, name: str, sc: Dict[str, Any], ticks: int, trace_alloc: bool) -> Dict[str, Any]:
+    from main import TradeBot
+    from universe import UniverseService
+
+    with open(os.devnull, "w") as null, contextlib.redirect_stdout(null):
+        bot = TradeBot()
+    try:
+        # tick を間隔なしで連続実行するため、秒間上限による間引きと板取得間の待ちは外して tick 単体のコストを測る
+        bot.budget.limits = {}
+        bot.board_interval_sec = 0.0
+        bot.universe = UniverseService(fallback=list(SYMBOLS), min_trading_value=0, price_max=1e9)
+        sc["setup"](bot, server.market)
+        bot.exchanges.prefetch(SYMBOLS)   # 優先市場・銘柄情報・規制情報は取引開始前に取得済みとして測る
+        bot.meta.prefetch(SYMBOLS)
+        bot.rules.refresh(SYMBOLS)
+        bot.margin.refresh()
+        lat: List[float] = []
+        alloc: List[float] = []
+        calls: Counter = Counter()
+        server.reset_calls()
+        if trace_alloc:
+            tracemalloc.start()
+        with open(os.devnull, "w") as null, contextlib.redirect_stdout(null):
+            for _ in range(ticks):
+                if trace_alloc:
+                    tracemalloc.reset_peak()
+                    base = tracemalloc.get_traced_memory()[0]
+                t0 = time.perf_counter()
+                bot.run()
+                lat.append((time.perf_counter() - t0) * 1000.0)
+                if trace_alloc:
+                    alloc.append((tracemalloc.get_traced_memory()[1] - base) / 1024.0)
+                calls.update(server.reset_calls())
+                server.market.step(1.0)
+        if trace_alloc:
+            tracemalloc.stop()
+    finally:
+        bot.warm.close()
+        bot.store.close()
+
+    return {
+        "scenario": name,
+        "ticks": ticks,
+        "p50_ms": round(_pct(lat, 0.50), 2),
+        "p99_ms": round(_pct(lat, 0.99), 2),
+        "mean_ms": round(statistics.fmean(lat), 2) if lat else 0.0,
+        "max_ms": round(max(lat), 2) if lat else 0.0,
+        "calls_per_tick": {k: round(v / ticks, 2) for k, v in sorted(calls.items())},
+        "total_calls_per_tick": round(sum(calls.values()) / ticks, 2),
+        "alloc_peak_kib_p50": round(_pct(alloc, 0.50), 1) if alloc else None,
+        "alloc_peak_kib_p99": round(_pct(alloc, 0.99), 1) if alloc else None,
+        "positions_end": {s: st.get("state") for s, st in bot.positions.items()},
+    }
+
+
+def run_bench(scenarios: List[str], ticks: int = 30, alloc: bool = True) -> List[Dict[str, Any]]:
+    """
+    代替サーバを起動して各シナリオを計測する。
+    時間計測と確保量計測は別パスで行う（tracemalloc のオーバーヘッドを時間に含めないため）。
+    """
+    if "const" in sys.modules:
+        raise RuntimeError("const は既に読み込まれています。bench_tick は単独のプロセスで実行してください。")
+    port = _free_port()
+    os.environ["KABUSAPI_BASE_URL"] = f"http://127.0.0.1:{port}/kabusapi/"
+    os.environ.setdefault("PRODUCTION_API_PASSWORD", "mock")
+    from mock_server import MockKabuServer
+    import board_recorder
+    board_recorder.board_record_enabled = False
+
+    server = MockKabuServer(_market({}), port=port, step_sec=0).start()
+    results = []
+    try:
+        for name in scenarios:
+            r = _run(server, name, ticks, trace_alloc=False)
+            if alloc:
+                a = _run(server, name, ticks, trace_alloc=True)
+                r["alloc_peak_kib_p50"] = a["alloc_peak_kib_p50"]
+                r["alloc_peak_kib_p99"] = a["alloc_peak_kib_p99"]
+            results.append(r)
+    finally:
+        server.stop()
+    return results
+
+
+def format_results(results: List[Dict[str, Any]]) -> str:
+    lines = []
+    for r in results:
+        lines.append(f"[{r['scenario']}] ticks={r['ticks']} p50={r['p50_ms']}ms p99={r['p99_ms']}ms "
+                     f"mean={r['mean_ms']}ms max={r['max_ms']}ms calls/tick={r['total_calls_per_tick']} "
+                     f"alloc_peak p50={r['alloc_peak_kib_p50']}KiB p99={r['alloc_peak_kib_p99']}KiB")
+        for ep, n in r["calls_per_tick"].items():
+            lines.append(f"    {ep:<24} {n}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="TradeBot tick benchmark against the local mock server")
+    ap.add_argument("--ticks", type=int, default=30)
+    ap.add_argument("--scenario", default=",".join(SCENARIOS), help="カンマ区切り: " + ",".join(SCENARIOS))
+    ap.add_argument("--no-alloc", action="store_true", help="tracemalloc による確保量計測を省略する")
+    ap.add_argument("--json", help="結果を書き出す JSON パス")
+    args = ap.parse_args()
+
+    logging.disable(logging.WARNING)
+    names = [s for s in args.scenario.split(",") if s]
+    unknown = [s for s in names if s not in SCENARIOS]
+    if unknown:
+        ap.error(f"unknown scenario: {unknown}")
+    results = run_bench(names, args.ticks, alloc=not args.no_alloc)
+    print(format_results(results))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
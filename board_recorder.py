@@ -0,0 +1,340 @@
+"""
+板スナップショットの記録（固定長バイナリ / 1日1銘柄1ファイル）と mmap による読み出し。
+
+ファイル: <root>/<YYYYMMDD>/<銘柄コード>.brd
+  先頭 HEADER_SIZE バイト: b"KBRD" + version(u4) + レコード長(u4) + 予約
+  以降: BOARD_DTYPE の固定長レコードを追記
+  書き込み途中で落ちた末尾の半端なレコードは読み出し時に無視する。
+  時刻（CurrentPriceTime / TradingVolumeTime）は epoch ns で持ち、読み出し時に JST の ISO 文字列へ戻す
+  （OneSecValue が無い板の近似は TradingVolumeTime からの当日経過秒を使うため）。
+  version 1（TradingVolumeTime なし）のファイルも読める。
+
+BoardLogReader はファイルを np.memmap で開き、列（例: reader.column("bid_px")[:, 0]）を
+コピーなしの NumPy ビューとして返す。backtest 用に板 dict へ戻す to_boards() もある。
+
+record_board()（kabusapi_board / kabusapi_websocket から呼ばれる）は板をキューに積むだけで、
+エンコードと書き込みは BoardRecordWriter のスレッドが行う（tick の経路でファイル I/O をしない）。
+"""
+from typing import Optional, Dict, Any, List, Tuple, Iterator
+from datetime import datetime, timedelta, timezone
+import atexit
+import logging
+import os
+import queue
+import struct
+import threading
+import time
+
+import numpy as np
+
+from const import board_record_dir, board_record_enabled, board_record_flush_every, board_record_queue_max
+
+logger = logging.getLogger(__name__)
+
+LEVELS = 10
+MAGIC = b"KBRD"
+VERSION = 2
+HEADER_SIZE = 64
+JST = timezone(timedelta(hours=9))
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+BOARD_DTYPE = np.dtype([
+    ("ts_ns", "<i8"),                 # 受信時刻 (epoch ns)
+    ("price_time_ns", "<i8"),         # CurrentPriceTime (epoch ns, 無ければ 0)
+    ("volume_time_ns", "<i8"),        # TradingVolumeTime (epoch ns, 無ければ 0)
+    ("cur_price", "<f8"),
+    ("trading_volume", "<f8"),
+    ("trading_value", "<f8"),
+    ("vwap", "<f8"),
+    ("one_sec_value", "<f8"),         # 無ければ NaN
+    ("mkt_buy_qty", "<f8"),
+    ("mkt_sell_qty", "<f8"),
+    ("over_sell_qty", "<f8"),
+    ("under_buy_qty", "<f8"),
+    ("ask_px", "<f8", (LEVELS,)),     # Sell1..Sell10（Sell1 が最良売り気配）
+    ("ask_qty", "<f8", (LEVELS,)),
+    ("bid_px", "<f8", (LEVELS,)),     # Buy1..Buy10（Buy1 が最良買い気配）
+    ("bid_qty", "<f8", (LEVELS,)),
+])
+
+# version 1 のレコード（volume_time_ns なし）
+BOARD_DTYPE_V1 = np.dtype([d for d in BOARD_DTYPE.descr if d[0] != "volume_time_ns"])
+_DTYPES = {1: BOARD_DTYPE_V1, VERSION: BOARD_DTYPE}
+
+# 板 dict の時刻キー ↔ レコード列
+_TIMES: List[Tuple[str, str]] = [
+    ("CurrentPriceTime", "price_time_ns"),
+    ("TradingVolumeTime", "volume_time_ns"),
+]
+
+# 板 dict のキー ↔ レコード列
+_SCALARS: List[Tuple[str, str]] = [
+    ("CurrentPrice", "cur_price"),
+    ("TradingVolume", "trading_volume"),
+    ("TradingValue", "trading_value"),
+    ("VWAP", "vwap"),
+    ("OneSecValue", "one_sec_value"),
+    ("MarketOrderBuyQty", "mkt_buy_qty"),
+    ("MarketOrderSellQty", "mkt_sell_qty"),
+    ("OverSellQty", "over_sell_qty"),
+    ("UnderBuyQty", "under_buy_qty"),
+]
+
+
+def _f(v: Any) -> float:
+    try:
+        return float(v) if v is not None else np.nan
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _iso_ns(v: Optional[str]) -> int:
+    """ISO 文字列 → epoch ns（タイムゾーンが無ければ JST とみなす）。無い・壊れていれば 0。"""
+    if not v:
+        return 0
+    try:
+        dt = datetime.fromisoformat(v)
+    except Exception:
+        return 0
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=JST)
+    d = dt - _EPOCH
+    return (d.days * 86400 + d.seconds) * 1_000_000_000 + d.microseconds * 1000
+
+
+def _ns_iso(ns: int) -> str:
+    """epoch ns → JST の ISO 文字列（'2025-08-20T13:01:33+09:00' の形）。"""
+    return (_EPOCH + timedelta(microseconds=ns // 1000)).astimezone(JST).isoformat()
+
+
+def encode_board(board: Dict[str, Any], ts: Optional[float] = None) -> np.ndarray:
+    """板 dict を1レコード（shape=(1,) の構造化配列）に変換する。"""
+    rec = np.zeros(1, dtype=BOARD_DTYPE)
+    r = rec[0]
+    r["ts_ns"] = int((time.time() if ts is None else ts) * 1e9)
+    for key, col in _TIMES:
+        r[col] = _iso_ns(board.get(key))
+    for key, col in _SCALARS:
+        r[col] = _f(board.get(key))
+    for i in range(LEVELS):
+        s = board.get(f"Sell{i + 1}") or {}
+        b = board.get(f"Buy{i + 1}") or {}
+        r["ask_px"][i] = _f(s.get("Price"))
+        r["ask_qty"][i] = _f(s.get("Qty"))
+        r["bid_px"][i] = _f(b.get("Price"))
+        r["bid_qty"][i] = _f(b.get("Qty"))
+    return rec
+
+
+def _header() -> bytes:
+    h = MAGIC + struct.pack("<II", VERSION, BOARD_DTYPE.itemsize)
+    return h + b"\0" * (HEADER_SIZE - len(h))
+
+
+class BoardRecorder:
+    """
+    板を <root>/<YYYYMMDD>/<銘柄>.brd に追記する。
+    ファイルは銘柄・日付ごとに開いたまま保持し、flush_every 件ごとに flush する。
+    """
+
+    def __init__(self, root: str = board_record_dir, flush_every: int = board_record_flush_every):
+        self.root = root
+        self.flush_every = max(1, int(flush_every))
+        self._files: Dict[Tuple[str, str], Any] = {}
+        self._pending = 0
+
+    def path_for(self, symbol: str, day: str) -> str:
+        return os.path.join(self.root, day, f"{symbol}.brd")
+
+    def _open(self, symbol: str, day: str):
+        key = (day, symbol)
+        f = self._files.get(key)
+        if f is not None:
+            return f
+        # 日付が変わったら前日のファイルは閉じる
+        for k in [k for k in self._files if k[0] != day]:
+            self._files.pop(k).close()
+        path = self.path_for(symbol, day)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        f = open(path, "ab")
+        if f.tell() == 0:
+            f.write(_header())
+        else:
+            # 前回途中で落ちた半端なレコードがあれば切り詰めてから追記する
+            body = f.tell() - HEADER_SIZE
+            tail = body % BOARD_DTYPE.itemsize
+            if tail:
+                f.close()
+                with open(path, "r+b") as t:
+                    t.truncate(HEADER_SIZE + body - tail)
+                f = open(path, "ab")
+        self._files[key] = f
+        return f
+
+    def record(self, board: Dict[str, Any], ts: Optional[float] = None) -> None:
+        """REST / PUSH いずれの板 dict も受け付ける（Symbol が無いものは無視）。"""
+        symbol = board.get("Symbol") if isinstance(board, dict) else None
+        if not symbol:
+            return
+        ts = time.time() if ts is None else ts
+        day = datetime.fromtimestamp(ts).strftime("%Y%m%d")
+        f = self._open(str(symbol), day)
+        f.write(encode_board(board, ts).tobytes())
+        self._pending += 1
+        if self._pending >= self.flush_every:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._pending:
+            return
+        for f in self._files.values():
+            f.flush()
+        self._pending = 0
+
+    def close(self) -> None:
+        self.flush()
+        for f in self._files.values():
+            f.close()
+        self._files.clear()
+
+
+class BoardRecordWriter:
+    """
+    BoardRecorder への追記を別スレッドで行う。put() はキューに積むだけで待たない
+    （キューが max_queue 件で詰まっていれば、その板は記録せず dropped を数える）。
+    キューが idle_flush_sec 空いたら flush する。close() で残りを書き切ってファイルを閉じる。
+    """
+
+    def __init__(self, recorder: Optional[BoardRecorder] = None, max_queue: int = board_record_queue_max,
+                 idle_flush_sec: float = 1.0):
+        self.recorder = recorder or BoardRecorder()
+        self.idle_flush_sec = idle_flush_sec
+        self.dropped = 0
+        self._q: "queue.Queue[Optional[Tuple[Dict[str, Any], float]]]" = queue.Queue(maxsize=max(1, int(max_queue)))
+        self._thread = threading.Thread(target=self._run, name="board-recorder", daemon=True)
+        self._thread.start()
+
+    def put(self, board: Dict[str, Any], ts: Optional[float] = None) -> None:
+        try:
+            self._q.put_nowait((board, time.time() if ts is None else ts))
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self) -> None:
+        while True:
+            try:
+                item = self._q.get(timeout=self.idle_flush_sec)
+            except queue.Empty:
+                self.recorder.flush()
+                continue
+            if item is None:
+                break
+            try:
+                self.recorder.record(*item)
+            except Exception as e:
+                logger.warning(f"板の記録に失敗しました: {e}")
+        self.recorder.close()
+
+    def close(self, timeout: float = 5.0) -> None:
+        if self._thread.is_alive():
+            self._q.put(None)
+            self._thread.join(timeout)
+        if self.dropped:
+            logger.warning(f"書き込みが追いつかず記録しなかった板: {self.dropped} 件")
+
+
+class BoardLogReader:
+    """.brd ファイルを np.memmap で開く（読み取り専用、コピーなし）。"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            head = f.read(HEADER_SIZE)
+        if head[:4] != MAGIC:
+            raise ValueError(f"{path}: not a board log")
+        version, itemsize = struct.unpack("<II", head[4:12])
+        dtype = _DTYPES.get(version)
+        if dtype is None or itemsize != dtype.itemsize:
+            raise ValueError(f"{path}: unsupported version={version} itemsize={itemsize}")
+        n = (os.path.getsize(path) - HEADER_SIZE) // dtype.itemsize
+        self.symbol = os.path.splitext(os.path.basename(path))[0]
+        self.version = version
+        self.records = (np.memmap(path, dtype=dtype, mode="r", offset=HEADER_SIZE, shape=(n,))
+                        if n > 0 else np.zeros(0, dtype=dtype))
+        self._times = [(key, col) for key, col in _TIMES if col in dtype.names]
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def column(self, name: str) -> np.ndarray:
+        """列のビュー（例: "ts_ns", "bid_px" は shape=(n, 10)）。"""
+        return self.records[name]
+
+    def board(self, i: int) -> Dict[str, Any]:
+        """i 番目のレコードを /board 形式の dict に戻す（backtest 用、"_ts" 付き）。"""
+        r = self.records[i]
+        out: Dict[str, Any] = {"Symbol": self.symbol, "_ts": int(r["ts_ns"]) / 1e9}
+        for key, col in self._times:
+            ns = int(r[col])
+            if ns:
+                out[key] = _ns_iso(ns)
+        for key, col in _SCALARS:
+            v = float(r[col])
+            if not np.isnan(v):
+                out[key] = v
+        for lv in range(LEVELS):
+            for side, px, qty in (("Sell", "ask_px", "ask_qty"), ("Buy", "bid_px", "bid_qty")):
+                p = float(r[px][lv])
+                if not np.isnan(p):
+                    out[f"{side}{lv + 1}"] = {"Price": p, "Qty": float(r[qty][lv])}
+        return out
+
+    def to_boards(self, chunk: int = 4096) -> Iterator[Dict[str, Any]]:
+        """board(i) と同じ dict を先頭から順に作る（chunk 件ずつ列を取り出して変換する）。"""
+        sides = [(f"{side}{lv + 1}", px, qty, lv) for lv in range(LEVELS)
+                 for side, px, qty in (("Sell", "ask_px", "ask_qty"), ("Buy", "bid_px", "bid_qty"))]
+        for a in range(0, len(self.records), chunk):
+            r = self.records[a:a + chunk]
+            ts = r["ts_ns"].tolist()
+            times = [(key, r[col].tolist()) for key, col in self._times]
+            scalars = [(key, r[col].tolist()) for key, col in _SCALARS]
+            levels = [(key, r[px][:, lv].tolist(), r[qty][:, lv].tolist()) for key, px, qty, lv in sides]
+            for j in range(len(ts)):
+                out: Dict[str, Any] = {"Symbol": self.symbol, "_ts": ts[j] / 1e9}
+                for key, col in times:
+                    if col[j]:
+                        out[key] = _ns_iso(col[j])
+                for key, col in scalars:
+                    v = col[j]
+                    if v == v:   # NaN は欠損
+                        out[key] = v
+                for key, px, qty in levels:
+                    if px[j] == px[j]:
+                        out[key] = {"Price": px[j], "Qty": qty[j]}
+                yield out
+
+    __iter__ = to_boards
+
+
+def open_day(day_dir: str) -> Dict[str, BoardLogReader]:
+    """日付ディレクトリ配下の .brd をすべて開いて {銘柄: reader} で返す。"""
+    return {os.path.splitext(n)[0]: BoardLogReader(os.path.join(day_dir, n))
+            for n in sorted(os.listdir(day_dir)) if n.endswith(".brd")}
+
+
+# --- 既定のレコーダー（kabusapi_board / kabusapi_websocket から呼ばれる） ---
+_default_writer: Optional[BoardRecordWriter] = None
+
+
+def record_board(board: Dict[str, Any], ts: Optional[float] = None) -> None:
+    """const.board_record_enabled が True なら板を既定の書き込みスレッドに渡す。記録失敗は握りつぶす。"""
+    global _default_writer
+    if not board_record_enabled:
+        return
+    try:
+        if _default_writer is None:
+            _default_writer = BoardRecordWriter()
+            atexit.register(_default_writer.close)
+        _default_writer.put(board, ts)
+    except Exception as e:
+        logger.warning(f"板の記録に失敗しました: {e}")
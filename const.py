@@ -6,12 +6,15 @@ target_symbol_no_exchange = '6740'
 
 total_limit = 1000000
 
+# 同時に保有・管理する銘柄数の上限
+max_positions = 3
+
 # # 検証環境
 # api_key = os.environ["VERIFI_API_PASSWORD"]
 # base_url = 'http://localhost:18081/kabusapi/'
 
-# 本番環境
-base_url = 'http://localhost:18080/kabusapi/'
+# 本番環境（KABUSAPI_BASE_URL でローカル代替サーバ mock_server.py 等に切り替え可能）
+base_url = os.environ.get("KABUSAPI_BASE_URL", 'http://localhost:18080/kabusapi/')
 api_key = os.environ["PRODUCTION_API_PASSWORD"]
 
 # 本日の午前0時のタイムスタンプを取得する関数
@@ -51,6 +54,67 @@ sell_obj = {
     "ExpireDay":      0         # 当日有効
 }
 
+# 信用新規（一般信用・デイトレ）。Side / Price / Qty / Exchange は発注時に上書き
+margin_daytrade_obj = {
+    "Symbol":          target_symbol_no_exchange,   # 銘柄コード
+    "Exchange":        1,       # 東証
+    "SecurityType":    1,       # 株式
+    "Side":            "1",     # 売建て（1）/ 買建て（2）
+    "CashMargin":      2,       # 信用新規
+    "MarginTradeType": 3,       # 一般信用（デイトレ）
+    "DelivType":       0,       # 新規は指定なし
+    "AccountType":     4,       # 特定口座（源泉徴収あり）
+    "Qty":             100,     # 株数
+    "FrontOrderType":  20,      # 指値
+    "Price":           0,
+    "ExpireDay":       0        # 当日有効
+}
+
+# 信用返済（建玉の選び方は ClosePositionOrder）。Side は建玉の反対（売建ての返済は買い＝2）
+margin_close_obj = {
+    "Symbol":             target_symbol_no_exchange,
+    "Exchange":           1,
+    "SecurityType":       1,
+    "Side":               "2",
+    "CashMargin":         3,    # 信用返済
+    "MarginTradeType":    3,    # 一般信用（デイトレ）
+    "DelivType":          2,    # お預り金
+    "AccountType":        4,
+    "Qty":                100,
+    "ClosePositionOrder": 0,    # 日付（古い順）→ 損益（高い順）
+    "FrontOrderType":     20,   # 指値
+    "Price":              0,
+    "ExpireDay":          0
+}
+
+# 先物・オプションの新規。Symbol は発注時に contracts の当日キャッシュ（期近など）から入れる
+future_new_obj = {
+    "Symbol":         "",
+    "Exchange":       23,       # 日中（24: 夜間、2: 日通し）
+    "TradeType":      1,        # 新規
+    "TimeInForce":    2,        # FAK
+    "Side":           "2",      # 買い（1: 売り）
+    "Qty":            1,
+    "FrontOrderType": 20,       # 指値
+    "Price":          0,
+    "ExpireDay":      0
+}
+option_new_obj = dict(future_new_obj)
+
+# 先物・オプションの返済（返済する建玉は hold_index.HoldIndex が ClosePositions を入れる）
+future_close_obj = {
+    "Symbol":         "",
+    "Exchange":       23,       # 日中（24: 夜間、2: 日通し）
+    "TradeType":      2,        # 返済
+    "TimeInForce":    2,        # FAK
+    "Side":           "2",
+    "Qty":            1,
+    "FrontOrderType": 20,       # 指値
+    "Price":          0,
+    "ExpireDay":      0
+}
+option_close_obj = dict(future_close_obj)
+
 today_start = get_today_midnight()
 buy_order_params = {
     "product": "0",  # Enum値（1: 現物取引）
@@ -75,6 +139,18 @@ order_params_by_id = {
     "updtime": today_start,  # 本日の午前0時のタイムスタンプ
 }
 
+def refresh_order_params(now=None):
+    """
+    注文照会パラメータの updtime（本日の午前0時）を now の日付に合わせて書き換え、today_start を返す。
+    常駐デーモンは日をまたいで動くため、日付が変わったら呼ぶ（各モジュールが import した dict をそのまま更新する）。
+    """
+    global today_start
+    now = now or datetime.now()
+    today_start = now.replace(hour=0, minute=0, second=0, microsecond=0).strftime('%Y%m%d%H%M%S')
+    for params in (buy_order_params, sell_order_params, order_params, order_params_by_id):
+        params["updtime"] = today_start
+    return today_start
+
 sample_order_history = [
   {
     "ID": "20250803A01B000001",
@@ -246,4 +322,93 @@ position_params = {
     'addinfo': 'false'  # true: 追加情報を出力する、false: 出力しない
 }
 
-symbol_list = ["1757", "9973", "6740", "8918", "4564"]
\ No newline at end of file
+symbol_list = ["1757", "9973", "6740", "8918", "4564"]
+
+# Bot 状態の永続化（state_store.py）
+state_snapshot_path = 'bot_state.json'
+state_journal_path = 'bot_state.journal'
+
+# 板スナップショットの記録（board_recorder.py）
+# 記録はバックテスト用の板を集めるときだけ有効にする（書き込みは別スレッド）
+board_record_enabled = False
+board_record_dir = 'board_log'
+board_record_flush_every = 200          # この件数ごとにファイルを flush（キューが空いたときも flush）
+board_record_queue_max = 10000          # 書き込み待ちの上限（超えた板は記録せず捨てる）
+
+# 動的ユニバース（ランキングAPI）設定
+universe_ranking_types = [5, 6, 7]      # 5:TICK回数 6:売買高急増 7:売買代金急増
+universe_exchange_division = 'T'        # T:東証全体
+universe_price_min = 1.0                # 価格帯（円）
+universe_price_max = 500.0
+universe_min_trading_value = 50_000_000 # 当日売買代金の下限（円）
+universe_max_symbols = 10               # search_buy_candidates に渡す最大銘柄数
+universe_refresh_sec = 60.0             # 再取得間隔（秒）
+info_api_rate_per_sec = 10              # 情報系APIの秒間上限（kabuステーション）
+universe_budget_share = 0.05            # ユニバース更新に割く情報系APIの割合
+
+# tick 計測・プロファイル（tick_profiler.py）
+tick_budget_sec = 1.0                   # 超過した tick は内訳を警告（初期値。以降は TradeBot.tick_interval_sec に追従）
+profile_control_path = 'profile.json'   # 更新すると次の tick から指定モードでプロファイル
+profile_dir = 'profile_log'
+
+# API 呼び出し予算（api_budget.py）: 区分ごとの秒間上限（kabuステーション API ドキュメント記載値）
+api_rate_limits = {'order': 5, 'info': 10, 'wallet': 10, 'register': 10}
+api_budget_window_sec = 1.0
+api_low_priority_reserve = 0.3          # 低優先度（候補の板巡回・ユニバース更新）が使わずに残す割合
+
+# 常駐デーモン（trade_daemon.py）
+session_windows = [('09:00', '11:30'), ('12:30', '15:00')]   # 取引する時間帯（前場 / 後場）
+session_warmup_sec = 120.0              # 開始前にトークン・ユニバースを温めておく秒数
+strategy_max_failures = 5               # 連続で失敗したら戦略（TradeBot）だけを作り直す
+strategy_restart_backoff_sec = 5.0
+
+# 稼働中に反映する設定ファイル（live_config.py）
+live_config_path = 'bot_config.json'
+
+# ウォームスタート用キャッシュ（warm_cache.py）
+warm_cache_path = 'warm_cache.json'
+warm_cache_save_sec = 1.0               # 書き出し間隔（書き込みはバックグラウンド）
+warm_cache_tick_max_age_sec = 3.0       # 板・注文・残高を最初の tick の保有管理に使える鮮度（新規には使わない）
+warm_cache_tracker_max_age_sec = 30.0   # 並び位置の推定を引き継げる鮮度
+
+# API 応答の表示（kabusapi_client.py）。True でステータス・ヘッダ・本文を毎回表示する（tick が遅くなる）
+api_verbose = False
+
+# 銘柄情報の日次キャッシュ（symbol_meta.py）: <dir>/<YYYYMMDD>.json
+symbol_meta_dir = 'symbol_meta'
+
+# 規制情報・プレミアム料の先読み（regulations.py）
+regulation_refresh_sec = 600.0          # 取り直し間隔（秒）。発注時はメモリ上の値だけを見る
+
+# オプションチェーン（option_chain.py）
+option_chain_dir = 'option_chain'       # 限月ごとの銘柄コードのキャッシュ
+option_chain_workers = 4                # /symbolname/option を並行に呼ぶスレッド数（秒間上限は api_budget で守る）
+push_register_max = 50                  # /register で登録できる銘柄数の上限
+
+# オプションの IV・グリークス（option_greeks.py）
+option_rate = 0.0                       # Black-76 の割引金利（年率）
+option_multipliers = {'NK225op': 1000, 'NK225miniop': 100}   # 取引単位（円/ポイント）
+
+# 先物の限月・週次ミニオプションの解決（contracts.py）
+contract_dir = 'contracts'              # 当日の銘柄コードのキャッシュ <dir>/<YYYYMMDD>.json
+future_codes = ['NK225', 'NK225mini']   # 期近・次限月を毎日解決しておく先物コード
+future_month_steps = {'NK225': 3, 'NK225mini': 1, 'NK225micro': 1, 'TOPIX': 3, 'MOTHERS': 3}   # 限月の間隔（月）
+future_roll_days = 0                    # 最終取引日の何営業日前に期近を次限月へ乗り換えるか
+
+# 優先市場の解決キャッシュ（primary_exchange.py）
+primary_exchange_path = 'primary_exchange.json'
+primary_exchange_max_age_days = 30.0    # これより古い解決結果は取り直す
+
+# 取引余力のまとめ（margin_view.py）
+margin_view_refresh_sec = 10.0          # 取り直し間隔（約定があれば次の tick で取り直す）
+margin_view_kinds = ['cash', 'margin', 'future', 'option']   # 取得する /wallet/* の種類
+
+# 信用デイトレ（TradeBot）。'sell' で売り建ての候補も取り、'buy' で買いの候補を現物でなく信用で建てる
+margin_daytrade_sides = []              # 例: ['sell'] / ['buy', 'sell']
+
+# 返済する建玉の索引（hold_index.py）
+hold_close_order = 0                    # 建玉を選ぶ順（ClosePositionOrder と同じ 0〜7。0: 日付の古い順 → 損益の高い順）
+
+# 約定後の決済（main.TradeBot）。'limit': 利確の指値を置く / 'stop': 取引所側の逆指値で損切りを置き、
+# 利確値に届いたら利確の指値に置き換える（reverse_limit.py）
+exit_style = 'limit'
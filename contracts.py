@@ -0,0 +1,213 @@
+"""
+先物の限月・日経225ミニオプション（週次）の限週の解決と、その日の銘柄コードのキャッシュ。
+
+- 限月の暦（SQ 日 = 第2金曜日、最終取引日 = その前営業日）から、先物コードごとの
+  期近（front）・次限月（next）を決める。最終取引日の future_roll_days 営業日前に期近を次限月へ乗り換える。
+- prepare() で当日分（const.future_codes の期近・次限月）を /symbolname/future でまとめて解決し、
+  メモリと <contract_dir>/<YYYYMMDD>.json に持つ。発注スクリプトは future() を呼ぶだけで、
+  当日のファイルを読むので /symbolname/* を待たない（未解決なら None）。
+- 週次ミニオプションは第2週（月次 SQ）以外の金曜日が満期。weekly_series() が期近・次の
+  (限月, 限週) を返し、weekly_chain() が option_chain.OptionChainBuilder で行使価格の格子を解決する。
+  weekly_option() は解決済みのチェーン（メモリ・キャッシュファイル）から銘柄コードを引くだけ。
+- 発注スクリプト（kabusapi_sendorder_future_* / option_*）は future_symbol() / weekly_option_symbol() で
+  プロセス内の既定の ContractResolver から銘柄コードを引く。
+祝日による前倒しは考慮しない（土日のみ休み）。
+
+使い方: python contracts.py [--weekly-center 27250]
+"""
+from datetime import date, timedelta
+from typing import Optional, Dict, Any, List, Tuple
+import argparse
+import json
+import logging
+import os
+
+from const import contract_dir, future_codes, future_month_steps, future_roll_days
+from kabusapi_symbolname_future import get_future_symbol
+from kabusapi_symbolname_minioptionweekly import get_minioption_weekly_symbol
+from state_store import atomic_write_json
+
+logger = logging.getLogger(__name__)
+
+
+# --- 暦 ---
+def sq_date(deriv_month: int) -> date:
+    """限月 yyyyMM の SQ 日（第2金曜日）。"""
+    y, m = divmod(int(deriv_month), 100)
+    d = date(y, m, 1)
+    first_fri = d + timedelta(days=(4 - d.weekday()) % 7)
+    return first_fri + timedelta(days=7)
+
+
+def prev_business_day(d: date, n: int = 1) -> date:
+    while n > 0:
+        d -= timedelta(days=1)
+        if d.weekday() < 5:
+            n -= 1
+    return d
+
+
+def last_trading_day(deriv_month: int) -> date:
+    return prev_business_day(sq_date(deriv_month))
+
+
+def _add_months(yyyymm: int, n: int) -> int:
+    y, m = divmod(int(yyyymm), 100)
+    y, m = divmod(y * 12 + (m - 1) + n, 12)
+    return y * 100 + m + 1
+
+
+def contract_months(future_code: str, today: date, count: int = 2,
+                    roll_days: int = future_roll_days) -> List[int]:
+    """today 時点で取引する限月を期近から count 個（乗り換え日以降は次限月が期近）。"""
+    step = int(future_month_steps.get(future_code, 3))
+    m = today.year * 100 + today.month
+    m = _add_months(m, (-today.month) % step)   # 当月以降で最初の限月（四半期なら 3/6/9/12 月）
+    out: List[int] = []
+    while len(out) < count:
+        if prev_business_day(last_trading_day(m), roll_days) >= today:   # roll_days=0 なら最終取引日まで
+            out.append(m)
+        m = _add_months(m, step)
+    return out
+
+
+def weekly_series(today: date, count: int = 2) -> List[Tuple[int, int, date]]:
+    """週次ミニオプションの (限月, 限週, 満期の金曜日) を期近から count 個（最終取引日が today 以降）。"""
+    out: List[Tuple[int, int, date]] = []
+    fri = today + timedelta(days=(4 - today.weekday()) % 7)
+    while len(out) < count:
+        week = (fri.day - 1) // 7 + 1
+        if week != 2 and prev_business_day(fri) >= today:
+            out.append((fri.year * 100 + fri.month, week, fri))
+        fri += timedelta(days=7)
+    return out
+
+
+class ContractResolver:
+    def __init__(self, codes: Optional[List[str]] = None, root: str = contract_dir,
+                 fetch_future=get_future_symbol, fetch_weekly=get_minioption_weekly_symbol):
+        self.codes = list(future_codes if codes is None else codes)
+        self.root = root
+        self._fetch_future = fetch_future
+        self._fetch_weekly = fetch_weekly
+        self.day: Optional[date] = None
+        self._futures: Dict[str, Dict[str, Any]] = {}   # "NK225:202612" → {'Symbol', 'SymbolName', 'DerivMonth'}
+        self._builders: Dict[Tuple[int, int], Any] = {}
+
+    def path_for(self, day: date) -> str:
+        return os.path.join(self.root, f"{day.strftime('%Y%m%d')}.json")
+
+    def _roll(self, today: Optional[date] = None) -> date:
+        """日付が変わっていれば当日のファイルを読み直す。"""
+        today = today or date.today()
+        if today == self.day:
+            return today
+        self.day = today
+        self._futures = {}
+        try:
+            with open(self.path_for(today), "r", encoding="utf-8") as f:
+                self._futures = dict(json.load(f).get("futures") or {})
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"限月キャッシュを読めません: {e}")
+        return today
+
+    # --- 先物 ---
+    def prepare(self, today: Optional[date] = None) -> int:
+        """当日の期近・次限月を解決してファイルに残し、新たに解決した数を返す。"""
+        today = self._roll(today)
+        n = 0
+        for code in self.codes:
+            for m in contract_months(code, today):
+                key = f"{code}:{m}"
+                if key in self._futures:
+                    continue
+                res = self._fetch_future(code, m)
+                if not isinstance(res, dict) or not res.get("Symbol"):
+                    logger.warning(f"先物の銘柄コードを解決できません: {code} {m} {res}")
+                    continue
+                self._futures[key] = {"Symbol": str(res["Symbol"]), "SymbolName": str(res.get("SymbolName") or ""),
+                                      "DerivMonth": m}
+                n += 1
+        if n:
+            try:
+                atomic_write_json(self.path_for(today), {"futures": self._futures})
+            except Exception as e:
+                logger.warning(f"限月キャッシュを書き込めません: {e}")
+        logger.info(f"先物の限月 {today}: {sorted(self._futures)}")
+        return n
+
+    def future(self, future_code: str, which: str = "front", today: Optional[date] = None) -> Optional[Dict[str, Any]]:
+        """期近（front）/ 次限月（next）の銘柄コード（メモリ・当日ファイルのみ。未解決なら None）。"""
+        today = self._roll(today)
+        months = contract_months(future_code, today)
+        m = months[0] if which == "front" else months[1]
+        return self._futures.get(f"{future_code}:{m}")
+
+    # --- 週次ミニオプション ---
+    def weekly_chain(self, center: float, width: int = 10, which: str = "front",
+                     today: Optional[date] = None):
+        """
+        期近（front）/ 次（next）の限週の行使価格の格子を解決した OptionChain を返す
+        （option_greeks.ChainGreeks.from_chain には expiry として満期の金曜日を渡す）。
+        """
+        today = self._roll(today)
+        month, week, _fri = weekly_series(today)[0 if which == "front" else 1]
+        return self._weekly_builder(month, week).build(month, center, width)
+
+    def weekly_option(self, put_or_call: str, strike: int, which: str = "front",
+                      today: Optional[date] = None) -> Optional[str]:
+        """期近/次の限週の銘柄コード（解決済みのチェーンのみ。/symbolname は呼ばず、未解決なら None）。"""
+        today = self._roll(today)
+        month, week, _fri = weekly_series(today)[0 if which == "front" else 1]
+        return self._weekly_builder(month, week).chain(month).symbol(put_or_call, strike)
+
+    def _weekly_builder(self, month: int, week: int):
+        from option_chain import OptionChainBuilder
+
+        b = self._builders.get((month, week))
+        if b is None:
+            b = OptionChainBuilder("NK225miniop", series=f"W{week}",
+                                   fetch=lambda _code, m, pc, k: self._fetch_weekly(m, week, pc, k))
+            self._builders[(month, week)] = b
+        return b
+
+
+# --- 発注スクリプト用（プロセス内の既定の ContractResolver） ---
+_default: Optional[ContractResolver] = None
+
+
+def default_resolver() -> ContractResolver:
+    global _default
+    if _default is None:
+        _default = ContractResolver()
+    return _default
+
+
+def future_symbol(future_code: str = "NK225", which: str = "front") -> Optional[str]:
+    """当日の期近/次限月の銘柄コード（未解決なら None。trade_daemon のウォームアップか contracts.py で解決しておく）。"""
+    c = default_resolver().future(future_code, which)
+    return c["Symbol"] if c else None
+
+
+def weekly_option_symbol(put_or_call: str, strike: int, which: str = "front") -> Optional[str]:
+    """週次ミニオプションの銘柄コード（解決済みのチェーンのみ。未解決なら None）。"""
+    return default_resolver().weekly_option(put_or_call, strike, which)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s: %(message)s')
+    ap = argparse.ArgumentParser(description="resolve today's futures / weekly mini option contracts")
+    ap.add_argument("--weekly-center", type=float, help="週次ミニオプションの行使価格の中心（省略時は解決しない）")
+    ap.add_argument("--width", type=int, default=10)
+    args = ap.parse_args()
+
+    r = ContractResolver()
+    r.prepare()
+    for code in r.codes:
+        print(code, "front", r.future(code, "front"), "next", r.future(code, "next"))
+    if args.weekly_center:
+        print(weekly_series(date.today()))
+        ch = r.weekly_chain(args.weekly_center, args.width)
+        print(f"{len(ch.codes)} 銘柄")
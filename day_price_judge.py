@@ -1,9 +1,10 @@
 from dataclasses import dataclass
-from typing import Optional, Tuple, Dict, Any, List
+from typing import Optional, Tuple, Dict, Any, List, Union, Callable
 import math
 from datetime import datetime, time as dtime, timedelta
 from const import symbol_list
 from kabusapi_board import get_board_info
+from queue_model import initial_bid_flow
 import time
 
 
@@ -50,38 +51,63 @@ class ScalpParams:
     vwap_max_abs_yen: float = 2.0              # 1.0 → 2.0
     vwap_max_pct: float = 0.004                # 0.2% → 0.4%
 
+    # --- 簡略版フィルタのしきい値（rank_buy_candidates / decide_prices_scalp） ---
+    min_spread_ticks: int = 1                  # Spread ≥ min_spread_ticks × tick
+    depth_ratio_limit: float = 2.0             # Sell1.Qty / Buy1.Qty ≤ depth_ratio_limit
+    exit_eta_limit_sec: float = 15.0           # (Sell1.Price × Sell1.Qty) / OneSecValue ≤ exit_eta_limit_sec
+
     # --- キュー先行量（埋まり見込み時間） ---
     max_queue_eta_sec: float = 10.0            # 3 → 10（並び許容を拡大）
     # ※ 退出側ETAは関数内の固定30sのままでもOK（必要なら 20–30s で調整）
+    queue_bid_flow_share: float = 0.5          # OneSecValue のうち Bid 側を消化する割合（初期推定。Ask 側は残り）
+    queue_min_fill_prob: float = 0.3           # hard_timeout までの残り時間内の約定確率がこれ未満なら取消
+    queue_hard_timeout_sec: float = 30.0       # 推定に関わらず取消する上限秒数
+    queue_poll_sec: float = 1.0                # 約定監視の板/注文ポーリング間隔
 
-# 買いの条件を満たす銘柄を見つける
-def search_buy_candidates() -> List[Dict[str, Any]]:
+def fetch_boards(symbols: List[str], exchange: Union[int, Callable[[str], int]] = 1, interval: float = 0.3,
+                 budget=None, low_priority: bool = False) -> Dict[str, Dict[str, Any]]:
     """
-    boards に含まれる各銘柄の板を評価し、
-    Spread≥1tick / Exit≤15s / 売り薄(≤2) を満たす中から
-    「退出ETAが最短」の銘柄の plan(dict) を1件だけ返す。
-    ヒットなしなら None。関数名・引数・戻り値の形式は元のまま。
-    ※ decide_prices_scalp の戻り値フォーマットは変更しない。
+    symbols（取引所なしのコード）の板を順に取得し、{コード: 板} で返す。
+    1 tick 内で買い候補探索と保有銘柄の管理が同じ板を共有するために使う。
+    exchange は市場コード、またはコード → 市場コードの関数（primary_exchange.ExchangeResolver.exchange）。
+    budget（api_budget.ApiBudget）を渡すと、情報系APIの残り枠に合わせて
+    低優先度なら残りを打ち切り、そうでなければ枠が空くまで待つ。
+    """
+    boards: Dict[str, Dict[str, Any]] = {}
+    for i, symbol in enumerate(symbols):
+        if i and interval > 0:
+            time.sleep(interval)
+        if budget is not None:
+            if low_priority:
+                if not budget.allow("info", low_priority=True):
+                    print(f"day_price_judge: 情報系APIの残り枠が少ないため板取得を打ち切り ({len(symbols) - i} 銘柄を見送り).")
+                    break
+            else:
+                wait = budget.wait("info")
+                if wait > 0:
+                    time.sleep(wait)
+        ex = exchange(symbol) if callable(exchange) else exchange
+        bd = get_board_info(f"{symbol}@{ex}")
+        if bd and bd.get("Symbol"):
+            boards[str(symbol)] = bd
+    return boards
+
+def rank_buy_candidates(boards: List[Dict[str, Any]], p: Optional[ScalpParams] = None) -> List[Dict[str, Any]]:
+    """
+    板リストを評価し、Spread≥1tick / Exit≤15s / 売り薄(≤2) を満たす銘柄の plan(dict) を
+    「退出ETAが短い → 比率が小さい → フロー大」の順に並べて返す。
     """
-    ETA_LIMIT   = 15.0
-    RATIO_LIMIT = 2.0
-    p = ScalpParams()
+    ranked = _rank(boards, p if p is not None else ScalpParams(), 1)
+    ranked.sort(key=lambda x: x[0])
+    return [plan for _, plan in ranked]
 
-    # boards が空なら従来フロー（symbol_list → get_board_info）で補完
-    source_boards: List[Dict[str, Any]] = []
-    if not source_boards:
-        for symbol in symbol_list:
-            time.sleep(0.3)
-            bd = get_board_info(f"{symbol}@1")
-            if bd:
-                source_boards.append(bd)
-
-    best_plan: Optional[Dict[str, Any]] = None
-    best_eta: float = float("inf")
-    best_ratio: float = float("inf")
-    best_symbol: Optional[str] = None
-
-    for bd in source_boards:
+def _rank(boards: List[Dict[str, Any]], p: ScalpParams,
+          side: int = 1) -> List[Tuple[Tuple[float, float, float], Dict[str, Any]]]:
+    """
+    side=+1 は買い（Buy1 に並ぶ）、-1 は売り建て（Sell1 に並ぶ）。並ぶ側と反対側を入れ替えるだけで同じ条件を見る。
+    """
+    ranked: List[Tuple[Tuple[float, float, float], Dict[str, Any]]] = []
+    for bd in boards:
         s1 = bd.get("Sell1") or {}
         b1 = bd.get("Buy1")  or {}
         ask = float(s1.get("Price") or bd.get("AskPrice") or 0.0)
@@ -94,55 +120,97 @@ def search_buy_candidates() -> List[Dict[str, Any]]:
 
         # 1) Spread ≥ 1tick
         tick = _infer_tick(bd, 1.0 if p.tick <= 0 else p.tick)
-        if ask - bid < tick:
+        if ask - bid < max(1, p.min_spread_ticks) * tick - 1e-9:
             continue
 
-        # 2) 売りが薄い/買いが厚い … Sell1.Qty / Buy1.Qty ≤ 2
+        # 2) 反対側が薄い/並ぶ側が厚い … 買いは Sell1.Qty / Buy1.Qty ≤ 2（売り建ては Buy1.Qty / Sell1.Qty）
         s1q = float(s1.get("Qty") or bd.get("AskQty") or 0.0)
         b1q = float(b1.get("Qty") or bd.get("BidQty") or 0.0)
-        if b1q <= 0:
+        join_q, opp_q, opp_px = (b1q, s1q, ask) if side > 0 else (s1q, b1q, bid)
+        if join_q <= 0:
             continue
-        ratio = s1q / b1q
-        if ratio > RATIO_LIMIT:
+        ratio = opp_q / join_q
+        if ratio > p.depth_ratio_limit:
             continue
 
-        # 3) Exit ≤ 15秒 … (Sell1.Price * Sell1.Qty) / OneSecValue ≤ 15
-        osv = float(bd.get("OneSecValue") or 0.0)
-        if osv <= 0.0:
-            tv = float(bd.get("TradingValue") or 0.0)
-            tstr = bd.get("TradingVolumeTime") or bd.get("CurrentPriceTime")
-            osv = (tv / max(_session_elapsed_seconds(tstr), 1)) * 0.35
+        # 3) Exit ≤ 15秒 … 買いは (Sell1.Price * Sell1.Qty) / OneSecValue ≤ 15（売り建ては Buy1）
+        osv = _one_sec_value(bd)
         if osv <= 0:
             continue
-        eta_exit = (ask * s1q) / osv
-        if eta_exit > ETA_LIMIT:
+        eta_exit = (opp_px * opp_q) / osv
+        if eta_exit > p.exit_eta_limit_sec:
             continue
 
-        # 上記フィルタ通過 → 実際の発注計画を既存関数で生成
-        plan = decide_prices_scalp(bd, p)
+        # 上記フィルタ通過 → 実際の発注計画を生成
+        plan = _decide_prices(bd, p, side)
         if not plan:
             continue
 
         # ランキング: ETA最短 → 比率が小さい → フロー大
-        better = (
-            (eta_exit < best_eta) or
-            (eta_exit == best_eta and ratio < best_ratio) or
-            (eta_exit == best_eta and ratio == best_ratio and osv > (best_plan.get("notes", {}).get("one_sec_value", -1) if best_plan else -1))
-        )
-        if better:
-            best_plan = plan
-            best_eta = eta_exit
-            best_ratio = ratio
-            best_symbol = bd.get("Symbol")
+        ranked.append(((eta_exit, ratio, -osv), plan))
+
+    return ranked
+
+def rank_sell_candidates(boards: List[Dict[str, Any]], p: Optional[ScalpParams] = None) -> List[Dict[str, Any]]:
+    """
+    rank_buy_candidates の売り建て版（信用デイトレ）。Spread≥1tick / Exit≤15s / 買い薄(≤2) を満たす銘柄の
+    plan(dict)（decide_prices_scalp_short の形式）を同じ順に並べて返す。
+    """
+    ranked = _rank(boards, p if p is not None else ScalpParams(), -1)
+    ranked.sort(key=lambda x: x[0])
+    return [plan for _, plan in ranked]
+
+def rank_candidates(boards: List[Dict[str, Any]], p: Optional[ScalpParams] = None,
+                    sides: Tuple[str, ...] = ("buy",)) -> List[Dict[str, Any]]:
+    """
+    sides（'buy' / 'sell'）の候補を同じ基準（退出ETA → 比率 → フロー）でまとめて並べる。
+    同じ銘柄が両方に入った場合は順位の高い方だけを残す。
+    """
+    if p is None:
+        p = ScalpParams()
+    ranked = (_rank(boards, p, 1) if "buy" in sides else []) + (_rank(boards, p, -1) if "sell" in sides else [])
+    ranked.sort(key=lambda x: x[0])
+    out: List[Dict[str, Any]] = []
+    seen = set()
+    for _, plan in ranked:
+        sym = plan.get("target_symbol")
+        if sym in seen:
+            continue
+        seen.add(sym)
+        out.append(plan)
+    return out
+
+# 買いの条件を満たす銘柄を見つける
+def search_buy_candidates(symbols: Optional[List[str]] = None,
+                          boards: Optional[List[Dict[str, Any]]] = None,
+                          p: Optional[ScalpParams] = None,
+                          exchange: Union[int, Callable[[str], int]] = 1) -> List[Dict[str, Any]]:
+    """
+    boards に含まれる各銘柄の板を評価し、
+    Spread≥1tick / Exit≤15s / 売り薄(≤2) を満たす中から
+    「退出ETAが最短」の銘柄の plan(dict) を1件だけ返す。
+    ヒットなしなら None。関数名・引数・戻り値の形式は元のまま。
+    ※ decide_prices_scalp の戻り値フォーマットは変更しない。
+    symbols: 評価対象の銘柄コード（取引所なし）。None なら const.symbol_list。
+    boards: 取得済みの板。指定時は板を取得しない。
+    exchange: 板を取得する市場（fetch_boards と同じ。既定は東証）。
+    """
+    # boards が空なら従来フロー（symbol_list → get_board_info）で補完
+    source_boards: List[Dict[str, Any]] = list(boards or [])
+    if not source_boards:
+        source_boards = list(fetch_boards(symbols if symbols is not None else symbol_list, exchange=exchange).values())
+
+    plans = rank_buy_candidates(source_boards, p)
+    best_plan = plans[0] if plans else None
 
     # 可能なら target_symbol をモジュール変数として更新（戻り値の形式は不変）
-    if best_symbol is not None:
+    if best_plan is not None:
         try:
-            globals()["target_symbol"] = best_symbol  # 副作用で最終候補を保持
+            globals()["target_symbol"] = best_plan.get("target_symbol")  # 副作用で最終候補を保持
         except Exception:
             pass
 
-    return best_plan if best_plan is not None else None
+    return best_plan
 
 
 
@@ -189,6 +257,15 @@ def _infer_tick(board: Dict[str, Any], fallback_tick: float) -> float:
         return 0.1
     return fallback_tick if fallback_tick > 0 else 1.0
 
+def _one_sec_value(board: Dict[str, Any]) -> float:
+    """OneSecValue（無ければ (TradingValue / 当日経過秒) * 0.35 で近似）。"""
+    osv = float(board.get("OneSecValue") or 0.0)
+    if osv <= 0.0:
+        tv = float(board.get("TradingValue") or 0.0)
+        tstr = board.get("TradingVolumeTime") or board.get("CurrentPriceTime")
+        osv = (tv / max(_session_elapsed_seconds(tstr), 1)) * 0.35
+    return osv
+
 def _session_elapsed_seconds(time_str: Optional[str]) -> int:
     """
     '2025-08-20T13:01:33+09:00' のようなISO文字列から、当日9:00:00(JST)からの経過秒を概算。
@@ -211,9 +288,35 @@ def decide_prices_scalp(board: Dict[str, Any], p: ScalpParams = ScalpParams()) -
       1) Spread ≥ 1tick  … Sell1.Price - Buy1.Price ≥ tick
       2) Exit ≤ 15秒      … (Sell1.Price * Sell1.Qty) / OneSecValue ≤ 15
       3) 売りが薄い/買いが厚い … Sell1.Qty / Buy1.Qty ≤ 2
+    加えて Buy1 の並び ETA（Buy1.Qty / Bid側消化速度）が p.max_queue_eta_sec 以下であること。
     * OneSecValue が無い場合は (TradingValue / 当日経過秒) * 0.35 で近似。
-    * 関数名・引数・戻り値の形式は既存と同じ。
+    * 関数名・引数は既存と同じ。戻り値は既存の形式に side='buy' を加えたもの。
     """
+    return _decide_prices(board, p, 1)
+
+
+def decide_prices_scalp_short(board: Dict[str, Any], p: ScalpParams = ScalpParams()) -> Optional[Dict[str, Any]]:
+    """
+    decide_prices_scalp の売り建て版（信用デイトレ）。板の売り買いを入れ替えた条件で判定し、
+    Sell1 に並んで売り建て、-1tick で買い戻し（利確）、+p.sl_ticks*tick で損切り。
+      1) Spread ≥ 1tick
+      2) Exit ≤ 15秒      … (Buy1.Price * Buy1.Qty) / OneSecValue ≤ 15
+      3) 買いが薄い/売りが厚い … Buy1.Qty / Sell1.Qty ≤ 2
+    加えて Sell1 の並び ETA（Sell1.Qty / Ask側消化速度）が p.max_queue_eta_sec 以下であること。
+    戻り値は decide_prices_scalp と同じ形式で side='sell'
+    （sell_price が新規売りの値段、buy_price が利確の買い戻しの値段）。
+    """
+    return _decide_prices(board, p, -1)
+
+
+# side → (並ぶ気配, 反対側の気配)。+1 は買い、-1 は売り建て
+_SIDES = {1: ("Buy", "Sell"), -1: ("Sell", "Buy")}
+
+
+def _decide_prices(board: Dict[str, Any], p: ScalpParams, side: int) -> Optional[Dict[str, Any]]:
+    """decide_prices_scalp / decide_prices_scalp_short の本体。side=+1 は買い、-1 は売り建て。"""
+    join, opp = _SIDES[side]
+
     # --- Best Bid/Ask（Sell1/Buy1優先、Ask/Bidはフォールバック） ---
     sell1 = board.get("Sell1") or {}
     buy1  = board.get("Buy1")  or {}
@@ -237,6 +340,7 @@ def decide_prices_scalp(board: Dict[str, Any], p: ScalpParams = ScalpParams()) -
     # --- Qty も Sell1/Buy1 を優先（notes用/比率用） ---
     ask_qty = float((sell1.get("Qty") if sell1 else board.get("AskQty")) or 0.0)
     bid_qty = float((buy1.get("Qty")  if buy1  else board.get("BidQty"))  or 0.0)
+    join_px, join_qty, opp_px, opp_qty = (bid, bid_qty, ask, ask_qty) if side > 0 else (ask, ask_qty, bid, bid_qty)
 
     # --- tick 決定 ---
     tick = _infer_tick(board, p.tick) if p.detect_tick_from_board else max(1e-9, p.tick)
@@ -248,42 +352,42 @@ def decide_prices_scalp(board: Dict[str, Any], p: ScalpParams = ScalpParams()) -
     spread_pct = spread / max(1.0, bid)
 
     # 1) Spread ≥ 1tick
-    if spread < tick:
+    if spread < max(1, p.min_spread_ticks) * tick - 1e-9:
         print(f"day_price_judge: Spread < 1tick (spread={spread:.4f}, tick={tick}).")
         return None
 
-    # 2) 売りが薄い/買いが厚い … Sell1.Qty / Buy1.Qty ≤ 2
-    RATIO_LIMIT = 2.0
-    if bid_qty <= 0:
-        print("day_price_judge: BidQty is zero; cannot evaluate ratio.")
+    # 2) 反対側が薄い/並ぶ側が厚い … 反対側1本目の Qty / 並ぶ側1本目の Qty ≤ 2
+    if join_qty <= 0:
+        print(f"day_price_judge: {'Bid' if side > 0 else 'Ask'}Qty is zero; cannot evaluate ratio.")
         return None
-    ratio = (ask_qty / bid_qty) if bid_qty > 0 else float("inf")
-    if ratio > RATIO_LIMIT:
-        print(f"day_price_judge: Depth ratio too heavy (Sell1/Buy1={ratio:.2f} > {RATIO_LIMIT}).")
+    ratio = opp_qty / join_qty
+    if ratio > p.depth_ratio_limit:
+        print(f"day_price_judge: Depth ratio too heavy ({opp}1/{join}1={ratio:.2f} > {p.depth_ratio_limit}).")
         return None
 
-    # 3) Exit ≤ 15秒 … (Sell1.Price * Sell1.Qty) / OneSecValue ≤ 15
-    one_sec_value = float(board.get("OneSecValue") or 0.0)
-    if one_sec_value <= 0.0:
-        tv = float(board.get("TradingValue") or 0.0)  # 当日売買代金(円)
-        tstr = board.get("TradingVolumeTime") or board.get("CurrentPriceTime")
-        elapsed = _session_elapsed_seconds(tstr)
-        one_sec_value = (tv / max(elapsed, 1)) * 0.35  # 保守近似
+    # 3) Exit ≤ 15秒 … (反対側1本目の Price * Qty) / OneSecValue ≤ 15
+    one_sec_value = _one_sec_value(board)
+    eta_exit = (opp_px * opp_qty) / max(one_sec_value, 1.0) if opp_px > 0 else float("inf")
+    if eta_exit > p.exit_eta_limit_sec:
+        print(f"day_price_judge: Exit ETA too long ({eta_exit:.2f}s > {p.exit_eta_limit_sec}s).")
+        return None
 
-    ETA_LIMIT = 15.0
-    eta_exit = (ask * ask_qty) / max(one_sec_value, 1.0) if ask > 0 else float("inf")
-    if eta_exit > ETA_LIMIT:
-        print(f"day_price_judge: Exit ETA too long ({eta_exit:.2f}s > {ETA_LIMIT}s).")
+    # 4) 並び ETA ≤ max_queue_eta_sec … 並ぶ側1本目の Qty / その側の消化速度（推定できる場合のみ）
+    flow = initial_bid_flow(board, p.queue_bid_flow_share, join)
+    queue_eta = (join_qty / flow) if flow > 0 else None
+    if queue_eta is not None and queue_eta > p.max_queue_eta_sec:
+        print(f"day_price_judge: Queue ETA too long ({queue_eta:.2f}s > {p.max_queue_eta_sec}s).")
         return None
 
-    # --- 条件クリア → Buy1でjoin、+1tick利確、-p.sl_ticks損切り ---
-    buy_price  = _round_to_tick(float(bid), tick)
-    tp_ticks   = 1
-    sell_price = _round_to_tick(buy_price + tp_ticks * tick, tick)
-    stop_price = _round_to_tick(buy_price - max(1, p.sl_ticks) * tick, tick)
+    # --- 条件クリア → 並ぶ側の1本目で join、利確は side 方向に +1tick、損切りは逆方向に p.sl_ticks ---
+    entry_price = _round_to_tick(join_px, tick)
+    tp_ticks    = 1
+    exit_price  = _round_to_tick(entry_price + side * tp_ticks * tick, tick)
+    stop_price  = _round_to_tick(entry_price - side * max(1, p.sl_ticks) * tick, tick)
 
-    if not (sell_price > buy_price and stop_price < buy_price):
-        print("day_price_judge: Invalid price order (sell/stop must be >/< buy).")
+    if not (side * (exit_price - entry_price) > 0 and side * (entry_price - stop_price) > 0) or exit_price <= 0:
+        print("day_price_judge: Invalid price order "
+              + ("(sell/stop must be >/< buy)." if side > 0 else "(buy/stop must be </> sell)."))
         return None
 
     # 参考: 成行/成買/成売の情報（不均衡メモ）
@@ -293,12 +397,14 @@ def decide_prices_scalp(board: Dict[str, Any], p: ScalpParams = ScalpParams()) -
 
     return {
         "target_symbol": board.get("Symbol", ""),
-        "buy_price": buy_price,
-        "sell_price": sell_price,
+        "side": "buy" if side > 0 else "sell",
+        # 買いは buy_price で並んで sell_price で利確、売り建ては sell_price で並んで buy_price で買い戻す
+        "buy_price": entry_price if side > 0 else exit_price,
+        "sell_price": exit_price if side > 0 else entry_price,
         "stop_price": stop_price,
         "AskPrice": ask,
         "BidPrice": bid,
-        "entry_style": "join",   # 常に Buy1 に並ぶ
+        "entry_style": "join",   # 常に並ぶ側の1本目に並ぶ
         "notes": {
             "tick": tick,
             "spread_ticks": spread_ticks,
@@ -312,5 +418,6 @@ def decide_prices_scalp(board: Dict[str, Any], p: ScalpParams = ScalpParams()) -
             "vol_ratio": 0.0,             # 簡略化のため未評価
             "is_surge": False,            # 簡略化のため未評価
             "one_sec_value": int(one_sec_value),
+            "queue_eta_sec": round(queue_eta, 2) if queue_eta is not None else None,
         }
     }
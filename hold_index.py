@@ -0,0 +1,206 @@
+"""
+建玉（/positions）の HoldID 索引と、返済数量の建玉への割り当て（ClosePositions の作成）。
+
+- load() に /positions の応答を渡すと、銘柄 × 建玉の売買 ごとに建玉（HoldID = ExecutionID）をまとめる。
+  返済できる数量は LeavesQty - HoldQty（返済注文で拘束中の分を除く）。
+- allocate() は ClosePositionOrder と同じ 8 通りの順（日付の古い/新しい × 損益の高い/低い）で建玉を選び、
+  [{'HoldID', 'Qty'}] を返す。順ごとのヒープを初回に作り、以降は選んだ建玉1つあたり O(log n)。
+  割り当てた数量は release() するか次の load() まで使用中として差し引く（同じ建玉を二重に返済しない）。
+- 損益の順は建値だけで決まる（同じ銘柄の建玉は現在値が共通なので、買建ては建値が低いほど、
+  売建ては高いほど損益が高い）。日付は約定日単位で比べ、日付・損益とも同じ建玉は ExecutionID の順。
+- close_order() は const の返済テンプレートに ClosePositions・Qty・売買を入れた発注内容を返す
+  （kabusapi_sendorder_*_pay_ClosePositions.py の send_*_close_positions_order にそのまま渡す）。
+
+信用は MarginTradeType ごとに返済注文が分かれるため、margin_trade_type を指定した索引を使う。
+"""
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, List, Tuple
+from copy import deepcopy
+import heapq
+import logging
+
+from const import margin_close_obj, future_close_obj, option_close_obj, hold_close_order
+
+logger = logging.getLogger(__name__)
+
+# 商品 → 返済テンプレート
+TEMPLATES = {"margin": margin_close_obj, "future": future_close_obj, "option": option_close_obj}
+
+# ClosePositionOrder → (先に見る項目, 日付は古い順か, 損益は高い順か)
+CLOSE_ORDERS = {
+    0: ("date", True, True),
+    1: ("date", True, False),
+    2: ("date", False, True),
+    3: ("date", False, False),
+    4: ("pnl", True, True),
+    5: ("pnl", False, True),
+    6: ("pnl", True, False),
+    7: ("pnl", False, False),
+}
+
+Group = Tuple[str, str]   # (銘柄コード, 建玉の売買 '1' 売建て / '2' 買建て)
+
+
+def _day(v: Any) -> int:
+    digits = "".join(c for c in str(v or "") if c.isdigit())
+    return int(digits[:8]) if len(digits) >= 8 else 0
+
+
+@dataclass
+class Hold:
+    hold_id: str
+    symbol: str
+    side: str
+    qty: float            # 返済できる残り（割り当て済みを除く）
+    price: float
+    day: int              # 約定日 yyyymmdd
+    exchange: int
+    margin_trade_type: Optional[int] = None
+    seq: int = 0          # 日付 → ExecutionID の順位（load 時に付ける）
+
+    @classmethod
+    def from_api(cls, p: Dict[str, Any]) -> "Hold":
+        mtt = p.get("MarginTradeType")
+        return cls(hold_id=str(p.get("ExecutionID")), symbol=str(p.get("Symbol")), side=str(p.get("Side")),
+                   qty=float(p.get("LeavesQty") or 0) - float(p.get("HoldQty") or 0),
+                   price=float(p.get("Price") or 0), day=_day(p.get("ExecutionDay")),
+                   exchange=int(p.get("Exchange") or 1), margin_trade_type=int(mtt) if mtt is not None else None)
+
+
+class HoldIndex:
+    def __init__(self, product: str = "margin", margin_trade_type: Optional[int] = None):
+        if product not in TEMPLATES:
+            raise ValueError(f"product は {list(TEMPLATES)} のいずれか: {product}")
+        self.product = product
+        self.margin_trade_type = margin_trade_type
+        self._holds: Dict[str, Hold] = {}
+        self._groups: Dict[Group, List[str]] = {}
+        self._available: Dict[Group, float] = {}
+        self._heaps: Dict[Tuple[Group, int], List[Tuple[Tuple[float, float, float], str]]] = {}
+        self._in_heap: Dict[Tuple[Group, int], set] = {}
+
+    # --- 構築 ---
+    def load(self, positions: Optional[List[Dict[str, Any]]]) -> int:
+        """/positions の応答で作り直し（割り当ては捨てる）、索引に入れた建玉の数を返す。"""
+        holds = []
+        for p in positions if isinstance(positions, list) else []:
+            if not p.get("ExecutionID"):
+                continue
+            h = Hold.from_api(p)
+            if h.qty <= 0:
+                continue
+            if self.margin_trade_type is not None and h.margin_trade_type not in (None, self.margin_trade_type):
+                continue
+            holds.append(h)
+        holds.sort(key=lambda h: (h.day, h.hold_id))
+        self._holds, self._groups, self._available = {}, {}, {}
+        self._heaps, self._in_heap = {}, {}
+        for i, h in enumerate(holds):
+            h.seq = i
+            self._holds[h.hold_id] = h
+            g = (h.symbol, h.side)
+            self._groups.setdefault(g, []).append(h.hold_id)
+            self._available[g] = self._available.get(g, 0.0) + h.qty
+        return len(holds)
+
+    def _key(self, h: Hold, order: int) -> Tuple[float, float, float]:
+        first, old_first, high_first = CLOSE_ORDERS[order]
+        date = h.day if old_first else -h.day
+        # 買建ては建値が低いほど、売建ては高いほど損益が高い
+        pnl = h.price if (h.side == "2") == high_first else -h.price
+        seq = h.seq if old_first else -h.seq   # 最後は ExecutionID の順
+        return (date, pnl, seq) if first == "date" else (pnl, date, seq)
+
+    def _heap(self, g: Group, order: int) -> List[Tuple[Tuple[float, float, float], str]]:
+        k = (g, order)
+        heap = self._heaps.get(k)
+        if heap is None:
+            ids = [hid for hid in self._groups.get(g, []) if self._holds[hid].qty > 0]
+            heap = [(self._key(self._holds[hid], order), hid) for hid in ids]
+            heapq.heapify(heap)
+            self._heaps[k] = heap
+            self._in_heap[k] = set(ids)
+        return heap
+
+    # --- 参照 ---
+    def available(self, symbol: str, side: str) -> float:
+        """返済に使える数量の合計（割り当て済みを除く）。"""
+        return self._available.get((str(symbol), str(side)), 0.0)
+
+    def holds(self, symbol: str, side: str) -> List[Hold]:
+        return [self._holds[hid] for hid in self._groups.get((str(symbol), str(side)), [])
+                if self._holds[hid].qty > 0]
+
+    # --- 割り当て ---
+    def allocate(self, symbol: str, side: str, qty: float,
+                 order: int = hold_close_order) -> Optional[List[Dict[str, Any]]]:
+        """
+        建玉の売買 side（'1' 売建て / '2' 買建て）の建玉から qty を order の順に割り当て、
+        ClosePositions の形で返す。返済できる数量が足りなければ何も割り当てずに None。
+        """
+        g = (str(symbol), str(side))
+        qty = float(qty)
+        if qty <= 0 or self._available.get(g, 0.0) < qty - 1e-9:
+            return None
+        heap = self._heap(g, order)
+        in_heap = self._in_heap[(g, order)]
+        out: List[Dict[str, Any]] = []
+        left = qty
+        while left > 1e-9 and heap:
+            _, hid = heap[0]
+            h = self._holds[hid]
+            if h.qty <= 0:
+                # 他の順の割り当てで使い切った建玉（遅延削除）
+                heapq.heappop(heap)
+                in_heap.discard(hid)
+                continue
+            n = min(left, h.qty)
+            h.qty -= n
+            left -= n
+            out.append({"HoldID": hid, "Qty": n})
+            if h.qty <= 0:
+                heapq.heappop(heap)
+                in_heap.discard(hid)
+        self._available[g] = self._available.get(g, 0.0) - (qty - left)
+        return out
+
+    def release(self, close_positions: List[Dict[str, Any]]) -> None:
+        """返済注文が通らなかった・取り消した割り当てを戻す。"""
+        for cp in close_positions or []:
+            h = self._holds.get(str(cp.get("HoldID")))
+            if h is None:
+                continue
+            n = float(cp.get("Qty") or 0)
+            h.qty += n
+            g = (h.symbol, h.side)
+            self._available[g] = self._available.get(g, 0.0) + n
+            for (hg, order), heap in self._heaps.items():
+                if hg == g and h.hold_id not in self._in_heap[(hg, order)]:
+                    heapq.heappush(heap, (self._key(h, order), h.hold_id))
+                    self._in_heap[(hg, order)].add(h.hold_id)
+
+    def close_order(self, symbol: str, side: str, qty: float, price: Optional[float] = None,
+                    order: int = hold_close_order, template: Optional[Dict[str, Any]] = None
+                    ) -> Optional[Dict[str, Any]]:
+        """
+        建玉の売買 side の建玉を qty 返済する発注内容（返済の売買は建玉の反対）。
+        割り当てられなければ None。price を省略するとテンプレートの値段のまま。
+        """
+        cps = self.allocate(symbol, side, qty, order)
+        if cps is None:
+            logger.info(f"返済できる建玉が足りません: {symbol} side={side} 必要 {qty} > {self.available(symbol, side)}")
+            return None
+        body = deepcopy(template if template is not None else TEMPLATES[self.product])
+        body.pop("ClosePositionOrder", None)
+        first = self._holds[cps[0]["HoldID"]]
+        body.update(Symbol=str(symbol), Exchange=first.exchange, Side="2" if str(side) == "1" else "1",
+                    Qty=_qty(qty), ClosePositions=[{"HoldID": cp["HoldID"], "Qty": _qty(cp["Qty"])} for cp in cps])
+        if self.product == "margin" and first.margin_trade_type is not None:
+            body["MarginTradeType"] = first.margin_trade_type
+        if price is not None:
+            body["Price"] = price
+        return body
+
+
+def _qty(q: float) -> Any:
+    return int(q) if float(q).is_integer() else q
@@ -1,23 +1,10 @@
-import urllib.request
-import json
-import pprint
+from kabusapi_client import request
 
-url = 'http://localhost:18080/kabusapi/apisoftlimit'
-req = urllib.request.Request(url, method='GET')
-req.add_header('Content-Type', 'application/json')
-req.add_header('X-API-KEY', '43e7cc3611fd476db35e93c36a3f77ef')
+def get_apisoftlimit(verbose=None):
+    # 発注のソフトリミット（商品別の1注文あたり上限, 単位:万円）
+    # {'Stock': 200.0, 'Margin': 200.0, 'Future': 10.0, 'FutureMini': 10.0, 'Option': 20.0, 'KabuSVersion': '5.x.x.x'}
+    return request('GET', 'apisoftlimit', verbose=verbose)
 
-try:
-    with urllib.request.urlopen(req) as res:
-        print(res.status, res.reason)
-        for header in res.getheaders():
-            print(header)
-        print()
-        content = json.loads(res.read())
-        pprint.pprint(content)
-except urllib.error.HTTPError as e:
-    print(e)
-    content = json.loads(e.read())
-    pprint.pprint(content)
-except Exception as e:
-    print(e)
\ No newline at end of file
+if __name__ == "__main__":
+    response = get_apisoftlimit(verbose=True)
+    print(response)
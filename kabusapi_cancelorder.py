@@ -1,12 +1,7 @@
 # kabusapi_cancelorder.py
-import urllib.request
-import urllib.error
-import json
-import pprint
-from kabusapi_token import get_token
-from const import base_url
+from kabusapi_client import request
 
-def cancel_order(order_id: str):
+def cancel_order(order_id: str, verbose=None):
     """
     kabuステーションAPI: 注文取消（/cancelorder）
     - 引数: order_id ... 取消対象の注文ID（例: "20200709A02N04712032"）
@@ -17,39 +12,10 @@ def cancel_order(order_id: str):
         "OrderId": order_id,
         # "OrderID": order_id,  # ← 互換が必要なら有効化
     }
-    json_data = json.dumps(payload).encode("utf-8")
-
-    url = f"{base_url}cancelorder"  # base_url 末尾にスラッシュが無い前提（他ファイルと同様）
-    req = urllib.request.Request(url, data=json_data, method="PUT")
-    req.add_header("Content-Type", "application/json")
-
-    # kabusapi_board/kabusapi_sendorder_cash_buy と同様、都度トークン取得してヘッダ付与
-    token = get_token()
-    req.add_header("X-API-KEY", token)
-
-    try:
-        with urllib.request.urlopen(req) as res:
-            print(res.status, res.reason)
-            for header in res.getheaders():
-                print(header)
-            print()
-            content = json.loads(res.read())
-            pprint.pprint(content)
-            return content
-    except urllib.error.HTTPError as e:
-        print(e)
-        try:
-            content = json.loads(e.read())
-            pprint.pprint(content)
-            return content
-        except Exception:
-            return None
-    except Exception as e:
-        print(e)
-        return None
+    return request("PUT", "cancelorder", body=payload, verbose=verbose)
 
 # 例: 単体テスト
 if __name__ == "__main__":
     # 実注文IDに置き換えて試してください
-    resp = cancel_order("20200709A02N04712032")
+    resp = cancel_order("20200709A02N04712032", verbose=True)
     print("cancel_order response:", resp)
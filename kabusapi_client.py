@@ -0,0 +1,79 @@
+"""
+kabuステーション API の共通クライアント（tick ごとに呼ぶラッパーが使う）。
+
+- JSON は orjson が入っていれば orjson、無ければ標準の json で読み書きする。
+- 応答の表示（ステータス・ヘッダ・pprint）は verbose=True のときだけ行う
+  （既定は const.api_verbose。スクリプトとして単体実行するときは各ラッパーが True を渡す）。
+- 応答は読み込んだ dict/list のまま返す（必要な項目だけを別の dict に詰め直すと、全体を読んだうえに
+  コピーが増えるだけなので行わない）。
+"""
+from typing import Optional, Dict, Any
+import json
+import pprint
+import urllib.error
+import urllib.parse
+import urllib.request
+
+from const import base_url, api_verbose
+from kabusapi_token import get_token
+
+try:
+    import orjson
+except ImportError:   # 任意依存: pip install orjson
+    orjson = None
+
+JSON_BACKEND = "orjson" if orjson is not None else "json"
+
+
+def loads(raw: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def dumps(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode("utf-8")
+
+
+# --- リクエスト ---
+def request(method: str, path: str, params: Optional[Dict[str, Any]] = None, body: Any = None,
+            verbose: Optional[bool] = None) -> Any:
+    """
+    base_url + path を呼び、応答 JSON を返す。
+    HTTP エラーはエラー応答の JSON を、それ以外の例外は None を返す（各ラッパーの従来の挙動）。
+    """
+    verbose = api_verbose if verbose is None else verbose
+    url = f"{base_url}{path}"
+    if params:
+        url = f"{url}?{urllib.parse.urlencode(params)}"
+    data = dumps(body) if body is not None else None
+    req = urllib.request.Request(url, data, method=method)
+    req.add_header("Content-Type", "application/json")
+    req.add_header("X-API-KEY", get_token())
+
+    try:
+        with urllib.request.urlopen(req) as res:
+            raw = res.read()
+            if verbose:
+                print(res.status, res.reason)
+                for header in res.getheaders():
+                    print(header)
+                print()
+            content = loads(raw)
+            if verbose:
+                pprint.pprint(content)
+            return content
+    except urllib.error.HTTPError as e:
+        print(e)
+        try:
+            content = loads(e.read())
+        except Exception:
+            return None
+        if verbose:
+            pprint.pprint(content)
+        return content
+    except Exception as e:
+        print(e)
+        return None
@@ -1,23 +1,11 @@
-import urllib.request
-import json
-import pprint
+from kabusapi_client import request
 
-url = 'http://localhost:18080/kabusapi/wallet/margin'
-req = urllib.request.Request(url, method='GET')
-req.add_header('Content-Type', 'application/json')
-req.add_header('X-API-KEY', 'ed94b0d34f9441c3931621e55230e402')
+def get_margin_wallet(symbol=None, verbose=None):
+    # symbol - None で口座全体、'銘柄@市場' で銘柄ごとの余力
+    # MarginAccountWallet（信用新規可能額）・DepositkeepRate（保証金維持率）など
+    path = f'wallet/margin/{symbol}' if symbol else 'wallet/margin'
+    return request('GET', path, verbose=verbose)
 
-try:
-    with urllib.request.urlopen(req) as res:
-        print(res.status, res.reason)
-        for header in res.getheaders():
-            print(header)
-        print()
-        content = json.loads(res.read())
-        pprint.pprint(content)
-except urllib.error.HTTPError as e:
-    print(e)
-    content = json.loads(e.read())
-    pprint.pprint(content)
-except Exception as e:
-    print(e)
+if __name__ == "__main__":
+    response = get_margin_wallet(verbose=True)
+    print(response)
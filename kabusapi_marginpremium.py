@@ -1,23 +1,9 @@
-import urllib.request
-import json
-import pprint
+from kabusapi_client import request
 
-url = 'http://localhost:18080/kabusapi/margin/marginpremium/6502'
-req = urllib.request.Request(url, method='GET')
-req.add_header('Content-Type', 'application/json')
-req.add_header('X-API-KEY', 'b730706551b7487395bd9dd20b67d21b')
+def get_margin_premium(symbol='6502', verbose=None):
+    # 銘柄コードのみ（市場なし）。GeneralMargin / DayTrade ごとの MarginPremiumType・MarginPremium など
+    return request('GET', f'margin/marginpremium/{symbol}', verbose=verbose)
 
-try:
-    with urllib.request.urlopen(req) as res:
-        print(res.status, res.reason)
-        for header in res.getheaders():
-            print(header)
-        print()
-        content = json.loads(res.read())
-        pprint.pprint(content)
-except urllib.error.HTTPError as e:
-    print(e)
-    content = json.loads(e.read())
-    pprint.pprint(content)
-except Exception as e:
-    print(e)
\ No newline at end of file
+if __name__ == "__main__":
+    response = get_margin_premium('6502', verbose=True)
+    print(response)
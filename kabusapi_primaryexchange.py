@@ -1,23 +1,9 @@
-import urllib.request
-import json
-import pprint
+from kabusapi_client import request
 
-url = 'http://localhost:18080/kabusapi/primaryexchange/9433'
-req = urllib.request.Request(url, method='GET')
-req.add_header('Content-Type', 'application/json')
-req.add_header('X-API-KEY', '43e7cc3611fd476db35e93c36a3f77ef')
+def get_primary_exchange(symbol='9433', verbose=None):
+    # 銘柄コードのみ（市場なし）。PrimaryExchange - 1:東証 3:名証 5:福証 6:札証
+    return request('GET', f'primaryexchange/{symbol}', verbose=verbose)
 
-try:
-    with urllib.request.urlopen(req) as res:
-        print(res.status, res.reason)
-        for header in res.getheaders():
-            print(header)
-        print()
-        content = json.loads(res.read())
-        pprint.pprint(content)
-except urllib.error.HTTPError as e:
-    print(e)
-    content = json.loads(e.read())
-    pprint.pprint(content)
-except Exception as e:
-    print(e)
\ No newline at end of file
+if __name__ == "__main__":
+    response = get_primary_exchange('9433', verbose=True)
+    print(response)
@@ -1,31 +1,13 @@
-import urllib.request
-import json
-import pprint
+from kabusapi_client import request
 
-obj = { 'Symbols':
-        [ 
-            {'Symbol': '9433', 'Exchange': 1},
-            {'Symbol': '165120018', 'Exchange': 2},
-            {'Symbol': '145123218', 'Exchange': 2}
-        ] }
-json_data = json.dumps(obj).encode('utf8')
+def register_symbols(symbols, verbose=None):
+    # symbols - [{'Symbol': '9433', 'Exchange': 1}, {'Symbol': '165120018', 'Exchange': 2}, ...]（登録は合計50銘柄まで）
+    return request('PUT', 'register', body={ 'Symbols': list(symbols) }, verbose=verbose)
 
-url = 'http://localhost:18080/kabusapi/register'
-req = urllib.request.Request(url, json_data, method='PUT')
-req.add_header('Content-Type', 'application/json')
-req.add_header('X-API-KEY', 'ed94b0d34f9441c3931621e55230e402')
-
-try:
-    with urllib.request.urlopen(req) as res:
-        print(res.status, res.reason)
-        for header in res.getheaders():
-            print(header)
-        print()
-        content = json.loads(res.read())
-        pprint.pprint(content)
-except urllib.error.HTTPError as e:
-    print(e)
-    content = json.loads(e.read())
-    pprint.pprint(content)
-except Exception as e:
-    print(e)
+if __name__ == "__main__":
+    response = register_symbols([
+        {'Symbol': '9433', 'Exchange': 1},
+        {'Symbol': '165120018', 'Exchange': 2},
+        {'Symbol': '145123218', 'Exchange': 2}
+    ], verbose=True)
+    print(response)
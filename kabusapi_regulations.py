@@ -1,23 +1,9 @@
-import urllib.request
-import json
-import pprint
+from kabusapi_client import request
 
-url = 'http://localhost:18080/kabusapi/regulations/9433@1'
-req = urllib.request.Request(url, method='GET')
-req.add_header('Content-Type', 'application/json')
-req.add_header('X-API-KEY', '43e7cc3611fd476db35e93c36a3f77ef')
+def get_regulations(symbol='9433@1', verbose=None):
+    # 銘柄@市場 の規制情報（RegulationsInfo: Exchange / Product / Side / Reason / LimitStartDay / LimitEndDay / Level）
+    return request('GET', f'regulations/{symbol}', verbose=verbose)
 
-try:
-    with urllib.request.urlopen(req) as res:
-        print(res.status, res.reason)
-        for header in res.getheaders():
-            print(header)
-        print()
-        content = json.loads(res.read())
-        pprint.pprint(content)
-except urllib.error.HTTPError as e:
-    print(e)
-    content = json.loads(e.read())
-    pprint.pprint(content)
-except Exception as e:
-    print(e)
\ No newline at end of file
+if __name__ == "__main__":
+    response = get_regulations('9433@1', verbose=True)
+    print(response)
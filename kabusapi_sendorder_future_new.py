@@ -1,41 +1,38 @@
-import urllib.request
-import json
-import pprint
+from copy import deepcopy
+import logging
 
-obj = { 'Symbol': '165120018',
-        'Exchange': 23,
-        'TradeType': 1,
-        'TimeInForce': 2,
-        'Side': '2',
-        'Qty': 3,
-        'FrontOrderType': 30,
-        'Price': 22000,
-        'ExpireDay': 0,
-        'ReverseLimitOrder': {
-                               'TriggerPrice': 26010,
-                               'UnderOver': 2, #1.以下 2.以上
-                               'AfterHitOrderType': 1, #1.成行 2.指値
-                               'AfterHitPrice': 0
-                             }
-      }
-json_data = json.dumps(obj).encode('utf-8')
+from kabusapi_client import request
+from contracts import future_symbol
+from const import future_new_obj
 
-url = 'http://localhost:18080/kabusapi/sendorder/future'
-req = urllib.request.Request(url, json_data, method='POST')
-req.add_header('Content-Type', 'application/json')
-req.add_header('X-API-KEY', 'ed94b0d34f9441c3931621e55230e402')
+logger = logging.getLogger(__name__)
 
-try:
-    with urllib.request.urlopen(req) as res:
-        print(res.status, res.reason)
-        for header in res.getheaders():
-            print(header)
-        print()
-        content = json.loads(res.read())
-        pprint.pprint(content)
-except urllib.error.HTTPError as e:
-    print(e)
-    content = json.loads(e.read())
-    pprint.pprint(content)
-except Exception as e:
-    print(e)
+def set_future_symbol(order_obj, future_code='NK225', which='front'):
+    """
+    order_obj に Symbol が無ければ future_code の期近（which='next' なら次限月）を contracts の当日キャッシュから入れる
+    （/symbolname/future は呼ばない）。銘柄コードが決まれば True、未解決なら False。
+    """
+    if order_obj.get('Symbol'):
+        return True
+    symbol = future_symbol(future_code, which)
+    if symbol is None:
+        logger.warning(f"先物の銘柄コードが未解決のため発注しません: {future_code} {which}")
+        return False
+    order_obj['Symbol'] = symbol
+    return True
+
+def send_future_new_order(order_obj, future_code='NK225', which='front', want_price=None, verbose=None):
+    """先物の新規（銘柄コードは set_future_symbol で決める。未解決なら発注せず None）。"""
+    if not set_future_symbol(order_obj, future_code, which):
+        return None
+    if want_price is not None:
+        order_obj['Price'] = want_price
+    return request('POST', 'sendorder/future', body=order_obj, verbose=verbose)
+
+if __name__ == "__main__":
+    from reverse_limit import attach_reverse_limit, OVER
+    obj = deepcopy(future_new_obj)
+    obj.update(Side='2', Qty=3)
+    # 26010 以上で成行の買い（逆指値）
+    obj = attach_reverse_limit(obj, 26010, OVER)
+    print(send_future_new_order(obj, 'NK225', 'front', verbose=True))
@@ -1,42 +1,24 @@
-import urllib.request
-import json
-import pprint
+from copy import deepcopy
 
-obj = { 'Symbol': '165120018',
-        'Exchange': 23,
-        'TradeType': 2,
-        'TimeInForce': 2,
-        'Side': '2',
-        'Qty': 3,
-        'ClosePositionOrder': 1,
-        'FrontOrderType': 30
-        'Price': 22000,
-        'ExpireDay': 0,
-        'ReverseLimitOrder': {
-                               'TriggerPrice': 26010,
-                               'UnderOver': 2, #1.以下 2.以上
-                               'AfterHitOrderType': 1, #1.成行 2.指値
-                               'AfterHitPrice': 0
-                             }
-      }
-json_data = json.dumps(obj).encode('utf-8')
+from kabusapi_client import request
+from kabusapi_sendorder_future_new import set_future_symbol
+from const import future_close_obj, hold_close_order
 
-url = 'http://localhost:18080/kabusapi/sendorder/future'
-req = urllib.request.Request(url, json_data, method='POST')
-req.add_header('Content-Type', 'application/json')
-req.add_header('X-API-KEY', 'ed94b0d34f9441c3931621e55230e402')
+def send_future_close_order(order_obj, future_code='NK225', which='front', want_price=None, verbose=None):
+    """
+    先物の返済（返済する建玉は order_obj の ClosePositionOrder の順に選ばれる）。
+    銘柄コードは set_future_symbol で決める（未解決なら発注せず None）。Side は返済の売買。
+    """
+    if not set_future_symbol(order_obj, future_code, which):
+        return None
+    if want_price is not None:
+        order_obj['Price'] = want_price
+    return request('POST', 'sendorder/future', body=order_obj, verbose=verbose)
 
-try:
-    with urllib.request.urlopen(req) as res:
-        print(res.status, res.reason)
-        for header in res.getheaders():
-            print(header)
-        print()
-        content = json.loads(res.read())
-        pprint.pprint(content)
-except urllib.error.HTTPError as e:
-    print(e)
-    content = json.loads(e.read())
-    pprint.pprint(content)
-except Exception as e:
-    print(e)
+if __name__ == "__main__":
+    from reverse_limit import attach_reverse_limit, OVER
+    obj = deepcopy(future_close_obj)
+    obj.update(Side='2', Qty=3, ClosePositionOrder=hold_close_order)
+    # 売り建玉を 26010 以上で成行の買い返済（逆指値の損切り）
+    obj = attach_reverse_limit(obj, 26010, OVER)
+    print(send_future_close_order(obj, 'NK225', 'front', verbose=True))
@@ -1,45 +1,18 @@
-import urllib.request
-import json
-import pprint
+from kabusapi_client import request
 
-obj = { 'Symbol': '165120018',
-        'Exchange': 23,
-        'TradeType': 2,
-        'TimeInForce': 1,
-        'Side': '2',
-        'Qty': 3,
-        'ClosePositions': [
-                           {'HoldID':'E20200924*****','Qty':2},
-                           {'HoldID':'E20200924*****','Qty':1}
-                          ],
-        'FrontOrderType': 20,
-        'Price': 22000,
-        'ExpireDay': 0,
-        'ReverseLimitOrder': {
-                               'TriggerPrice': 26010,
-                               'UnderOver': 2, #1.以下 2.以上
-                               'AfterHitOrderType': 1, #1.成行 2.指値
-                               'AfterHitPrice': 0
-                             }
-         }
-json_data = json.dumps(obj).encode('utf-8')
+def send_future_close_positions_order(order_obj, verbose=None):
+    """先物の返済（返済する建玉を order_obj の ClosePositions で指定。hold_index.HoldIndex.close_order の戻り値）。"""
+    return request('POST', 'sendorder/future', body=order_obj, verbose=verbose)
 
-url = 'http://localhost:18080/kabusapi/sendorder/future'
-req = urllib.request.Request(url, json_data, method='POST')
-req.add_header('Content-Type', 'application/json')
-req.add_header('X-API-KEY', 'ed94b0d34f9441c3931621e55230e402')
-
-try:
-    with urllib.request.urlopen(req) as res:
-        print(res.status, res.reason)
-        for header in res.getheaders():
-            print(header)
-        print()
-        content = json.loads(res.read())
-        pprint.pprint(content)
-except urllib.error.HTTPError as e:
-    print(e)
-    content = json.loads(e.read())
-    pprint.pprint(content)
-except Exception as e:
-    print(e)
+if __name__ == "__main__":
+    import sys
+    from hold_index import HoldIndex
+    from kabusapi_positions import get_positions
+    # 使い方: python kabusapi_sendorder_future_pay_ClosePositions.py <銘柄コード> <建玉の売買 1|2> <数量>
+    symbol, side, qty = sys.argv[1], sys.argv[2], float(sys.argv[3])
+    index = HoldIndex("future")
+    index.load(get_positions({'product': 3, 'symbol': symbol}))
+    body = index.close_order(symbol, side, qty)
+    print(body)
+    if body:
+        print(send_future_close_positions_order(body, verbose=True))
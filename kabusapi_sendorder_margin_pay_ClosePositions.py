@@ -1,49 +1,17 @@
-import urllib.request
-import json
-import pprint
+from kabusapi_client import request
+from const import margin_close_obj
 
-obj = { 'Symbol': '9433',
-        'Exchange': 1,
-        'SecurityType': 1,
-        'Side': '1',
-        'CashMargin': 3,
-        'MarginTradeType': 1,
-        'DelivType': 2,
-        'AccountType': 2,
-        'Qty': 200,
-        'ClosePositions': [
-                            {'HoldID':'E20200924*****','Qty':100},
-                            {'HoldID':'E20200924*****','Qty':100}
-                          ],
-        'FrontOrderType': 30,
-        'Price': 2762.5,
-        'ExpireDay': 0,
-        'ReverseLimitOrder': {
-                               'TriggerSec': 2, #1.発注銘柄 2.NK225指数 3.TOPIX指数
-                               'TriggerPrice': 30000,
-                               'UnderOver': 2, #1.以下 2.以上
-                               'AfterHitOrderType': 2, #1.成行 2.指値 3. 不成
-                               'AfterHitPrice': 8435
-                               }
-       }
-json_data = json.dumps(obj).encode('utf-8')
+def send_margin_close_positions_order(order_obj, verbose=None):
+    """信用返済（返済する建玉を order_obj の ClosePositions で指定。hold_index.HoldIndex.close_order の戻り値）。"""
+    return request('POST', 'sendorder', body=order_obj, verbose=verbose)
 
-url = 'http://localhost:18080/kabusapi/sendorder'
-req = urllib.request.Request(url, json_data, method='POST')
-req.add_header('Content-Type', 'application/json')
-req.add_header('X-API-KEY', 'ed94b0d34f9441c3931621e55230e402')
-
-try:
-    with urllib.request.urlopen(req) as res:
-        print(res.status, res.reason)
-        for header in res.getheaders():
-            print(header)
-        print()
-        content = json.loads(res.read())
-        pprint.pprint(content)
-except urllib.error.HTTPError as e:
-    print(e)
-    content = json.loads(e.read())
-    pprint.pprint(content)
-except Exception as e:
-    print(e)
+if __name__ == "__main__":
+    from hold_index import HoldIndex
+    from kabusapi_positions import get_positions
+    obj = dict(margin_close_obj)
+    index = HoldIndex("margin", margin_trade_type=obj["MarginTradeType"])
+    index.load(get_positions({'product': 2, 'symbol': obj['Symbol']}))
+    body = index.close_order(obj['Symbol'], "1" if obj['Side'] == "2" else "2", obj['Qty'])
+    print(body)
+    if body:
+        print(send_margin_close_positions_order(body, verbose=True))
@@ -1,41 +1,40 @@
-import urllib.request
-import json
-import pprint
+from copy import deepcopy
+import logging
 
-obj = { 'Symbol': '145123218',
-        'Exchange': 23,
-        'TradeType': 1,
-        'TimeInForce': 2,
-        'Side': '1',
-        'Qty': 5,
-        'FrontOrderType': 30,
-        'Price': 0,
-        'ExpireDay': 0,
-        'ReverseLimitOrder': {
-                               'TriggerPrice': 1150,
-                               'UnderOver': 1, #1.以下 2.以上
-                               'AfterHitOrderType': 1, #1.成行 2.指値
-                               'AfterHitPrice': 0
-                             }
-      }
-json_data = json.dumps(obj).encode('utf-8')
+from kabusapi_client import request
+from contracts import weekly_option_symbol
+from const import option_new_obj
 
-url = 'http://localhost:18080/kabusapi/sendorder/option'
-req = urllib.request.Request(url, json_data, method='POST')
-req.add_header('Content-Type', 'application/json')
-req.add_header('X-API-KEY', 'ed94b0d34f9441c3931621e55230e402')
+logger = logging.getLogger(__name__)
 
-try:
-    with urllib.request.urlopen(req) as res:
-        print(res.status, res.reason)
-        for header in res.getheaders():
-            print(header)
-        print()
-        content = json.loads(res.read())
-        pprint.pprint(content)
-except urllib.error.HTTPError as e:
-    print(e)
-    content = json.loads(e.read())
-    pprint.pprint(content)
-except Exception as e:
-    print(e)
+def set_option_symbol(order_obj, put_or_call=None, strike=None, which='front'):
+    """
+    order_obj に Symbol が無ければ週次ミニオプションの期近（which='next' なら次）の put_or_call / strike の
+    銘柄コードを解決済みのチェーンから入れる（/symbolname は呼ばない）。決まれば True、未解決なら False。
+    """
+    if order_obj.get('Symbol'):
+        return True
+    symbol = weekly_option_symbol(put_or_call, strike, which) if put_or_call and strike else None
+    if symbol is None:
+        logger.warning(f"オプションの銘柄コードが未解決のため発注しません: {put_or_call} {strike} {which}")
+        return False
+    order_obj['Symbol'] = symbol
+    return True
+
+def send_option_new_order(order_obj, put_or_call=None, strike=None, which='front', want_price=None, verbose=None):
+    """オプションの新規（銘柄コードは set_option_symbol で決める。未解決なら発注せず None）。"""
+    if not set_option_symbol(order_obj, put_or_call, strike, which):
+        return None
+    if want_price is not None:
+        order_obj['Price'] = want_price
+    return request('POST', 'sendorder/option', body=order_obj, verbose=verbose)
+
+if __name__ == "__main__":
+    import sys
+    from reverse_limit import attach_reverse_limit, UNDER
+    # 使い方: python kabusapi_sendorder_option_new.py <C|P> <行使価格>
+    obj = deepcopy(option_new_obj)
+    obj.update(Side='1', Qty=5)
+    # 1150 以下で成行の売り（逆指値）
+    obj = attach_reverse_limit(obj, 1150, UNDER)
+    print(send_option_new_order(obj, sys.argv[1], int(sys.argv[2]), verbose=True))
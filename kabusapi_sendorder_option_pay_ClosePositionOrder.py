@@ -1,42 +1,26 @@
-import urllib.request
-import json
-import pprint
+from copy import deepcopy
 
-obj = { 'Symbol': '145123218',
-        'Exchange': 23,
-        'TradeType': 2,
-        'TimeInForce': 2,
-        'Side': '2',
-        'Qty': 1,
-        'ClosePositionOrder': 1,
-        'FrontOrderType': 30,
-        'Price': 0,
-        'ExpireDay': 0,
-        'ReverseLimitOrder': {
-                               'TriggerPrice': 1150,
-                               'UnderOver': 1, #1.以下 2.以上
-                               'AfterHitOrderType': 1, #1.成行 2.指値
-                               'AfterHitPrice': 0
-                             }
-      }
-json_data = json.dumps(obj).encode('utf-8')
+from kabusapi_client import request
+from kabusapi_sendorder_option_new import set_option_symbol
+from const import option_close_obj
 
-url = 'http://localhost:18080/kabusapi/sendorder/option'
-req = urllib.request.Request(url, json_data, method='POST')
-req.add_header('Content-Type', 'application/json')
-req.add_header('X-API-KEY', 'ed94b0d34f9441c3931621e55230e402')
+def send_option_close_order(order_obj, put_or_call=None, strike=None, which='front', want_price=None, verbose=None):
+    """
+    オプションの返済（返済する建玉は order_obj の ClosePositionOrder の順に選ばれる）。
+    銘柄コードは set_option_symbol で決める（未解決なら発注せず None）。Side は返済の売買。
+    """
+    if not set_option_symbol(order_obj, put_or_call, strike, which):
+        return None
+    if want_price is not None:
+        order_obj['Price'] = want_price
+    return request('POST', 'sendorder/option', body=order_obj, verbose=verbose)
 
-try:
-    with urllib.request.urlopen(req) as res:
-        print(res.status, res.reason)
-        for header in res.getheaders():
-            print(header)
-        print()
-        content = json.loads(res.read())
-        pprint.pprint(content)
-except urllib.error.HTTPError as e:
-    print(e)
-    content = json.loads(e.read())
-    pprint.pprint(content)
-except Exception as e:
-    print(e)
+if __name__ == "__main__":
+    import sys
+    from reverse_limit import attach_reverse_limit, UNDER
+    # 使い方: python kabusapi_sendorder_option_pay_ClosePositionOrder.py <C|P> <行使価格>
+    obj = deepcopy(option_close_obj)
+    obj.update(Side='2', Qty=1, ClosePositionOrder=1)
+    # 売り建玉を 1150 以下で成行の買い返済（逆指値の利確）
+    obj = attach_reverse_limit(obj, 1150, UNDER)
+    print(send_option_close_order(obj, sys.argv[1], int(sys.argv[2]), verbose=True))
@@ -1,25 +1,11 @@
-import urllib.request
-import json
-import pprint
+from kabusapi_client import request
 
-url = 'http://localhost:18080/kabusapi/symbolname/future'
-params = { 'FutureCode': 'NK225', 'DerivMonth': 202012 }
+def get_future_symbol(future_code='NK225', deriv_month=0, verbose=None):
+    # future_code - NK225:日経平均先物、NK225mini:日経225mini、TOPIX:TOPIX先物 など
+    # deriv_month - 限月（yyyyMM）、0 は直近限月
+    params = { 'FutureCode': future_code, 'DerivMonth': deriv_month }
+    return request('GET', 'symbolname/future', params=params, verbose=verbose)
 
-req = urllib.request.Request('{}?{}'.format(url, urllib.parse.urlencode(params)), method='GET')
-req.add_header('Content-Type', 'application/json')
-req.add_header('X-API-KEY', 'ed94b0d34f9441c3931621e55230e402')
-
-try:
-    with urllib.request.urlopen(req) as res:
-        print(res.status, res.reason)
-        for header in res.getheaders():
-            print(header)
-        print()
-        content = json.loads(res.read())
-        pprint.pprint(content)
-except urllib.error.HTTPError as e:
-    print(e)
-    content = json.loads(e.read())
-    pprint.pprint(content)
-except Exception as e:
-    print(e)
+if __name__ == "__main__":
+    response = get_future_symbol('NK225', 202012, verbose=True)
+    print(response)
@@ -1,25 +1,10 @@
-import urllib.request
-import json
-import pprint
+from kabusapi_client import request
 
-url = 'http://localhost:18080/kabusapi/symbolname/minioptionweekly'
-params = { 'DerivMonth': 202306, 'DerivWeekly': 1, 'PutOrCall': 'C', 'StrikePrice': 27250 }
+def get_minioption_weekly_symbol(deriv_month=202306, deriv_weekly=1, put_or_call='C', strike_price=27250, verbose=None):
+    # deriv_weekly - 限週 1:第1週 3:第3週 4:第4週 5:第5週（第2週は月次の SQ のため指定不可）
+    params = { 'DerivMonth': deriv_month, 'DerivWeekly': deriv_weekly, 'PutOrCall': put_or_call, 'StrikePrice': strike_price }
+    return request('GET', 'symbolname/minioptionweekly', params=params, verbose=verbose)
 
-req = urllib.request.Request('{}?{}'.format(url, urllib.parse.urlencode(params)), method='GET')
-req.add_header('Content-Type', 'application/json')
-req.add_header('X-API-KEY', '4e6652bf433a4a799f86d26988c306c3')
-
-try:
-    with urllib.request.urlopen(req) as res:
-        print(res.status, res.reason)
-        for header in res.getheaders():
-            print(header)
-        print()
-        content = json.loads(res.read())
-        pprint.pprint(content)
-except urllib.error.HTTPError as e:
-    print(e)
-    content = json.loads(e.read())
-    pprint.pprint(content)
-except Exception as e:
-    print(e)
+if __name__ == "__main__":
+    response = get_minioption_weekly_symbol(202306, 1, 'C', 27250, verbose=True)
+    print(response)
@@ -1,26 +1,12 @@
-import urllib.request
-import json
-import pprint
+from kabusapi_client import request
 
-url = 'http://localhost:18080/kabusapi/symbolname/option'
-#params = { 'OptionCode': 'NK225op', 'DerivMonth': 202306, 'PutOrCall': 'C', 'StrikePrice': 27250 }
-params = { 'OptionCode': 'NK225miniop', 'DerivMonth': 202306, 'PutOrCall': 'C', 'StrikePrice': 27250 }
+def get_option_symbol(option_code='NK225miniop', deriv_month=202306, put_or_call='C', strike_price=27250, verbose=None):
+    # option_code - NK225op:日経225オプション、NK225miniop:日経225ミニオプション
+    # deriv_month - 限月（yyyyMM）、0 は直近限月
+    params = { 'OptionCode': option_code, 'DerivMonth': deriv_month, 'PutOrCall': put_or_call, 'StrikePrice': strike_price }
+    return request('GET', 'symbolname/option', params=params, verbose=verbose)
 
-req = urllib.request.Request('{}?{}'.format(url, urllib.parse.urlencode(params)), method='GET')
-req.add_header('Content-Type', 'application/json')
-req.add_header('X-API-KEY', '4e6652bf433a4a799f86d26988c306c3')
-
-try:
-    with urllib.request.urlopen(req) as res:
-        print(res.status, res.reason)
-        for header in res.getheaders():
-            print(header)
-        print()
-        content = json.loads(res.read())
-        pprint.pprint(content)
-except urllib.error.HTTPError as e:
-    print(e)
-    content = json.loads(e.read())
-    pprint.pprint(content)
-except Exception as e:
-    print(e)
+if __name__ == "__main__":
+    #response = get_option_symbol('NK225op', 202306, 'C', 27250, verbose=True)
+    response = get_option_symbol('NK225miniop', 202306, 'C', 27250, verbose=True)
+    print(response)
@@ -78,6 +78,13 @@ def get_token(ttl: float = DEFAULT_TOKEN_TTL) -> str:
         raise RuntimeError(f'Failed to obtain token: {e}') from e
 
 
+def invalidate_token() -> None:
+    """Drop the cached token (e.g. after a 401) so the next get_token() requests a new one."""
+    global _token_cache, _token_expiry
+    _token_cache = None
+    _token_expiry = 0.0
+
+
 if __name__ == '__main__':
     # quick smoke test
     try:
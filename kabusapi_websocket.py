@@ -1,10 +1,16 @@
 import sys
 import websocket
 import _thread
+from board_recorder import record_board
+from kabusapi_client import loads
 
 def on_message(ws, message):
     print('--- RECV MSG. --- ')
     print(message)
+    try:
+        record_board(loads(message))
+    except ValueError:
+        pass
 
 def on_error(ws, error):
     print('--- ERROR --- ')
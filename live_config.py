@@ -0,0 +1,144 @@
+"""
+稼働中の設定変更（ホットリロード）。
+
+const.live_config_path の JSON を tick の合間に mtime で監視し、変更があれば読み込んで検証する。
+検証に通った場合だけ ConfigWatcher.poll() が新しい設定を返し、TradeBot.apply_config() が
+まとめて差し替える（途中で失敗した場合は何も変えない）。ファイルが無ければ何もしない。
+
+    {
+      "params":   {"exit_eta_limit_sec": 12.0, "depth_ratio_limit": 2.5},   … ScalpParams の項目
+      "universe": {"symbols": ["1757", "9973"], "price_max": 400, "max_symbols": 8,
+                   "min_trading_value": 30000000, "refresh_sec": 120},
+      "total_limit": 1000000,
+      "max_positions": 3,
+      "intervals": {"tick_sec": 1.0, "board_sec": 0.3}
+    }
+
+"universe.symbols" はランキングが取れないときの既定銘柄（const.symbol_list）を置き換える。
+"""
+from dataclasses import fields
+from typing import Optional, Dict, Any, get_args
+import json
+import logging
+import os
+
+from const import live_config_path
+from day_price_judge import ScalpParams
+
+logger = logging.getLogger(__name__)
+
+_PARAM_TYPES = {f.name: f.type for f in fields(ScalpParams)}
+
+_UNIVERSE_KEYS = {
+    "symbols": list,
+    "price_min": float,
+    "price_max": float,
+    "min_trading_value": float,
+    "max_symbols": int,
+    "refresh_sec": float,
+}
+
+_INTERVAL_KEYS = {"tick_sec", "board_sec"}
+
+
+def _coerce(name: str, value: Any, typ) -> Any:
+    """JSON の値を ScalpParams / ユニバースの型に合わせる（bool と数値の取り違えは拒否）。"""
+    args = get_args(typ)
+    if type(None) in args:   # Optional[int] など
+        if value is None:
+            return None
+        typ = next(a for a in args if a is not type(None))
+    if typ in (bool, "bool"):
+        if not isinstance(value, bool):
+            raise ValueError(f"{name}: bool が必要です ({value!r})")
+        return value
+    if typ in (int, "int"):
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or int(value) != value:
+            raise ValueError(f"{name}: 整数が必要です ({value!r})")
+        return int(value)
+    if typ in (float, "float"):
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError(f"{name}: 数値が必要です ({value!r})")
+        return float(value)
+    if typ is list:
+        if not isinstance(value, list) or not value:
+            raise ValueError(f"{name}: 空でないリストが必要です")
+        return [str(v) for v in value]
+    return value
+
+
+def validate_config(raw: Dict[str, Any]) -> Dict[str, Any]:
+    """設定 dict を検証・型変換して返す。不正なら ValueError。"""
+    if not isinstance(raw, dict):
+        raise ValueError("設定はオブジェクトである必要があります")
+    unknown = set(raw) - {"params", "universe", "total_limit", "max_positions", "intervals"}
+    if unknown:
+        raise ValueError(f"不明な項目: {sorted(unknown)}")
+
+    cfg: Dict[str, Any] = {}
+    params = raw.get("params") or {}
+    bad = [k for k in params if k not in _PARAM_TYPES]
+    if bad:
+        raise ValueError(f"ScalpParams に無い項目です: {bad}")
+    cfg["params"] = {k: _coerce(k, v, _PARAM_TYPES[k]) for k, v in params.items()}
+    p = ScalpParams(**cfg["params"])
+    if p.tick <= 0 or p.take_profit_yen < 0:
+        raise ValueError("tick は正、take_profit_yen は 0 以上である必要があります")
+
+    uni = raw.get("universe") or {}
+    bad = [k for k in uni if k not in _UNIVERSE_KEYS]
+    if bad:
+        raise ValueError(f"universe に無い項目です: {bad}")
+    cfg["universe"] = {k: _coerce(f"universe.{k}", v, _UNIVERSE_KEYS[k]) for k, v in uni.items()}
+    u = cfg["universe"]
+    if u.get("price_min", 0.0) > u.get("price_max", float("inf")):
+        raise ValueError("universe.price_min が price_max を超えています")
+    if u.get("max_symbols", 1) < 1 or u.get("refresh_sec", 1.0) <= 0:
+        raise ValueError("universe.max_symbols / refresh_sec は正である必要があります")
+
+    if "total_limit" in raw:
+        cfg["total_limit"] = _coerce("total_limit", raw["total_limit"], float)
+        if cfg["total_limit"] <= 0:
+            raise ValueError("total_limit は正である必要があります")
+    if "max_positions" in raw:
+        cfg["max_positions"] = _coerce("max_positions", raw["max_positions"], int)
+        if cfg["max_positions"] < 0:
+            raise ValueError("max_positions は 0 以上である必要があります")
+
+    iv = raw.get("intervals") or {}
+    bad = [k for k in iv if k not in _INTERVAL_KEYS]
+    if bad:
+        raise ValueError(f"intervals に無い項目です: {bad}")
+    cfg["intervals"] = {k: _coerce(f"intervals.{k}", v, float) for k, v in iv.items()}
+    if cfg["intervals"].get("tick_sec", 1.0) <= 0 or cfg["intervals"].get("board_sec", 0.0) < 0:
+        raise ValueError("intervals.tick_sec は正、board_sec は 0 以上である必要があります")
+    return cfg
+
+
+class ConfigWatcher:
+    """設定ファイルの mtime を見て、変わったときだけ読み込み・検証する。"""
+
+    def __init__(self, path: str = live_config_path):
+        self.path = path
+        self._mtime: Optional[float] = None
+        self.current: Optional[Dict[str, Any]] = None
+        self.errors = 0
+
+    def poll(self) -> Optional[Dict[str, Any]]:
+        """変更があり検証に通れば新しい設定を返す。変更なし・不正なら None（現在の設定を維持）。"""
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            return None
+        if mtime == self._mtime:
+            return None
+        self._mtime = mtime
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                cfg = validate_config(json.load(f))
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"設定ファイルを反映しません（現在の設定を維持）: {e}")
+            return None
+        self.current = cfg
+        return cfg
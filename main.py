@@ -1,17 +1,36 @@
 import logging
 import time
 from datetime import datetime, time as dtime
+from typing import Optional, Dict, Any, List
 from kabusapi_board import get_board_info
 from kabusapi_positions import get_positions
 from kabusapi_sendorder_cash_sell import send_cash_sell_order
 from kabusapi_sendorder_cash_buy import send_cash_buy_order
+from kabusapi_sendorder_margin_daytrade import send_margin_daytrade_order
+from kabusapi_sendorder_margin_pay_ClosePositionOrder import send_margin_close_order
+from kabusapi_sendorder_margin_pay_ClosePositions import send_margin_close_positions_order
 from kabusapi_cash import get_cash_balance
-from const import target_symbol, position_params, sell_obj, buy_obj, order_params_by_id, target_symbol_no_exchange
-from total_func import is_within_limit, confirm_state, get_total, check_trades_and_limit
+from const import target_symbol, position_params, sell_obj, buy_obj, order_params_by_id, target_symbol_no_exchange, max_positions, total_limit, symbol_list
+from total_func import is_within_limit, confirm_state, pending_symbols, traded_total
 from kabusapi_orders import get_orders
-from order_get import latest_detail_of_latest_order
+from order_get import latest_detail_of_latest_order, order_cum_qty
+from queue_model import QueueTracker
+from universe import UniverseService
+from const import margin_daytrade_obj, margin_close_obj, margin_daytrade_sides, exit_style
+from const import universe_price_min, universe_price_max, universe_min_trading_value, universe_max_symbols, universe_refresh_sec
+from state_store import StateStore
+from tick_profiler import TickProfiler
+from api_budget import install_budget
+from live_config import ConfigWatcher
+from warm_cache import WarmCache
+from symbol_meta import SymbolMetaService
+from regulations import RegulationService
+from primary_exchange import ExchangeResolver
+from margin_view import MarginView
+from hold_index import HoldIndex
+from reverse_limit import stop_exit
 import json
-from day_price_judge import decide_prices_scalp, ScalpParams, search_buy_candidates
+from day_price_judge import ScalpParams, fetch_boards, rank_candidates
 from copy import deepcopy
 from kabusapi_cancelorder import cancel_order
 
@@ -21,20 +40,58 @@ logger = logging.getLogger(__name__)
 
 class TradeBot:
     """
-    ランド株(8918)の短期売買を行うBot。
-    - 現物買いは <= BUY_THRESHOLD
-    - 現物売りは >= SELL_THRESHOLD
-    - ポジション管理: 0株->買い, 保有->売り
-    - 1日の取引上限チェック, 未約定注文の確認
+    ユニバース銘柄の短期売買（Buy1 join → +1円利確）を行うBot。
+    - 銘柄ごとに entry / holding / exiting の状態をメモリで管理し（永続化は StateStore が非同期で行う）、最大 max_positions 銘柄を同時に保有
+    - margin_daytrade_sides に 'sell' があれば逆の形の板で信用デイトレの売り建て（Sell1 join → -1円で買い戻し）も取る。
+      'buy' があれば買いを現物でなく信用デイトレで建てる。どちらも現物と同じ状態管理・ガードを通る
+    - exit_style='stop' なら約定後に取引所側の逆指値で損切りを置き、板が利確値に届いたら利確の指値に置き換える
+    - 板・注文・残高は tick ごとに1回だけ取得し、全銘柄の判定で共有
+    - 1日の取引上限チェック, 銘柄別の未約定注文の確認
     """
     BUY_THRESHOLD = 9.2
     SELL_THRESHOLD = 9.8
     TRADE_QTY = 100
 
-    def __init__(self):
+    def __init__(self, max_positions: int = max_positions, store: Optional[StateStore] = None,
+                 universe: Optional[UniverseService] = None, profiler: Optional[TickProfiler] = None,
+                 meta: Optional[SymbolMetaService] = None, rules: Optional[RegulationService] = None,
+                 exchanges: Optional[ExchangeResolver] = None, margin: Optional[MarginView] = None):
+        # store / universe / profiler / meta / rules / exchanges / margin は常駐デーモン（trade_daemon.py）が作り直し時に引き継ぐ
         self.symbol = target_symbol
         self.position_params = position_params
         self.target_symbol_no_exchange = target_symbol_no_exchange
+        self.params = ScalpParams()
+        self.budget = install_budget(load_soft_limits=False)
+        self.universe = universe if universe is not None else UniverseService(budget=self.budget)
+        # 銘柄コード → 優先市場（"コード@市場" はここで引く。未解決は東証）
+        self.exchanges = exchanges if exchanges is not None else ExchangeResolver(budget=self.budget)
+        # 売買単位・呼値・値幅制限（/symbol を1日1回だけ取得）
+        self.meta = meta if meta is not None else SymbolMetaService(budget=self.budget, exchanges=self.exchanges)
+        # 規制・プレミアム料（時間帯の開始前に取得し、以降はゆっくり取り直す）
+        self.rules = rules if rules is not None else RegulationService(budget=self.budget, exchanges=self.exchanges)
+        # 信用デイトレで建てる売買（'buy' / 'sell'）
+        self.margin_sides = list(margin_daytrade_sides)
+        # 現物の買付余力・信用の新規建余力（約定で取り直し。発注前の判定はメモリのみ）
+        self.margin = margin if margin is not None else MarginView(
+            kinds=("cash", "margin") if self.margin_sides else ("cash",), budget=self.budget)
+        # 信用デイトレの建玉の HoldID 索引（get_margin_holdings のたびに作り直す）
+        self.holds = HoldIndex("margin", margin_trade_type=margin_daytrade_obj["MarginTradeType"])
+        self.exit_style = exit_style
+        self.max_positions = max_positions
+        self.store = store if store is not None else StateStore()
+        self.profiler = profiler if profiler is not None else TickProfiler()
+        self.total_limit = float(total_limit)
+        self.tick_interval_sec = 1.0      # schedule_loop / trade_daemon の取引時間帯の間隔
+        self.board_interval_sec = 0.3     # fetch_boards の板取得間隔
+        self.config = ConfigWatcher()
+        self.reload_config()
+        self.positions: Dict[str, Dict[str, Any]] = self.load_positions()
+        # 直前 tick の取得結果（ウォームキャッシュに保存）と、再起動直後の最初の tick で使う分
+        self.last_tick: Dict[str, Any] = {}
+        self.warm = WarmCache()
+        self.warm_seed: Dict[str, Any] = self.warm.restore(self)
+        if not self.budget.soft_limits:
+            self.budget.load_soft_limits()
 
     def has_pending_orders(self) -> bool:
         return confirm_state()
@@ -46,24 +103,43 @@ class TradeBot:
         data = get_cash_balance()
         return data.get('StockAccountWallet', 0)
 
-    def is_holding(self) -> bool:
-    # Load symbol from buy_price.json; fallback to self.target_symbol_no_exchange on error
-        try:
-            with open('buy_price.json', 'r', encoding='utf-8') as bf:
-                bdata = json.load(bf)
-                file_symbol = bdata.get('symbol')
-        except Exception as e:
-            file_symbol = self.target_symbol_no_exchange
-        
-        self.position_params['symbol'] = file_symbol
-        positions = get_positions(self.position_params) or []
-        
+    def get_holdings(self) -> Dict[str, float]:
+        """
+        現物の保有残数量を {銘柄コード: LeavesQty} で返す（1回の /positions で全銘柄分）。
+        """
+        params = dict(self.position_params)
+        params.pop('symbol', None)
+        positions = get_positions(params) or []
+        holdings: Dict[str, float] = {}
+        if not isinstance(positions, list):
+            return holdings
         for pos in positions:
-            if (pos.get('Symbol') == file_symbol and
-                float(pos.get('LeavesQty', 0)) > 0):
-                return True
-        return False
-    
+            sym = str(pos.get('Symbol'))
+            holdings[sym] = holdings.get(sym, 0.0) + float(pos.get('LeavesQty') or 0)
+        return holdings
+
+    def get_margin_holdings(self) -> Dict[str, Dict[str, float]]:
+        """
+        信用デイトレの建玉残数量を {銘柄コード: {'1': 売建て, '2': 買建て}} で返す（1回の /positions）。
+        デイトレ以外（制度・一般）の建玉は含めない。同じ応答で self.holds（HoldID 索引）も作り直す。
+        """
+        positions = get_positions({'product': 2, 'addinfo': 'false'}) or []
+        holdings: Dict[str, Dict[str, float]] = {}
+        if not isinstance(positions, list):
+            return holdings
+        self.holds.load(positions)
+        for pos in positions:
+            if pos.get('MarginTradeType') not in (None, 3):
+                continue
+            by_side = holdings.setdefault(str(pos.get('Symbol')), {})
+            side = str(pos.get('Side'))
+            by_side[side] = by_side.get(side, 0.0) + float(pos.get('LeavesQty') or 0)
+        return holdings
+
+    def is_holding(self, symbol: Optional[str] = None) -> bool:
+        symbol = symbol or self.target_symbol_no_exchange
+        return self.get_holdings().get(symbol, 0.0) > 0
+
     def latest_orders(self) -> bool:
         orders = get_orders(order_params_by_id)
         res = latest_detail_of_latest_order(orders)
@@ -94,8 +170,7 @@ class TradeBot:
         """
         最新の注文情報を取得し、ログに出力する。
         """
-        order_params_by_id['id'] = order_id
-        order = get_orders(order_params_by_id)
+        order = get_orders(dict(order_params_by_id, id=order_id))
         details = {}
         print("取得した注文情報____:", order)
         for o in order:
@@ -114,142 +189,471 @@ class TradeBot:
             key=lambda d: datetime.fromisoformat(d['TransactTime'])
         )
         print("最新レコード（時間基準）:", latest_by_time)
-        with open('latest_price.json', 'w', encoding='utf-8') as f:
-            json.dump({'last_price': latest_by_seq['Price']}, f, ensure_ascii=False, indent=2)
+        self.store.set('last_price', latest_by_seq['Price'])
         return latest_by_seq['Price']
 
+    def get_exec_qty(self, order_id: str) -> float:
+        """
+        注文IDの約定数量を返す（取得失敗時は 0）。
+        """
+        params = dict(order_params_by_id)
+        params['id'] = order_id
+        try:
+            return order_cum_qty(get_orders(params), order_id)
+        except Exception as e:
+            logger.warning(f"約定数量の取得に失敗しました: {e}")
+            return 0.0
+
+    # --- 銘柄別ポジション状態（メモリ保持、変化時のみ StateStore へ記録） ---
+    def load_positions(self) -> Dict[str, Dict[str, Any]]:
+        """
+        StateStore から銘柄別の状態を復元する。
+        StateStore が空で旧 buy_price.json があれば取り込む（旧形式 {'symbol', 'buy_price'} は
+        保有中(holding)の1銘柄として読む）。
+        """
+        positions = self.store.get('positions')
+        if isinstance(positions, dict):
+            return {str(k): dict(v) for k, v in positions.items()}
+
+        try:
+            with open('buy_price.json', 'r', encoding='utf-8') as bf:
+                bdata = json.load(bf)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning(f"buy_price.json 読み込みエラー: {e}")
+            return {}
+
+        positions = {}
+        if isinstance(bdata.get('positions'), dict):
+            positions = {str(k): dict(v) for k, v in bdata['positions'].items()}
+        elif bdata.get('symbol') and bdata.get('buy_price') is not None:
+            sym = str(bdata['symbol'])
+            positions = {sym: {'symbol': sym, 'state': 'holding',
+                               'buy_price': float(bdata['buy_price']), 'qty': float(self.TRADE_QTY)}}
+        if positions:
+            logger.info(f"buy_price.json から状態を移行しました: {list(positions)}")
+            self.store.set('positions', positions)
+        return positions
+
+    def save_positions(self) -> None:
+        self.store.set('positions', {sym: {k: v for k, v in st.items() if k != 'tracker'}
+                                     for sym, st in self.positions.items()})
+
+    # 状態の項目が無い（信用デイトレ追加前の記録）ものは現物の買い
+    @staticmethod
+    def position_side(st: Dict[str, Any]) -> str:
+        return st.get('side', 'buy')
+
+    @staticmethod
+    def position_product(st: Dict[str, Any]) -> str:
+        return st.get('product', 'cash')
+
+    def entry_price(self, st: Dict[str, Any]) -> float:
+        return float(st['sell_price'] if self.position_side(st) == 'sell' else st['buy_price'])
+
+    def fetch_today_orders(self) -> List[Dict[str, Any]]:
+        # 日次上限は現物・信用とも数えるので全商品を取る（tick 内の注文の判定はすべてこの1回の結果を使う）
+        orders = get_orders(dict(order_params_by_id, product="0"))
+        return orders if isinstance(orders, list) else []
 
     def execute_trade(self):
-        # 1) 日次上限などのガード
-        if check_trades_and_limit():
+        """
+        1 tick の処理。板・注文・残高は tick 内で1回だけ取得し、全銘柄で共有する。
+          1) 日次上限チェック（超過時は新規買いのみ停止、保有の管理は継続）。/orders は1回だけ取得し、
+             約定合計・上限判定・新規ごとの上限チェックはその注文一覧から数える
+          2) 保有/発注中の各銘柄を状態に応じて管理（約定監視・取消・利確売り）
+          3) 空き枠(max_positions - 管理中)があれば候補上位から新規買い
+        """
+        prof = self.profiler
+        # 再起動直後は鮮度を満たすウォームキャッシュ（直前 tick の取得結果）を1回だけ使う。
+        # 使うのは管理中の銘柄の続きだけで、新規は注文・板を取り直した次の tick から
+        seed, self.warm_seed = self.warm_seed, {}
+        warm = bool(seed)
+        with prof.phase("orders"):
+            orders = seed["orders"] if "orders" in seed else self.fetch_today_orders()
+            orders_by_id = {o.get('ID'): o for o in orders}
+            pending = pending_symbols(orders)
+            self.margin.on_orders(orders)
+            traded = traded_total(orders)
+            limit_reached = traded > self.total_limit
+        with prof.phase("positions"):
+            self.margin.refresh()
+            if "holdings" in seed:
+                holdings = {str(k): float(v) for k, v in seed["holdings"].items()}
+            else:
+                holdings = self.get_holdings() if self.positions else {}
+            if "margin_holdings" in seed:
+                margin_holdings = {str(k): {str(sd): float(q) for sd, q in v.items()}
+                                   for k, v in seed["margin_holdings"].items()}
+            else:
+                margin_holdings = self.get_margin_holdings() \
+                    if any(self.position_product(st) == 'margin' for st in self.positions.values()) else {}
+
+        free = self.max_positions - len(self.positions)
+        with prof.phase("universe"):
+            candidates = [s for s in self.universe.symbols()
+                          if s not in self.positions and s not in pending] \
+                if (free > 0 and not limit_reached and not warm) else []
+            # 未解決の優先市場・未取得の銘柄情報は低優先度でまとめて取得（ファイルにも残る）
+            self.exchanges.prefetch(list(self.positions) + candidates)
+            # 優先市場が分からない候補は違う市場の板を取りにいかないよう次の tick に回す
+            candidates = [s for s in candidates if self.exchanges.known(s)]
+            self.meta.prefetch(list(self.positions) + candidates)
+            self.rules.refresh(candidates)
+        with prof.phase("boards"):
+            # 保有銘柄の板は優先、候補の板巡回は低優先度（情報系の残り枠が減ると打ち切る）
+            boards = {s: b for s, b in (seed.get("boards") or {}).items() if s in self.positions}
+            ex = self.exchanges.exchange
+            boards.update(fetch_boards([s for s in self.positions if s not in boards], exchange=ex,
+                                       interval=self.board_interval_sec, budget=self.budget))
+            boards.update(fetch_boards([s for s in candidates if s not in boards], exchange=ex,
+                                       interval=self.board_interval_sec, budget=self.budget, low_priority=True))
+        self.last_tick = {"orders": orders, "holdings": holdings,
+                          "margin_holdings": margin_holdings, "boards": boards}
+
+        # 2) 管理中の銘柄
+        with prof.phase("manage"):
+            for sym in list(self.positions):
+                try:
+                    self.manage_position(sym, boards.get(sym), orders_by_id, holdings, pending, margin_holdings)
+                except Exception as e:
+                    logger.error(f"{sym} の管理中にエラー: {e}")
+
+        # 3) 新規買い
+        if warm:
+            logger.info("ウォームスタート直後のため新規はスキップ（次の tick で注文・板を取り直してから）。")
             return
-        # 追加ガード：未約定注文があれば新規発注しない
-        if self.has_pending_orders():
-            logger.info("未処理の注文あり。新規発注をスキップ。")
+        if limit_reached:
+            logger.info("1日の取引上限を超えました。新規買いを停止します。")
+            return
+        free = self.max_positions - len(self.positions)
+        if free <= 0:
+            logger.info(f"保有上限 {self.max_positions} 銘柄に到達。新規買いをスキップ。")
             return
-        
-        # 株を保有してるか確認
-        holding = self.is_holding()
-
-        if not holding:
-            # 2) 板取得 → その場の売買基準（buy/sell/stop）を算出
-            plan = search_buy_candidates()
-            if not plan:
-                logger.info("見送り：当日レンジ/板条件を満たさず。")
-                return
-
-            buy_px  = plan["buy_price"]
-            sell_px = plan["sell_price"]
-            stop_px = plan["stop_price"]
-            target_symbol = plan["target_symbol"]
 
-            ask = plan["AskPrice"]
-            bid = plan["BidPrice"]
+        with prof.phase("rank"):
+            sides = ("buy", "sell") if "sell" in self.margin_sides else ("buy",)
+            plans = rank_candidates([boards[s] for s in candidates if s in boards], self.params, sides)
+        if not plans:
+            logger.info("見送り：当日レンジ/板条件を満たさず。")
+            return
+        with prof.phase("enter"):
+            for plan in plans[:free]:
+                if plan.get("target_symbol") in self.positions:
+                    continue
+                # 同じ tick で出した分も上限に数える
+                traded += self.enter_position(plan, traded)
+
+    def enter_position(self, plan: Dict[str, Any], traded: float = 0.0) -> float:
+        """
+        Buy1 に join する買い指値（売り建ての plan なら Sell1 に join する信用デイトレの売り指値）を出し、
+        銘柄を entry 状態で管理に加える。traded は当日の約定合計金額（tick の注文一覧から数えたもの）。
+        発注した金額を返す（見送り・発注失敗なら 0）。
+        """
+        sym = str(plan["target_symbol"])
+        side = plan.get("side", "buy")
+        product = "margin" if side == "sell" or "buy" in self.margin_sides else "cash"
+        label = "売り建て" if side == "sell" else ("信用買い" if product == "margin" else "買い")
+        px = plan["sell_price"] if side == "sell" else plan["buy_price"]
+        ask = plan["AskPrice"]
+        if ask is None:
+            logger.info("Ask が None。買い判定保留。")
+            return 0.0
+        reason = self.rules.blocked(sym, side, "margin_day" if product == "margin" else "cash")
+        if reason:
+            logger.info(f"{label}見送り: 規制 ({sym} {reason})")
+            return 0.0
+        meta = self.meta.cached(sym)
+        if meta is not None and self.TRADE_QTY % meta.unit:
+            logger.info(f"{label}見送り: 売買単位 {meta.unit:g} 株の倍数ではない ({sym} qty={self.TRADE_QTY})")
+            return 0.0
+        px = self.meta.clamp_price(sym, px, side)
+        amount = px * self.TRADE_QTY
+        if not self.budget.order_within_soft_limit("Margin" if product == "margin" else "Stock", amount):
+            logger.info(f"{label}見送り: ソフトリミット超過 ({sym} {px})")
+            return 0.0
+        ok, why = self.margin.check_margin(amount) if product == "margin" else self.margin.check_cash(amount)
+        if not ok:
+            logger.info(f"{label}見送り: {why} ({sym} {px})")
+            return 0.0
+        if side == "sell":
+            # 一般信用の売り建てはプレミアム料がかかる。非取扱・未確定・利確幅以上なら建てない
+            cost = self.rules.premium_cost(sym, self.TRADE_QTY)
+            if cost is None:
+                logger.info(f"{label}見送り: 一般信用（デイトレ）非取扱またはプレミアム料未確定 ({sym})")
+                return 0.0
+            if cost >= self.params.take_profit_yen * self.TRADE_QTY:
+                logger.info(f"{label}見送り: プレミアム料 ({sym} {cost})")
+                return 0.0
+        if traded + amount > self.total_limit:
+            logger.info(f"{label}見送り: 取引上限 ({sym} {px} 約定合計 {traded:,.0f})")
+            return 0.0
+
+        if product == "margin":
+            mo = deepcopy(margin_daytrade_obj)
+            mo["Qty"] = self.TRADE_QTY
+            mo["Exchange"] = self.exchanges.exchange(sym)
+            res = send_margin_daytrade_order(mo, sym, "1" if side == "sell" else "2", want_price=px)
+        else:
+            bo = deepcopy(buy_obj)
+            bo["Exchange"] = self.exchanges.exchange(sym)
+            res = send_cash_buy_order(bo, sym, want_buy_price=px)
+        order_id = res.get("OrderId") if isinstance(res, dict) else None
+        if not order_id:
+            logger.warning(f"{label}注文失敗: {sym} {res}")
+            return 0.0
+        logger.info(f"{label}注文発注: {sym} {self.TRADE_QTY}@{px} (ask={ask}) order_id={order_id}")
+        self.margin.reserve(product, amount)
+        self.positions[sym] = {
+            'symbol': sym,
+            'state': 'entry',
+            'side': side,
+            'product': product,
+            'sell_price' if side == 'sell' else 'buy_price': px,
+            'stop_price': self.meta.clamp_price(sym, plan["stop_price"], "buy" if side == "sell" else "sell"),
+            'qty': 0.0,
+            'order_id': order_id,
+            'tracker': QueueTracker.from_plan(plan, self.TRADE_QTY, self.params.queue_bid_flow_share),
+        }
+        self.save_positions()
+        return amount
+
+    def manage_position(self, sym: str, board: Optional[Dict[str, Any]],
+                        orders_by_id: Dict[str, Dict[str, Any]],
+                        holdings: Dict[str, float], pending: set,
+                        margin_holdings: Optional[Dict[str, Dict[str, float]]] = None) -> None:
+        """
+        銘柄ごとのオートマトン（売り建ては売買を入れ替えて同じ流れ）:
+          entry   … 買い指値の約定待ち。並び位置モデルで ETA/約定確率を見て取消判定。
+          holding … 保有中。未約定注文が無ければ 買値+take_profit_yen で利確売り（売り建ては 売値-take_profit_yen で買い戻し）。
+                    exit_style='stop' なら先に stop_price の逆指値（損切り）を取引所側に置く。
+          exiting … 決済の約定待ち。注文終了で残高ゼロなら管理から外す。損切りの逆指値を置いている間に
+                    板が利確値に届いたら、逆指値を取り消して次の tick で利確の指値を出す。
+                    利確の指値が約定せずに終わった（取消・失効）か、待つ間に板が損切り値まで戻ったら
+                    （利確の指値は取り消して）損切りの逆指値を置き直す。
+        holdings は現物の残数量、margin_holdings は信用デイトレの建玉（get_margin_holdings）。
+        """
+        st = self.positions[sym]
+        p = self.params
+        side = self.position_side(st)
+        product = self.position_product(st)
+        label = "売り建て" if side == "sell" else "買い"
+
+        if st['state'] == 'entry':
+            order_id = st['order_id']
+            od = orders_by_id.get(order_id)
+            exec_qty = order_cum_qty([od], order_id) if od else 0.0
+            if exec_qty >= float(self.TRADE_QTY):
+                logger.info(f"{label}注文 約定完了: {sym} {exec_qty}/{self.TRADE_QTY} order_id={order_id}")
+                st.update(state='holding', qty=exec_qty)
+                st.pop('tracker', None)
+                self.save_positions()
+                return
 
-        # 3) オートマトン
-        if holding:
-            # --- 保有中：損切り優先、そうでなければ問答無用で利確売り ---
-            # buy_price.json があれば優先して買値+1 を利確価格として使う
-            override_sell_px = 9999999
-            try:
-                with open('buy_price.json', 'r', encoding='utf-8') as bf:
-                    bdata = json.load(bf)
-                    bp = bdata.get('buy_price')
-                    target_symbol = bdata.get('symbol')
-                    if bp is not None:
-                        override_sell_px = float(bp) + 1
-                        logger.info(f"buy_price.json から買値を取得: {bp} → 利確を {override_sell_px} に上書き")
-            except FileNotFoundError:
-                logger.info('buy_price.json が見つからないため、planの利確価格を使用します。')
-            except Exception as e:
-                logger.warning(f"buy_price.json 読み込みエラー: {e} — planの利確価格を使用します。")
-
-            # 1) 損切り優先: Bid が取れる状態で現在価格が stop 以下なら即成行/寄せで売る
-            # if bid is not None and bid <= stop_px:
-            #     so = deepcopy(sell_obj)
-            #     if isinstance(so, dict):
-            #         # Bid に寄せる／成行で確実に出す設定
-            #         so["Price"] = bid
-            #     send_cash_sell_order(so)
-            #     logger.info(f"損切り売り発注: {self.TRADE_QTY}@{bid} (stop={stop_px})")
-            #     return
-
-            # 2) 損切り条件に該当しない → 問答無用で利確売りを出す
-            so = deepcopy(sell_obj)
-            if isinstance(so, dict):
-                so["Price"] = override_sell_px
-            send_cash_sell_order(so, target_symbol, want_sell_price=override_sell_px)
+            tracker = st.get('tracker')
+            if tracker is None:
+                # 再起動後などで追跡状態が無い → 現在の板から追跡し直す
+                if not board:
+                    return
+                tracker = QueueTracker.from_entry(sym, self.entry_price(st), self.TRADE_QTY, board,
+                                                  p.queue_bid_flow_share, side="Sell" if side == "sell" else "Buy")
+                st['tracker'] = tracker
+            elif board:
+                tracker.update(board)
+            prob = tracker.fill_probability(max(0.0, p.max_queue_eta_sec - tracker.elapsed()))
+            logger.info(f"並び状況: {tracker.snapshot()} fill_prob={prob:.2f}")
+
+            finished = od is not None and int(od.get("OrderState", od.get("State", 1))) == 5
+            reason = "order finished" if finished else \
+                tracker.should_cancel(p.max_queue_eta_sec, p.queue_min_fill_prob, p.queue_hard_timeout_sec)
+            if reason:
+                logger.info(f"{label}注文 未約定のため取消({reason}): {sym} 約定={exec_qty}/{self.TRADE_QTY}, order_id={order_id}")
+                if not finished:
+                    try:
+                        cancel_order(order_id)  # kabusapi_cancelorder.py の関数
+                    except Exception as e:
+                        logger.error(f"取消失敗: {e}")
+                if exec_qty > 0:
+                    # 一部約定 → 約定分を保有として利確へ
+                    st.update(state='holding', qty=exec_qty)
+                    st.pop('tracker', None)
+                else:
+                    del self.positions[sym]
+                self.save_positions()
             return
 
+        if product == 'margin':
+            held = float((margin_holdings or {}).get(sym, {}).get("1" if side == "sell" else "2", 0.0))
         else:
-            # --- 未保有：買いのみ ---
-            if ask is None:
-                logger.info("Ask が None。買い判定保留。")
+            held = float(holdings.get(sym, 0.0))
+
+        if st['state'] == 'exiting':
+            od = orders_by_id.get(st.get('exit_order_id', st.get('sell_order_id')))
+            done = od is None or int(od.get("OrderState", od.get("State", 5))) == 5
+            if not done:
+                if st.get('exit_kind') == 'stop' and board and self.reached_take_profit(st, board):
+                    logger.info(f"{sym} 利確値に到達。損切りの逆指値を取り消して利確に切り替えます。")
+                    try:
+                        cancel_order(st['exit_order_id'])
+                        st['take_profit'] = True
+                        self.save_positions()
+                    except Exception as e:
+                        logger.error(f"取消失敗: {e}")
+                elif st.get('exit_kind') == 'limit' and st.get('take_profit') and board \
+                        and self.reached_stop(st, board):
+                    logger.info(f"{sym} 利確待ちの間に損切り値へ戻りました。利確の指値を取り消して逆指値を置き直します。")
+                    try:
+                        cancel_order(st['exit_order_id'])
+                    except Exception as e:
+                        logger.error(f"取消失敗: {e}")
                 return
-
-            # 「買ったら必ず売る」= 連続買い禁止 → latest_orders()/未約定でガード
-            if self.latest_orders() and get_total(buy_px*100):
-                res = send_cash_buy_order(buy_obj, target_symbol, want_buy_price=buy_px)
-                order_id = res.get("OrderId") if isinstance(res, dict) else None
-                logger.info(f"買い注文発注: {self.TRADE_QTY}@{buy_px} (ask={ask})")
-                try:
-                    with open('buy_price.json', 'w', encoding='utf-8') as bf:
-                        json.dump({'symbol': target_symbol, 'buy_price': buy_px}, bf, ensure_ascii=False, indent=2)
-                        logger.info(f"buy_price.json に買値を保存: {buy_px}")
-                except Exception as e:
-                    logger.warning(f"buy_price.json の保存に失敗しました: {e}")
-
-                time.sleep(1)  # 直後の反映待ち
-                if order_id:
-                    # --- 約定監視（最大15秒、1秒おき） ---
-                    WAIT_SEC = 15.0
-                    INTERVAL = 1.0
-                    t0 = time.time()
-                    filled = False
-
-                    while True:
-                        od = self.get_order_latest(order_id) or {}
-
-                        # 約定数量の取得（環境差吸収: ExecutedQty/CumQty/ExecutionQty を順に参照）
-                        exec_qty = od.get("ExecutedQty") or od.get("CumQty") or od.get("ExecutionQty") or 0
-                        try:
-                            exec_qty = float(exec_qty)
-                        except Exception:
-                            exec_qty = 0.0
-
-                        if exec_qty >= float(self.TRADE_QTY):
-                            filled = True
-                            logger.info(f"買い注文 約定完了: {exec_qty}/{self.TRADE_QTY} order_id={order_id}")
-                            # 買値の保存（約定確認後）
-                            try:
-                                with open('buy_price.json', 'w', encoding='utf-8') as bf:
-                                    json.dump({'symbol': target_symbol, 'buy_price': buy_px}, bf, ensure_ascii=False, indent=2)
-                                logger.info(f"buy_price.json に買値を保存: {buy_px}")
-                            except Exception as e:
-                                logger.warning(f"buy_price.json の保存に失敗しました: {e}")
-                            break
-
-                        # タイムアウト判定
-                        if (time.time() - t0) >= WAIT_SEC:
-                            logger.info(f"買い注文 未約定のため取消: 約定={exec_qty}/{self.TRADE_QTY}, order_id={order_id}")
-                            try:
-                                cancel_order(order_id)  # kabusapi_cancelorder.py の関数
-                            except Exception as e:
-                                logger.error(f"取消失敗: {e}")
-                            # 未約定（または一部約定）で終了
-                            return
-
-                        time.sleep(INTERVAL)
+            if held <= 0:
+                logger.info(f"{sym} 決済完了。管理対象から外します。")
+                del self.positions[sym]
             else:
-                logger.info(f"買い見送り: ask={ask} > buy={buy_px} または latest_orders() NG")
-                return
+                # 決済注文が終了したが残高が残る（取消・失効）→ 再度決済を出す。
+                # 利確の指値が終わったなら損切りの逆指値から置き直す（建玉を無防備にしない）
+                if st.get('exit_kind') == 'limit':
+                    st.pop('take_profit', None)
+                st['state'] = 'holding'
+            self.save_positions()
+            return
 
+        # holding
+        if held <= 0:
+            st['missing_ticks'] = st.get('missing_ticks', 0) + 1
+            if st['missing_ticks'] >= 10:
+                logger.info(f"{sym} の残高が確認できないため管理対象から外します。")
+                del self.positions[sym]
+                self.save_positions()
+            return
+        st['missing_ticks'] = 0
+        if sym in pending:
+            return
+
+        # 損切り: 取引所側の逆指値で置く（exit_style='stop'。発動を待つ間は板を見に行かない）
+        if self.exit_style == 'stop' and st.get('stop_price') is not None and not st.get('take_profit'):
+            order_id = self.send_exit(sym, st, held, stop_price=float(st['stop_price']))
+            logger.info(f"損切り逆指値発注: {sym} {int(held)} stop={st['stop_price']} order_id={order_id}")
+            if order_id:
+                st.update(state='exiting', exit_order_id=order_id, exit_kind='stop')
+                st.pop('sell_order_id', None)
+                self.save_positions()
+            return
+
+        # 問答無用で利確を出す（買値 + take_profit_yen で売り / 売り建て値 - take_profit_yen で買い戻し）
+        exit_px = self.take_profit_price(sym, st)
+        order_id = self.send_exit(sym, st, held, price=exit_px)
+        logger.info(f"利確{'買い戻し' if side == 'sell' else '売り'}発注: {sym} {int(held)}@{exit_px} order_id={order_id}")
+        if order_id:
+            st.update(state='exiting', exit_order_id=order_id, exit_kind='limit')
+            st.pop('sell_order_id', None)
+            self.save_positions()
+
+    def take_profit_price(self, sym: str, st: Dict[str, Any]) -> float:
+        if self.position_side(st) == "sell":
+            return self.meta.clamp_price(sym, self.entry_price(st) - self.params.take_profit_yen, "buy")
+        return self.meta.clamp_price(sym, self.entry_price(st) + self.params.take_profit_yen, "sell")
+
+    def reached_take_profit(self, st: Dict[str, Any], board: Dict[str, Any]) -> bool:
+        """板の最良気配が利確値に届いたか（買い建玉は Buy1 ≥ 利確値、売り建玉は Sell1 ≤ 利確値）。"""
+        tp = self.take_profit_price(st['symbol'], st)
+        if self.position_side(st) == "sell":
+            best = (board.get("Sell1") or {}).get("Price") or board.get("AskPrice")
+            return best is not None and float(best) <= tp
+        best = (board.get("Buy1") or {}).get("Price") or board.get("BidPrice")
+        return best is not None and float(best) >= tp
+
+    def reached_stop(self, st: Dict[str, Any], board: Dict[str, Any]) -> bool:
+        """板の最良気配が損切り値に届いたか（買い建玉は Buy1 ≤ stop_price、売り建玉は Sell1 ≥ stop_price）。"""
+        if st.get('stop_price') is None:
+            return False
+        stop = float(st['stop_price'])
+        if self.position_side(st) == "sell":
+            best = (board.get("Sell1") or {}).get("Price") or board.get("AskPrice")
+            return best is not None and float(best) >= stop
+        best = (board.get("Buy1") or {}).get("Price") or board.get("BidPrice")
+        return best is not None and float(best) <= stop
+
+    def send_exit(self, sym: str, st: Dict[str, Any], held: float, price: Optional[float] = None,
+                  stop_price: Optional[float] = None) -> Optional[str]:
+        """
+        決済注文（現物の売り / 信用の返済）を出して注文IDを返す。price なら指値、
+        stop_price なら取引所側の逆指値（reverse_limit.stop_exit、発動後は成行）。
+        """
+        side = self.position_side(st)
+        qty = int(held)
+        body = None
+        if self.position_product(st) == 'margin':
+            # 返済する建玉を HoldID で指定する（索引に無い＝ウォームスタート直後などは ClosePositionOrder に任せる）
+            body = self.holds.close_order(sym, "1" if side == "sell" else "2", qty, price=price)
+            if body is None:
+                mc = deepcopy(margin_close_obj)
+                mc.update(Qty=qty, Exchange=self.exchanges.exchange(sym), Symbol=sym,
+                          Side="2" if side == "sell" else "1")
+                if stop_price is not None:
+                    mc = stop_exit(mc, side, stop_price)
+                res = send_margin_close_order(mc, sym, mc["Side"], want_price=price)
+            else:
+                if stop_price is not None:
+                    body = stop_exit(body, side, stop_price)
+                res = send_margin_close_positions_order(body)
+        else:
+            so = deepcopy(sell_obj)
+            so["Qty"] = qty
+            so["Exchange"] = self.exchanges.exchange(sym)
+            if stop_price is not None:
+                so = stop_exit(so, side, stop_price)
+            res = send_cash_sell_order(so, sym, want_sell_price=price)
+        order_id = res.get("OrderId") if isinstance(res, dict) else None
+        if not order_id and body is not None:
+            self.holds.release(body["ClosePositions"])
+        return order_id
+
+
+    def reload_config(self) -> bool:
+        """設定ファイル（live_config）が更新されていれば tick の合間に反映する。"""
+        cfg = self.config.poll()
+        if cfg is None:
+            return False
+        self.apply_config(cfg)
+        return True
+
+    def apply_config(self, cfg: Dict[str, Any]) -> None:
+        """
+        検証済みの設定をまとめて差し替える。ファイルから消した項目は既定値に戻る。
+        ScalpParams は新しいインスタンスに置き換える（tick 途中の判定と混ざらない）。
+        """
+        params = ScalpParams(**cfg.get("params", {}))
+        uni = cfg.get("universe", {})
+        intervals = cfg.get("intervals", {})
+
+        self.params = params
+        u = self.universe
+        u.fallback = list(uni.get("symbols", symbol_list))
+        filters = (uni.get("price_min", universe_price_min), uni.get("price_max", universe_price_max),
+                   uni.get("min_trading_value", universe_min_trading_value),
+                   uni.get("max_symbols", universe_max_symbols))
+        if filters != (u.price_min, u.price_max, u.min_trading_value, u.max_symbols):
+            u.price_min, u.price_max, u.min_trading_value, u.max_symbols = filters
+            u.invalidate()
+        u.refresh_sec = max(float(uni.get("refresh_sec", universe_refresh_sec)), u.min_refresh_sec())
+        self.total_limit = float(cfg.get("total_limit", total_limit))
+        self.max_positions = int(cfg.get("max_positions", max_positions))
+        self.tick_interval_sec = float(intervals.get("tick_sec", 1.0))
+        self.board_interval_sec = float(intervals.get("board_sec", 0.3))
+        logger.info(f"設定を反映しました: {cfg}")
 
     def run(self):
-        try:
-            self.execute_trade()
-        except Exception as e:
-            logger.error(f"トレード処理中にエラーが発生しました: {e}")
+        self.reload_config()
+        # フェーズ別の所要時間を記録（profile.json を更新すると次の tick からプロファイル）
+        with self.profiler.tick(self.tick_interval_sec):
+            try:
+                self.execute_trade()
+            except Exception as e:
+                logger.error(f"トレード処理中にエラーが発生しました: {e}")
+        self.warm.maybe_save(self)
 
 
 def schedule_loop(bot: TradeBot):
@@ -286,7 +690,7 @@ def schedule_loop(bot: TradeBot):
 
         # 待機時間決定
         if morning_start <= t <= morning_end or afternoon_start <= t <= afternoon_end:
-            interval = 1
+            interval = bot.tick_interval_sec
         elif t < morning_start:
             interval = 60
         else:
@@ -0,0 +1,172 @@
+"""
+現物・信用・先物・オプションの取引余力（/wallet/*）をまとめてメモリに持つ。
+
+- refresh() は margin_view_refresh_sec ごと、または invalidate() された後にだけ /wallet/* を呼ぶ
+  （取得する種類は kinds で絞る。銘柄ごとの必要証拠金は watch() した銘柄だけ）。
+- on_orders() に tick ごとの注文一覧を渡すと、約定数量が増えた注文があれば invalidate() する
+  （約定で余力が変わるため、次の refresh() で取り直す）。
+- 発注前の判定 check_*() はメモリ上の値だけを見る（API を呼ばない）。同じ取得結果のうちに
+  出した注文の分は reserve() で差し引き、次の取得で消える。
+  余力が未取得なら判定しない（True を返し、理由に「未取得」を入れる）。
+"""
+from typing import Optional, Dict, Any, List, Iterable, Tuple
+import logging
+import time
+
+from const import margin_view_refresh_sec, margin_view_kinds
+from kabusapi_cash import get_cash_balance
+from kabusapi_margin import get_margin_wallet
+from kabusapi_wallet_future import get_future_wallet
+from kabusapi_wallet_option import get_option_wallet
+
+logger = logging.getLogger(__name__)
+
+_FETCHERS = {
+    "cash": get_cash_balance,
+    "margin": get_margin_wallet,
+    "future": get_future_wallet,
+    "option": get_option_wallet,
+}
+
+# 種類 → 余力の項目（reserve() で差し引く先）
+_AVAILABLE = {
+    "cash": "StockAccountWallet",
+    "margin": "MarginAccountWallet",
+    "future": "FutureTradeLimit",
+    "option_buy": "OptionBuyTradeLimit",
+    "option_sell": "OptionSellTradeLimit",
+}
+_KIND_OF = {"option_buy": "option", "option_sell": "option"}
+
+
+def _num(v: Any) -> Optional[float]:
+    return float(v) if isinstance(v, (int, float)) and not isinstance(v, bool) else None
+
+
+class MarginView:
+    def __init__(self, kinds: Iterable[str] = margin_view_kinds, refresh_sec: float = margin_view_refresh_sec,
+                 fetchers: Optional[Dict[str, Any]] = None, budget=None):
+        self.kinds = [k for k in kinds if k in _FETCHERS]
+        self.refresh_sec = float(refresh_sec)
+        self._fetch = dict(_FETCHERS, **(fetchers or {}))
+        self.budget = budget   # api_budget.ApiBudget（取引余力の枠が無ければ次回に回す）
+        self.wallets: Dict[str, Dict[str, Any]] = {}               # 種類 → 口座全体の応答
+        self.symbols: Dict[Tuple[str, str], Dict[str, Any]] = {}   # (種類, '銘柄@市場') → 応答
+        self._watch: Dict[Tuple[str, str], None] = {}
+        self._reserved: Dict[str, float] = {}
+        self._cum: Dict[str, float] = {}   # 注文ID → 約定数量（on_orders の比較用）
+        self.fetched_at = 0.0
+        self.stale = True
+        self.reason = "初回"
+
+    # --- 更新 ---
+    def watch(self, kind: str, symbol: str) -> None:
+        """銘柄ごとの必要証拠金を取る対象に加える（'future' / 'option'、'銘柄@市場'）。"""
+        self._watch[(kind, symbol)] = None
+        self.stale = True
+        self.reason = f"watch {kind} {symbol}"
+
+    def invalidate(self, reason: str = "") -> None:
+        if not self.stale:
+            logger.info(f"取引余力を取り直します: {reason}")
+        self.stale = True
+        self.reason = reason
+
+    def on_orders(self, orders: List[Dict[str, Any]]) -> bool:
+        """約定数量が増えた注文があれば invalidate() して True を返す。"""
+        changed = []
+        for o in orders or []:
+            oid = o.get("ID")
+            cum = float(o.get("CumQty") or 0)
+            if oid is None:
+                continue
+            if cum > self._cum.get(oid, 0.0):
+                changed.append(oid)
+            self._cum[oid] = cum
+        if changed:
+            self.invalidate(f"約定 {changed}")
+        return bool(changed)
+
+    def due(self, now: Optional[float] = None) -> bool:
+        now = time.time() if now is None else now
+        return self.stale or now - self.fetched_at >= self.refresh_sec
+
+    def refresh(self, force: bool = False, now: Optional[float] = None) -> bool:
+        """期限切れ・invalidate 済み（force なら常に）なら /wallet/* を取り直す。取り直したら True。"""
+        now = time.time() if now is None else now
+        if not force and not self.due(now):
+            return False
+        calls = [(k, None) for k in self.kinds] + list(self._watch)
+        if self.budget is not None and not self.budget.allow("wallet", n=len(calls)):
+            logger.info("取引余力の API 枠が足りないため取得を次回に回します")
+            return False
+        wallets: Dict[str, Dict[str, Any]] = {}
+        symbols: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        for kind, sym in calls:
+            res = self._fetch[kind](sym)
+            if not isinstance(res, dict) or "Code" in res:
+                logger.warning(f"取引余力を取得できません: {kind} {sym or ''} {res}")
+                return False   # 一部だけ新しい状態にはしない
+            if sym is None:
+                wallets[kind] = res
+            else:
+                symbols[(kind, sym)] = res
+        self.wallets, self.symbols = wallets, symbols
+        self._reserved = {}
+        self.fetched_at = now
+        self.stale = False
+        return True
+
+    # --- 参照（メモリのみ） ---
+    def available(self, item: str) -> Optional[float]:
+        """余力（reserve 分を差し引いた値）。未取得なら None。item は _AVAILABLE のキー。"""
+        w = self.wallets.get(_KIND_OF.get(item, item))
+        v = _num(w.get(_AVAILABLE[item])) if w else None
+        return None if v is None else v - self._reserved.get(item, 0.0)
+
+    def requirement(self, kind: str, symbol: str, side: str = "buy") -> Optional[float]:
+        """watch した銘柄の1枚あたり必要証拠金（先物の売りは MarginRequirementSell）。"""
+        r = self.symbols.get((kind, symbol)) or {}
+        if kind == "future" and side == "sell" and _num(r.get("MarginRequirementSell")) is not None:
+            return _num(r["MarginRequirementSell"])
+        return _num(r.get("MarginRequirement"))
+
+    def reserve(self, item: str, amount: float) -> None:
+        """発注した分を次の取得まで余力から差し引く。"""
+        self._reserved[item] = self._reserved.get(item, 0.0) + float(amount)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "fetched_at": self.fetched_at,
+            "stale": self.stale,
+            "available": {k: self.available(k) for k in _AVAILABLE if _KIND_OF.get(k, k) in self.wallets},
+            "wallets": dict(self.wallets),
+            "symbols": {f"{k}:{s}": v for (k, s), v in self.symbols.items()},
+        }
+
+    # --- 発注前の判定 ---
+    def _check(self, item: str, need: Optional[float]) -> Tuple[bool, str]:
+        have = self.available(item)
+        if have is None or need is None:
+            return True, "余力未取得"
+        if need > have:
+            return False, f"余力不足 ({item}: 必要 {need:,.0f} > 余力 {have:,.0f})"
+        return True, ""
+
+    def check_cash(self, amount_yen: float) -> Tuple[bool, str]:
+        return self._check("cash", amount_yen)
+
+    def check_margin(self, amount_yen: float) -> Tuple[bool, str]:
+        return self._check("margin", amount_yen)
+
+    def check_future(self, symbol: str, side: str, qty: float) -> Tuple[bool, str]:
+        req = self.requirement("future", symbol, side)
+        return self._check("future", None if req is None else req * qty)
+
+    def check_option(self, symbol: str, side: str, qty: float, price: float = 0.0,
+                     multiplier: float = 1000.0) -> Tuple[bool, str]:
+        """買いは代金（価格 × 枚数 × 取引単位）、売りは必要証拠金 × 枚数で判定する。"""
+        if side == "buy":
+            return self._check("option_buy", price * qty * multiplier)
+        req = self.requirement("option", symbol, side)
+        return self._check("option_sell", None if req is None else req * qty)
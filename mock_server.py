@@ -0,0 +1,641 @@
+"""
+kabuステーションAPI のローカル代替サーバ（REST + PUSH）。オフラインでの動作確認・ベンチマーク用。
+
+対応エンドポイント（/kabusapi/ 配下）:
+  POST token / GET board/{銘柄@市場} / GET symbol/{銘柄@市場} / GET regulations/{銘柄@市場}
+  GET primaryexchange/{銘柄} / GET margin/marginpremium/{銘柄}
+  GET symbolname/future|option|minioptionweekly / GET orders / GET positions / GET wallet/cash[/..]
+  GET wallet/margin|future|option / POST sendorder[/future|/option] / PUT cancelorder
+  PUT register / PUT unregister / PUT unregister/all / GET ranking / GET apisoftlimit
+  GET websocket（PUSH: 登録銘柄の板を step ごとに送信）
+
+板の供給元:
+  - 台本（ScriptedBook）: 乱数シード固定のランダムウォーク
+  - 再生（ReplayBook）: board_log の記録（.brd / .jsonl）を順に流す
+約定: 指値が反対気配に届けば即時約定、届かなければ Buy1/Sell1 に並び、
+      backtest.SimOrder と同じ規則（同値での出来高が先行量+自分の数量に達する / 値段が抜ける）で約定。
+      信用（CashMargin 2:新規 / 3:返済）の建玉は約定ごとに HoldID（ExecutionID）を付けて別に持つ。
+      逆指値（FrontOrderType=30）は板を進めるたびに現在値で条件を見て、発動したら成行/指値で出し直す。
+
+使い方:
+  python mock_server.py --port 18081 --symbols 6740,1757 --step-sec 1
+  python mock_server.py --port 18081 --replay board_log/20250820 --step-sec 0.1
+  ※ Bot 側は環境変数 KABUSAPI_BASE_URL=http://localhost:18081/kabusapi/ で接続先を切り替える。
+"""
+from collections import Counter
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Dict, Any, List, Iterator
+from urllib.parse import urlparse, parse_qs
+import argparse
+import base64
+import hashlib
+import itertools
+import json
+import random
+import struct
+import threading
+import time
+
+from backtest import SimOrder, load_board_log
+from queue_model import level_qty_at
+
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+
+class ScriptedBook:
+    """乱数シード固定のランダムウォークで板を生成する。"""
+
+    def __init__(self, symbol: str, price: float = 100.0, tick: float = 1.0, seed: int = 0,
+                 move_prob: float = 0.05, volume_per_step: int = 3000, trade_at: str = "both"):
+        self.symbol = symbol
+        self.mid = float(price)
+        self.tick = float(tick)
+        self.rng = random.Random(seed)
+        self.move_prob = move_prob
+        self.volume_per_step = volume_per_step
+        self.trade_at = trade_at      # 約定する側: "both" / "bid" / "ask"
+        self.volume = 0.0
+        self.value = 0.0
+
+    def next(self, now: datetime) -> Optional[Dict[str, Any]]:
+        r = self.rng
+        if r.random() < self.move_prob:
+            self.mid = max(self.tick, self.mid + r.choice((-1, 1)) * self.tick)
+        bid = self.mid
+        ask = self.mid + self.tick
+        dv = r.randint(0, self.volume_per_step)
+        cur = {"bid": bid, "ask": ask}.get(self.trade_at) or r.choice((bid, ask))
+        self.volume += dv
+        self.value += dv * cur
+        board = {
+            "Symbol": self.symbol, "SymbolName": f"MOCK{self.symbol}", "Exchange": 1,
+            "CurrentPrice": cur, "CurrentPriceTime": now.isoformat(),
+            "TradingVolume": self.volume, "TradingValue": self.value,
+            "VWAP": self.value / self.volume if self.volume else cur,
+            "OneSecValue": float(dv * cur),
+            "MarketOrderBuyQty": 0, "MarketOrderSellQty": 0,
+            "AskPrice": ask, "BidPrice": bid,
+        }
+        for i in range(1, 11):
+            board[f"Sell{i}"] = {"Price": ask + (i - 1) * self.tick, "Qty": r.randint(1, 50) * 100}
+            board[f"Buy{i}"] = {"Price": bid - (i - 1) * self.tick, "Qty": r.randint(1, 50) * 100}
+        return board
+
+
+class ReplayBook:
+    """記録済みの板を順に返す（最後まで行ったら最終板のまま）。"""
+
+    def __init__(self, symbol: str, boards: List[Dict[str, Any]]):
+        self.symbol = symbol
+        self._it: Iterator[Dict[str, Any]] = iter(boards)
+        self._last: Optional[Dict[str, Any]] = None
+
+    def next(self, now: datetime) -> Optional[Dict[str, Any]]:
+        b = next(self._it, None)
+        if b is not None:
+            b = dict(b)
+            b.pop("_ts", None)
+            b.setdefault("Symbol", self.symbol)
+            b["CurrentPriceTime"] = now.isoformat()
+            self._last = b
+        return self._last
+
+
+class MockMarket:
+    """板・注文・建玉・余力をメモリ上で管理する。全メソッドはスレッドセーフ。"""
+
+    def __init__(self, books: Dict[str, Any], cash: float = 10_000_000.0):
+        self.books = books
+        self.boards: Dict[str, Dict[str, Any]] = {}
+        self.prev_boards: Dict[str, Dict[str, Any]] = {}
+        self.orders: Dict[str, Dict[str, Any]] = {}
+        self.resting: Dict[str, SimOrder] = {}
+        self.triggers: Dict[str, Dict[str, Any]] = {}   # 逆指値（発動待ち）: 注文ID → ReverseLimitOrder
+        self.positions: Dict[str, Dict[str, Any]] = {}
+        self.margin_positions: Dict[str, Dict[str, Any]] = {}   # 信用の建玉（HoldID = ExecutionID → 建玉）
+        self.registered: List[Dict[str, Any]] = []
+        self.cash = cash
+        # /regulations と /margin/marginpremium の応答（銘柄コード → 値。無ければ規制なし・プレミアム料なし）
+        self.regulations: Dict[str, List[Dict[str, Any]]] = {}
+        self.margin_premiums: Dict[str, Dict[str, Any]] = {}
+        self.primary_exchanges: Dict[str, int] = {}   # /primaryexchange（無ければ東証=1）
+        self.lock = threading.RLock()
+        self.clock = datetime.now()
+        self._seq = itertools.count(1)
+        self.step()
+
+    # --- 時間を進める ---
+    def step(self, dt: float = 1.0) -> None:
+        with self.lock:
+            self.clock += timedelta(seconds=dt)
+            for sym, book in self.books.items():
+                b = book.next(self.clock)
+                if b is None:
+                    continue
+                if sym in self.boards:
+                    self.prev_boards[sym] = self.boards[sym]
+                self.boards[sym] = b
+            self._check_triggers()
+            for oid, so in list(self.resting.items()):
+                b = self.boards.get(so.symbol)
+                if b is not None and so.on_board(b, self.prev_boards.get(so.symbol)):
+                    self._fill(oid, so.price)
+
+    def board(self, symbol: str) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            b = self.boards.get(symbol)
+            return dict(b) if b else None
+
+    # --- 注文 ---
+    def _new_id(self) -> str:
+        return f"{self.clock:%Y%m%d}A01N{next(self._seq):08d}"
+
+    def send_order(self, o: Dict[str, Any]) -> Dict[str, Any]:
+        with self.lock:
+            sym = str(o.get("Symbol"))
+            b = self.boards.get(sym)
+            if b is None:
+                return {"Code": 4002001, "Message": "銘柄が見つからない"}
+            side = int(o.get("Side"))
+            qty = float(o.get("Qty") or 0)
+            if qty <= 0:
+                return {"Code": 4001005, "Message": "数量が不正"}
+            cash_margin = int(o.get("CashMargin") or 1)
+            if cash_margin == 1 and side == 1 \
+                    and float(self.positions.get(sym, {}).get("LeavesQty", 0)) - self._sell_resting(sym) < qty:
+                return {"Code": 8, "Message": "売却可能数量不足"}
+            if cash_margin == 3 and self._closable(sym, 3 - side) - self._close_resting(sym, side) < qty:
+                return {"Code": 8, "Message": "返済可能数量不足"}
+            front = int(o.get("FrontOrderType") or 20)
+            rl = o.get("ReverseLimitOrder") if front == 30 else None
+            if front == 30 and not isinstance(rl, dict):
+                return {"Code": 4001005, "Message": "逆指値条件が不正"}
+            market = front == 10
+            price = float(o.get("Price") or 0)
+            oid = self._new_id()
+            self.orders[oid] = {
+                "ID": oid, "State": 3, "OrderState": 3, "OrdType": 1,
+                "RecvTime": self.clock.isoformat(), "Symbol": sym,
+                "SymbolName": b.get("SymbolName", ""), "Exchange": int(o.get("Exchange") or 1),
+                "Price": price, "OrderQty": qty, "CumQty": 0.0, "Side": str(side),
+                "CashMargin": cash_margin, "MarginTradeType": int(o.get("MarginTradeType") or 0),
+                "AccountType": o.get("AccountType"),
+                "DelivType": o.get("DelivType"), "ExpireDay": int(self.clock.strftime("%Y%m%d")),
+                "Details": [{"SeqNum": 1, "ID": oid, "RecType": 1, "State": 3, "OrdType": 1,
+                             "TransactTime": self.clock.isoformat(), "Price": price, "Qty": qty}],
+            }
+            if o.get("ClosePositions"):
+                self.orders[oid]["ClosePositions"] = [dict(cp) for cp in o["ClosePositions"]]
+            if rl is not None:
+                self.orders[oid]["ReverseLimitOrder"] = dict(rl)
+                self.triggers[oid] = dict(rl)
+            else:
+                self._execute(oid, b, market, price)
+            return {"Result": 0, "OrderId": oid}
+
+    def _execute(self, oid: str, b: Dict[str, Any], market: bool, price: float) -> None:
+        """反対気配に届けば即時約定、届かなければ並ばせる。"""
+        od = self.orders[oid]
+        side = int(od["Side"])
+        ask = float((b.get("Sell1") or {}).get("Price") or 0)
+        bid = float((b.get("Buy1") or {}).get("Price") or 0)
+        if side == 2 and (market or (ask and price >= ask)):
+            self._fill(oid, ask)
+        elif side == 1 and (market or (bid and price <= bid)):
+            self._fill(oid, bid)
+        else:
+            lv = "Buy" if side == 2 else "Sell"
+            self.resting[oid] = SimOrder(od["Symbol"], side, price, float(od["OrderQty"]), time.time(),
+                                         level_qty_at(b, lv, price) or 0.0)
+
+    def _check_triggers(self) -> None:
+        """現在値が逆指値の条件に届いた注文を、成行（AfterHitOrderType=1）または指値で出し直す。"""
+        for oid, rl in list(self.triggers.items()):
+            od = self.orders[oid]
+            b = self.boards.get(od["Symbol"])
+            cur = (b or {}).get("CurrentPrice")
+            if cur is None:
+                continue
+            trig = float(rl.get("TriggerPrice") or 0)
+            hit = float(cur) <= trig if int(rl.get("UnderOver") or 1) == 1 else float(cur) >= trig
+            if not hit:
+                continue
+            del self.triggers[oid]
+            market = int(rl.get("AfterHitOrderType") or 1) == 1
+            od["Price"] = 0.0 if market else float(rl.get("AfterHitPrice") or 0)
+            self._execute(oid, b, market, od["Price"])
+
+    def _open_qty(self, sym: str, side: int, cash_margin: int) -> float:
+        """並んでいる・発動待ちの注文の数量（売却可能・返済可能数量から差し引く分）。"""
+        return sum(float(self.orders[oid]["OrderQty"]) for oid in list(self.resting) + list(self.triggers)
+                   if self.orders[oid]["Symbol"] == sym and self.orders[oid]["Side"] == str(side)
+                   and self.orders[oid]["CashMargin"] == cash_margin)
+
+    def _sell_resting(self, sym: str) -> float:
+        return self._open_qty(sym, 1, 1)
+
+    def _closable(self, sym: str, side: int) -> float:
+        return sum(float(p["LeavesQty"]) for p in self.margin_positions.values()
+                   if p["Symbol"] == sym and p["Side"] == str(side))
+
+    def _close_resting(self, sym: str, side: int) -> float:
+        return self._open_qty(sym, side, 3)
+
+    def _fill_margin(self, od: Dict[str, Any], qty: float, price: float) -> None:
+        """
+        信用新規は建玉を1つ作り、返済は ClosePositions の建玉（指定が無ければ反対側の建玉を古い順）を
+        減らす（損益は余力に足す）。
+        """
+        if od["CashMargin"] == 2:
+            hid = f"E{od['ID']}"
+            self.margin_positions[hid] = {
+                "ExecutionID": hid, "AccountType": 4, "Symbol": od["Symbol"], "SymbolName": od["SymbolName"],
+                "Exchange": od["Exchange"], "SecurityType": 1, "ExecutionDay": int(self.clock.strftime("%Y%m%d")),
+                "Price": price, "LeavesQty": qty, "HoldQty": 0.0, "Side": od["Side"],
+                "MarginTradeType": od["MarginTradeType"], "CurrentPrice": price, "ProfitLoss": 0.0,
+            }
+            return
+        held_side = "1" if od["Side"] == "2" else "2"
+        if od.get("ClosePositions"):
+            plan = [(str(cp["HoldID"]), float(cp["Qty"])) for cp in od["ClosePositions"]]
+        else:
+            plan = [(h, qty) for h, p in self.margin_positions.items()
+                    if p["Symbol"] == od["Symbol"] and p["Side"] == held_side]
+        for hid, want in plan:
+            if qty <= 0:
+                break
+            pos = self.margin_positions.get(hid)
+            if pos is None:
+                continue
+            n = min(qty, want, float(pos["LeavesQty"]))
+            sign = 1.0 if held_side == "2" else -1.0
+            self.cash += sign * (price - float(pos["Price"])) * n
+            pos["LeavesQty"] = float(pos["LeavesQty"]) - n
+            qty -= n
+            if pos["LeavesQty"] <= 0:
+                del self.margin_positions[hid]
+
+    def _fill(self, oid: str, price: float) -> None:
+        od = self.orders[oid]
+        self.resting.pop(oid, None)
+        qty = float(od["OrderQty"]) - float(od["CumQty"])
+        od["CumQty"] = float(od["OrderQty"])
+        od["State"] = od["OrderState"] = 5
+        od["Details"].append({
+            "SeqNum": len(od["Details"]) + 1, "ID": f"E{oid}", "RecType": 8, "State": 3, "OrdType": 1,
+            "TransactTime": self.clock.isoformat(), "Price": price, "Qty": qty,
+            "ExecutionID": f"E{oid}", "ExecutionDay": self.clock.isoformat(),
+        })
+        if od["CashMargin"] != 1:
+            self._fill_margin(od, qty, price)
+            return
+        sym = od["Symbol"]
+        pos = self.positions.setdefault(sym, {
+            "ExecutionID": f"E{oid}", "AccountType": 4, "Symbol": sym, "SymbolName": od["SymbolName"],
+            "Exchange": od["Exchange"], "SecurityType": 1, "Side": "2", "Price": price,
+            "LeavesQty": 0.0, "HoldQty": 0.0,
+        })
+        if od["Side"] == "2":
+            total = pos["LeavesQty"] + qty
+            pos["Price"] = (pos["Price"] * pos["LeavesQty"] + price * qty) / total
+            pos["LeavesQty"] = total
+            self.cash -= price * qty
+        else:
+            pos["LeavesQty"] = max(0.0, pos["LeavesQty"] - qty)
+            self.cash += price * qty
+            if pos["LeavesQty"] <= 0:
+                del self.positions[sym]
+
+    def cancel(self, oid: str) -> Dict[str, Any]:
+        with self.lock:
+            od = self.orders.get(oid)
+            if od is None:
+                return {"Code": 4001013, "Message": "注文番号が見つからない"}
+            if od["OrderState"] == 5:
+                return {"Code": 43, "Message": "既に終了した注文"}
+            self.resting.pop(oid, None)
+            self.triggers.pop(oid, None)
+            od["State"] = od["OrderState"] = 5
+            od["Details"].append({"SeqNum": len(od["Details"]) + 1, "ID": oid, "RecType": 6, "State": 3,
+                                  "TransactTime": self.clock.isoformat(), "Price": od["Price"], "Qty": 0})
+            return {"Result": 0, "OrderId": oid}
+
+    # --- 照会 ---
+    def list_orders(self, q: Dict[str, str]) -> List[Dict[str, Any]]:
+        with self.lock:
+            out = []
+            for od in self.orders.values():
+                if q.get("id") and od["ID"] != q["id"]:
+                    continue
+                if q.get("symbol") and od["Symbol"] != q["symbol"]:
+                    continue
+                if q.get("side") and od["Side"] != q["side"]:
+                    continue
+                out.append(json.loads(json.dumps(od)))
+            return out
+
+    def list_positions(self, q: Dict[str, str]) -> List[Dict[str, Any]]:
+        """product（0:全て 1:現物 2:信用）と symbol で絞る。"""
+        product = str(q.get("product") or "0")
+        with self.lock:
+            out = []
+            if product in ("0", "1"):
+                out += [dict(p) for p in self.positions.values()]
+            if product in ("0", "2"):
+                out += [dict(p) for p in self.margin_positions.values()]
+            return [p for p in out if not q.get("symbol") or p["Symbol"] == q["symbol"]]
+
+    def ranking(self, q: Dict[str, str]) -> Dict[str, Any]:
+        with self.lock:
+            rows = sorted(self.boards.values(), key=lambda b: -float(b.get("TradingValue") or 0))
+            return {"Type": q.get("type", "1"), "ExchangeDivision": q.get("ExchangeDivision", "ALL"),
+                    "Ranking": [{"No": i, "Symbol": b["Symbol"], "SymbolName": b.get("SymbolName", ""),
+                                 "CurrentPrice": b.get("CurrentPrice"), "TradingVolume": b.get("TradingVolume"),
+                                 "TradingValue": b.get("TradingValue")} for i, b in enumerate(rows, 1)]}
+
+    def future_symbol(self, q: Dict[str, str]) -> Optional[Dict[str, Any]]:
+        """/symbolname/future 相当（銘柄コードは先物コード・限月から機械的に作る）。"""
+        codes = {"NK225": 1, "NK225mini": 2, "NK225micro": 3, "TOPIX": 4, "MOTHERS": 5}
+        kind = codes.get(q.get("FutureCode", "NK225"))
+        try:
+            month = int(q.get("DerivMonth") or 0) or int(self.clock.strftime("%Y%m"))
+        except ValueError:
+            return None
+        if kind is None:
+            return None
+        return {"Symbol": f"16{kind}{month % 10000:04d}18", "SymbolName": f"{q.get('FutureCode')} {month // 100 % 100:02d}/{month % 100:02d}"}
+
+    def option_symbol(self, q: Dict[str, str]) -> Optional[Dict[str, Any]]:
+        """
+        /symbolname/option・/symbolname/minioptionweekly 相当（行使価格は 125 円刻みのみ。
+        銘柄コードは限月（・限週）・行使価格から機械的に作る）。
+        """
+        try:
+            month = int(q.get("DerivMonth") or 0) or int(self.clock.strftime("%Y%m"))
+            strike = int(float(q.get("StrikePrice") or 0))
+        except ValueError:
+            return None
+        pc = q.get("PutOrCall")
+        if strike <= 0 or strike % 125 or pc not in ("C", "P"):
+            return None
+        mini = q.get("OptionCode") == "NK225miniop"
+        week = int(q.get("DerivWeekly") or 0)
+        code = f"{'1' if pc == 'C' else '2'}{'8' if mini else '3'}{month % 100:02d}{week}{strike // 125:05d}"
+        name = f"日経{'225ミニ' if mini else '平均'}OP {month // 100 % 100:02d}/{month % 100:02d} {'コール' if pc == 'C' else 'プット'} {strike}"
+        return {"Symbol": code, "SymbolName": name}
+
+    def symbol_info(self, sym: str) -> Optional[Dict[str, Any]]:
+        """/symbol 相当（売買単位 100、値幅制限は初回の板の現在値 ±30%）。"""
+        with self.lock:
+            b = self.boards.get(sym)
+            if b is None:
+                return None
+            base = float(b.get("CurrentPrice") or b.get("BidPrice") or 0.0)
+            return {"Symbol": sym, "SymbolName": b.get("SymbolName", f"MOCK{sym}"), "DisplayName": f"MOCK{sym}",
+                    "Exchange": 1, "ExchangeName": "東証プ", "TradingUnit": 100.0, "PriceRangeGroup": "10000",
+                    "UpperLimit": round(base * 1.3), "LowerLimit": round(base * 0.7)}
+
+
+class MockKabuServer:
+    """MockMarket を HTTP/WebSocket で公開する。calls にエンドポイント別の呼び出し回数を数える。"""
+
+    def __init__(self, market: MockMarket, host: str = "127.0.0.1", port: int = 18081,
+                 step_sec: float = 1.0, push: bool = True):
+        self.market = market
+        self.step_sec = step_sec
+        self.push = push
+        self.calls: Counter = Counter()
+        self.calls_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._tick = threading.Condition()
+        self.httpd = ThreadingHTTPServer((host, port), _make_handler(self))
+        self.httpd.daemon_threads = True
+        self._threads: List[threading.Thread] = []
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/kabusapi/"
+
+    def count(self, endpoint: str) -> None:
+        with self.calls_lock:
+            self.calls[endpoint] += 1
+
+    def reset_calls(self) -> Counter:
+        with self.calls_lock:
+            c, self.calls = self.calls, Counter()
+            return c
+
+    def _clock(self) -> None:
+        while not self._stop.wait(self.step_sec):
+            self.market.step(self.step_sec)
+            with self._tick:
+                self._tick.notify_all()
+
+    def wait_tick(self, timeout: float) -> None:
+        with self._tick:
+            self._tick.wait(timeout)
+
+    def start(self) -> "MockKabuServer":
+        for target in (self.httpd.serve_forever, self._clock) if self.step_sec > 0 else (self.httpd.serve_forever,):
+            t = threading.Thread(target=target, daemon=True)
+            t.start()
+            self._threads.append(t)
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        with self._tick:
+            self._tick.notify_all()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def _make_handler(server: MockKabuServer):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, fmt, *args):
+            pass
+
+        def _send(self, status: int, body: Any) -> None:
+            raw = json.dumps(body, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(raw)))
+            self.end_headers()
+            self.wfile.write(raw)
+
+        def _body(self) -> Dict[str, Any]:
+            n = int(self.headers.get("Content-Length") or 0)
+            if n <= 0:
+                return {}
+            try:
+                return json.loads(self.rfile.read(n))
+            except ValueError:
+                return {}
+
+        def _route(self, method: str):
+            u = urlparse(self.path)
+            parts = [p for p in u.path.split("/") if p]
+            if not parts or parts[0] != "kabusapi":
+                return self._send(404, {"Code": 404, "Message": "Not Found"})
+            parts = parts[1:]
+            q = {k: v[-1] for k, v in parse_qs(u.query).items()}
+            market = server.market
+            ep = parts[0] if parts else ""
+            if ep in ("sendorder", "wallet", "unregister") and len(parts) > 1:
+                ep = f"{ep}/{parts[1]}"
+            server.count(f"{method} {ep}")
+
+            if ep == "websocket" and method == "GET":
+                return self._websocket()
+            if ep == "token" and method == "POST":
+                self._body()
+                return self._send(200, {"ResultCode": 0, "Token": "mock-token"})
+            if not self.headers.get("X-API-KEY"):
+                return self._send(401, {"Code": 4001009, "Message": "APIキー不一致"})
+            if ep == "board" and method == "GET" and len(parts) > 1:
+                b = market.board(parts[1].split("@")[0])
+                return self._send(200, b) if b else self._send(404, {"Code": 4002001, "Message": "銘柄が見つからない"})
+            if ep == "symbol" and method == "GET" and len(parts) > 1:
+                info = market.symbol_info(parts[1].split("@")[0])
+                return self._send(200, info) if info else self._send(404, {"Code": 4002001, "Message": "銘柄が見つからない"})
+            if ep == "primaryexchange" and method == "GET" and len(parts) > 1:
+                if parts[1] not in market.boards:
+                    return self._send(404, {"Code": 4002001, "Message": "銘柄が見つからない"})
+                return self._send(200, {"Symbol": parts[1], "PrimaryExchange": market.primary_exchanges.get(parts[1], 1)})
+            if ep == "regulations" and method == "GET" and len(parts) > 1:
+                sym = parts[1].split("@")[0]
+                return self._send(200, {"Symbol": sym, "RegulationsInfo": market.regulations.get(sym, [])})
+            if ep == "margin" and method == "GET" and len(parts) > 2 and parts[1] == "marginpremium":
+                none = {"MarginPremiumType": 0, "MarginPremium": None, "UpperMarginPremium": None,
+                        "LowerMarginPremium": None, "TickMarginPremium": None}
+                prem = market.margin_premiums.get(parts[2], {})
+                return self._send(200, {"Symbol": parts[2], "GeneralMargin": prem.get("GeneralMargin", none),
+                                        "DayTrade": prem.get("DayTrade", none)})
+            if ep == "symbolname" and method == "GET" and len(parts) > 1 and parts[1] == "future":
+                res = market.future_symbol(q)
+                return self._send(200, res) if res else self._send(400, {"Code": 4002006, "Message": "銘柄が見つからない"})
+            if ep == "symbolname" and method == "GET" and len(parts) > 1 and parts[1] in ("option", "minioptionweekly"):
+                if parts[1] == "minioptionweekly":
+                    q = dict(q, OptionCode="NK225miniop")
+                res = market.option_symbol(q)
+                return self._send(200, res) if res else self._send(400, {"Code": 4002006, "Message": "銘柄が見つからない"})
+            if ep == "orders" and method == "GET":
+                return self._send(200, market.list_orders(q))
+            if ep == "positions" and method == "GET":
+                return self._send(200, market.list_positions(q))
+            if ep.startswith("wallet/cash") and method == "GET":
+                return self._send(200, {"StockAccountWallet": market.cash})
+            if ep.startswith("wallet/") and method == "GET":
+                return self._send(200, {"MarginAccountWallet": market.cash, "FutureTradeLimit": market.cash,
+                                        "OptionBuyTradeLimit": market.cash, "OptionSellTradeLimit": market.cash,
+                                        "MarginRequirement": None})
+            if ep.startswith("sendorder") and method == "POST":
+                return self._send(200, market.send_order(self._body()))
+            if ep == "cancelorder" and method == "PUT":
+                body = self._body()
+                return self._send(200, market.cancel(str(body.get("OrderId") or body.get("OrderID"))))
+            if ep == "register" and method == "PUT":
+                with market.lock:
+                    for s in self._body().get("Symbols") or []:
+                        if s not in market.registered:
+                            market.registered.append(s)
+                    return self._send(200, {"RegistList": list(market.registered)})
+            if ep.startswith("unregister") and method == "PUT":
+                with market.lock:
+                    if ep == "unregister/all":
+                        market.registered.clear()
+                    else:
+                        for s in self._body().get("Symbols") or []:
+                            if s in market.registered:
+                                market.registered.remove(s)
+                    return self._send(200, {"RegistList": list(market.registered)})
+            if ep == "ranking" and method == "GET":
+                return self._send(200, market.ranking(q))
+            if ep == "apisoftlimit" and method == "GET":
+                return self._send(200, {"Stock": 5000, "Margin": 5000, "Future": 5000, "FutureMini": 5000,
+                                        "FutureMicro": 5000, "Option": 5000, "MiniOption": 5000,
+                                        "KabuSVersion": "mock"})
+            return self._send(404, {"Code": 404, "Message": f"unsupported: {method} {ep}"})
+
+        def do_GET(self):
+            self._route("GET")
+
+        def do_POST(self):
+            self._route("POST")
+
+        def do_PUT(self):
+            self._route("PUT")
+
+        # --- PUSH (RFC 6455, サーバ→クライアントのテキストフレームのみ) ---
+        def _websocket(self):
+            market = server.market
+            key = self.headers.get("Sec-WebSocket-Key")
+            if not key or "websocket" not in (self.headers.get("Upgrade") or "").lower():
+                return self._send(400, {"Code": 400, "Message": "websocket upgrade required"})
+            accept = base64.b64encode(hashlib.sha1((key + WS_GUID).encode()).digest()).decode()
+            self.send_response(101, "Switching Protocols")
+            self.send_header("Upgrade", "websocket")
+            self.send_header("Connection", "Upgrade")
+            self.send_header("Sec-WebSocket-Accept", accept)
+            self.end_headers()
+            self.close_connection = True
+            try:
+                while not server._stop.is_set():
+                    server.wait_tick(max(server.step_sec, 0.05))
+                    with market.lock:
+                        syms = [str(s.get("Symbol")) for s in market.registered]
+                    for sym in syms:
+                        b = market.board(sym)
+                        if b:
+                            self._ws_send(json.dumps(b, ensure_ascii=False).encode("utf-8"))
+            except (BrokenPipeError, ConnectionResetError, OSError):
+                pass
+
+        def _ws_send(self, payload: bytes) -> None:
+            n = len(payload)
+            if n < 126:
+                head = struct.pack("!BB", 0x81, n)
+            elif n < 65536:
+                head = struct.pack("!BBH", 0x81, 126, n)
+            else:
+                head = struct.pack("!BBQ", 0x81, 127, n)
+            self.wfile.write(head + payload)
+            self.wfile.flush()
+
+    return Handler
+
+
+def build_market(symbols: List[str], replay_dir: Optional[str] = None, seed: int = 0,
+                 price: float = 100.0) -> MockMarket:
+    if replay_dir:
+        logs = load_board_log(replay_dir)
+        books = {s: ReplayBook(s, rows) for s, rows in logs.items() if not symbols or s in symbols}
+    else:
+        books = {s: ScriptedBook(s, price=price, seed=seed + i) for i, s in enumerate(symbols)}
+    return MockMarket(books)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="kabu station mock server (REST + PUSH)")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=18081)
+    ap.add_argument("--symbols", default="1757,9973,6740,8918,4564", help="台本モードの銘柄（カンマ区切り）")
+    ap.add_argument("--replay", help="再生する board_log の日付ディレクトリ")
+    ap.add_argument("--step-sec", type=float, default=1.0, help="板を1つ進める間隔（秒）")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--price", type=float, default=100.0)
+    args = ap.parse_args()
+
+    syms = [s for s in args.symbols.split(",") if s] if not args.replay else []
+    srv = MockKabuServer(build_market(syms, args.replay, args.seed, args.price),
+                         args.host, args.port, args.step_sec).start()
+    print(f"mock kabu station: {srv.base_url}  (Ctrl+C で終了)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        srv.stop()
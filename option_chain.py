@@ -0,0 +1,189 @@
+"""
+日経225オプション / 日経225ミニオプションのチェーン（限月 × 行使価格 × コール/プット → 銘柄コード）。
+
+- 行使価格の格子（中心 ± width 本、strike_step 円刻み）のうち未解決のものだけを
+  /symbolname/option で並行に解決する（option_chain_workers 本のスレッド）。
+  各呼び出しの前に api_budget の acquire() で情報系の枠を予約するので、並行でも秒間上限を超えない。
+- 解決した銘柄コードは限月ごとに <option_chain_dir>/<OptionCode><系列>_<限月>.json に保存する
+  （同じ限月の間はコードが変わらないため日をまたいでも使う）。存在しない行使価格は
+  プロセス内だけ覚えて再問い合わせしない。
+- register() は中心に近い行使価格からコール/プットを選び、/register を1回でまとめて呼ぶ
+  （登録は合計 push_register_max 銘柄まで）。
+
+使い方: python option_chain.py --code NK225op --month 202306 --center 27250 --width 10 --register
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, List, Tuple, Iterable
+import argparse
+import json
+import logging
+import os
+import threading
+
+from const import option_chain_dir, option_chain_workers, push_register_max
+from api_budget import get_budget, install_budget
+from kabusapi_symbolname_option import get_option_symbol
+from kabusapi_register import register_symbols
+from kabusapi_token import get_token
+from state_store import atomic_write_json
+
+logger = logging.getLogger(__name__)
+
+# 先物・オプション（日通し）の市場コード
+DERIV_EXCHANGE = 2
+
+Key = Tuple[str, int]   # (PutOrCall, StrikePrice)
+
+
+class OptionChain:
+    """1つの限月のチェーン。codes[(pc, strike)] = {'Symbol': ..., 'SymbolName': ...}"""
+
+    def __init__(self, option_code: str, deriv_month: int, codes: Optional[Dict[Key, Dict[str, str]]] = None):
+        self.option_code = option_code
+        self.deriv_month = int(deriv_month)
+        self.codes: Dict[Key, Dict[str, str]] = dict(codes or {})
+
+    def symbol(self, put_or_call: str, strike: int) -> Optional[str]:
+        c = self.codes.get((put_or_call, int(strike)))
+        return c["Symbol"] if c else None
+
+    def strikes(self) -> List[int]:
+        return sorted({k for _, k in self.codes})
+
+    def nearest(self, center: float, n: int) -> List[Key]:
+        """中心に近い行使価格から順に、コール/プットを合わせて n 銘柄分のキーを返す。"""
+        keys = sorted(self.codes, key=lambda k: (abs(k[1] - center), k[1], k[0]))
+        return keys[:max(0, n)]
+
+    def to_json(self) -> Dict[str, Any]:
+        return {"option_code": self.option_code, "deriv_month": self.deriv_month,
+                "codes": [{"PutOrCall": pc, "StrikePrice": k, **v} for (pc, k), v in sorted(self.codes.items())]}
+
+    @classmethod
+    def from_json(cls, d: Dict[str, Any]) -> "OptionChain":
+        codes = {(str(c["PutOrCall"]), int(c["StrikePrice"])): {"Symbol": str(c["Symbol"]),
+                                                                 "SymbolName": str(c.get("SymbolName") or "")}
+                 for c in d.get("codes") or []}
+        return cls(str(d["option_code"]), int(d["deriv_month"]), codes)
+
+
+class OptionChainBuilder:
+    def __init__(self, option_code: str = "NK225op", strike_step: int = 125,
+                 workers: int = option_chain_workers, cache_dir: str = option_chain_dir,
+                 fetch=get_option_symbol, register=register_symbols, budget=None, series: str = ""):
+        self.option_code = option_code
+        self.series = series   # 同じ限月に複数の系列がある場合の区別（ミニオプションの限週 'W1' など）
+        self.strike_step = int(strike_step)
+        self.workers = max(1, int(workers))
+        self.cache_dir = cache_dir
+        self._fetch = fetch
+        self._register = register
+        self.budget = budget if budget is not None else get_budget()
+        self._chains: Dict[int, OptionChain] = {}
+        self._missing: Dict[int, set] = {}
+        self._lock = threading.Lock()
+
+    # --- 限月ごとのキャッシュ ---
+    def path_for(self, deriv_month: int) -> str:
+        return os.path.join(self.cache_dir, f"{self.option_code}{self.series}_{int(deriv_month)}.json")
+
+    def chain(self, deriv_month: int) -> OptionChain:
+        """メモリ → ファイルの順に探し、無ければ空のチェーンを返す（API は呼ばない）。"""
+        m = int(deriv_month)
+        if m not in self._chains:
+            ch = OptionChain(self.option_code, m)
+            try:
+                with open(self.path_for(m), "r", encoding="utf-8") as f:
+                    ch = OptionChain.from_json(json.load(f))
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logger.warning(f"オプションチェーンのキャッシュを読めません: {e}")
+            self._chains[m] = ch
+            self._missing.setdefault(m, set())
+        return self._chains[m]
+
+    def _save(self, ch: OptionChain) -> None:
+        try:
+            atomic_write_json(self.path_for(ch.deriv_month), ch.to_json())
+        except Exception as e:
+            logger.warning(f"オプションチェーンのキャッシュを書き込めません: {e}")
+
+    # --- 解決 ---
+    def strike_grid(self, center: float, width: int) -> List[int]:
+        step = self.strike_step
+        atm = int(round(center / step)) * step
+        return [atm + i * step for i in range(-width, width + 1) if atm + i * step > 0]
+
+    def _resolve_one(self, deriv_month: int, key: Key) -> Tuple[Key, Optional[Dict[str, str]]]:
+        self.budget.acquire("info")
+        res = self._fetch(self.option_code, deriv_month, key[0], key[1])
+        if isinstance(res, dict) and res.get("Symbol"):
+            return key, {"Symbol": str(res["Symbol"]), "SymbolName": str(res.get("SymbolName") or "")}
+        return key, None
+
+    def build(self, deriv_month: int, center: float, width: int = 10,
+              sides: Iterable[str] = ("C", "P")) -> OptionChain:
+        """
+        限月 deriv_month（yyyyMM。0 の直近限月は限月が定まらずキャッシュできないため不可）の
+        中心 ± width 本の行使価格を解決したチェーンを返す。
+        """
+        if not deriv_month:
+            raise ValueError("deriv_month は yyyyMM で指定してください")
+        m = int(deriv_month)
+        ch = self.chain(m)
+        missing = self._missing[m]
+        todo = [(pc, k) for k in self.strike_grid(center, width) for pc in sides
+                if (pc, k) not in ch.codes and (pc, k) not in missing]
+        if not todo:
+            return ch
+
+        get_token()   # 各スレッドで取り合わないよう先に用意しておく
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(todo)),
+                                thread_name_prefix="option-chain") as ex:
+            results = list(ex.map(lambda key: self._resolve_one(m, key), todo))
+        with self._lock:
+            for key, code in results:
+                if code is None:
+                    missing.add(key)
+                else:
+                    ch.codes[key] = code
+        found = sum(1 for _, c in results if c is not None)
+        logger.info(f"オプションチェーン {self.option_code}{self.series} {m}: {found}/{len(todo)} 銘柄を解決（計 {len(ch.codes)}）")
+        if found:
+            self._save(ch)
+        return ch
+
+    # --- PUSH 登録 ---
+    def register(self, ch: OptionChain, center: float, max_symbols: int = push_register_max) -> List[Dict[str, Any]]:
+        """中心に近い銘柄から max_symbols 件を /register に1回でまとめて登録する。"""
+        syms = [{"Symbol": ch.codes[k]["Symbol"], "Exchange": DERIV_EXCHANGE}
+                for k in ch.nearest(center, max_symbols)]
+        if not syms:
+            return []
+        self.budget.acquire("register")
+        res = self._register(syms)
+        if not isinstance(res, dict) or "RegistList" not in res:
+            logger.warning(f"PUSH 登録に失敗しました: {res}")
+            return []
+        logger.info(f"PUSH 登録: {len(syms)} 銘柄（登録中 {len(res['RegistList'])}）")
+        return syms
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s: %(message)s')
+    ap = argparse.ArgumentParser(description="option chain builder")
+    ap.add_argument("--code", default="NK225op", choices=["NK225op", "NK225miniop"])
+    ap.add_argument("--month", type=int, required=True, help="限月 yyyyMM")
+    ap.add_argument("--center", type=float, required=True, help="中心の行使価格（原資産価格）")
+    ap.add_argument("--width", type=int, default=10, help="中心から上下それぞれの本数")
+    ap.add_argument("--register", action="store_true", help="中心に近い銘柄を PUSH 登録する")
+    args = ap.parse_args()
+
+    install_budget(load_soft_limits=False)
+    builder = OptionChainBuilder(args.code)
+    chain = builder.build(args.month, args.center, args.width)
+    for (pc, k), c in sorted(chain.codes.items(), key=lambda kv: (kv[0][1], kv[0][0])):
+        print(pc, k, c["Symbol"], c["SymbolName"])
+    if args.register:
+        builder.register(chain, args.center)
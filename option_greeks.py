@@ -0,0 +1,258 @@
+"""
+オプションチェーン全体の IV・グリークスを NumPy でまとめて計算する（Black-76）。
+
+- black76_price / black76_greeks … 原資産先物価格 F・行使価格 K・残存年数 T・金利 r・ボラティリティ σ の
+  配列をそのまま受け取り、チェーン全体を1回の演算で計算する。
+- implied_vol … 価格の配列から IV を一括で解く（ニュートン法。区間から外れる・ベガが小さい要素は二分法）。
+  理論上の範囲外の価格（本質価値以下・上限以上）や時間価値がほぼ無い価格は NaN。
+- ChainGreeks … option_chain.OptionChain の銘柄を配列に並べ、PUSH の板（on_push）で価格が変わった
+  行使価格だけ、原資産が動いたら全体を、次の refresh() で計算し直す（前回の IV から解き始める）。
+  position_risk() で /positions（オプション）の建玉のデルタ・ガンマ・ベガ・セータを合計する。
+
+ベガは 1%（0.01）あたり、セータは 1 日あたり（いずれも円・1単位あたり）。
+正規分布の累積分布関数は Hart (1968) の有理近似を NumPy でまとめて計算する（倍精度で誤差 1e-14 程度、scipy 不要）。
+"""
+from datetime import datetime, time as dtime
+from typing import Optional, Dict, Any, List, Iterable
+import logging
+import math
+import time
+
+import numpy as np
+
+from const import option_rate, option_multipliers
+from contracts import sq_date
+
+logger = logging.getLogger(__name__)
+
+_INV_SQRT2PI = 1.0 / math.sqrt(2.0 * math.pi)
+_SQRT2PI = math.sqrt(2.0 * math.pi)
+
+# Hart (1968) の係数（|x| < 7.07 の有理式、高次から）
+_HART_P = (3.52624965998911e-02, 0.700383064443688, 6.37396220353165, 33.912866078383,
+           112.079291497871, 221.213596169931, 220.206867912376)
+_HART_Q = (8.83883476483184e-02, 1.75566716318264, 16.064177579207, 86.7807322029461,
+           296.564248779674, 637.333633378831, 793.826512519948, 440.413735824752)
+
+YEAR_SEC = 365.0 * 24 * 3600
+
+
+def norm_cdf(x: np.ndarray) -> np.ndarray:
+    """標準正規分布の累積分布関数（配列のまま計算。|x| ≥ 7.07 は連分数、37 超は 0/1）。"""
+    x = np.asarray(x, dtype=float)
+    a = np.abs(x)
+    e = np.exp(-0.5 * a * a)
+    num = np.full_like(a, _HART_P[0])
+    for c in _HART_P[1:]:
+        num = num * a + c
+    den = np.full_like(a, _HART_Q[0])
+    for c in _HART_Q[1:]:
+        den = den * a + c
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cf = a + 0.65
+        for k in (4.0, 3.0, 2.0, 1.0):
+            cf = a + k / cf
+        tail = np.where(a < 7.07106781186547, e * num / den, e / cf / _SQRT2PI)
+    tail = np.where(a > 37.0, 0.0, tail)
+    return np.where(x > 0, 1.0 - tail, tail)
+
+
+def norm_pdf(x: np.ndarray) -> np.ndarray:
+    return _INV_SQRT2PI * np.exp(-0.5 * np.square(x))
+
+
+def _d1_d2(F, K, T, sigma):
+    vt = sigma * np.sqrt(T)
+    d1 = (np.log(F / K) + 0.5 * vt * vt) / vt
+    return d1, d1 - vt
+
+
+def black76_price(F, K, T, r, sigma, is_call) -> np.ndarray:
+    F, K, T, sigma = (np.asarray(a, dtype=float) for a in (F, K, T, sigma))
+    df = np.exp(-r * T)
+    d1, d2 = _d1_d2(F, K, T, sigma)
+    call = df * (F * norm_cdf(d1) - K * norm_cdf(d2))
+    put = df * (K * norm_cdf(-d2) - F * norm_cdf(-d1))
+    return np.where(is_call, call, put)
+
+
+def black76_greeks(F, K, T, r, sigma, is_call) -> Dict[str, np.ndarray]:
+    """price / delta / gamma / vega（1%あたり）/ theta（1日あたり）を返す。"""
+    F, K, T, sigma = (np.asarray(a, dtype=float) for a in (F, K, T, sigma))
+    df = np.exp(-r * T)
+    sqrt_t = np.sqrt(T)
+    d1, d2 = _d1_d2(F, K, T, sigma)
+    nd1 = norm_cdf(d1)
+    nd2 = norm_cdf(d2)
+    pdf = norm_pdf(d1)
+    call = df * (F * nd1 - K * nd2)
+    put = df * (K * (1.0 - nd2) - F * (1.0 - nd1))
+    price = np.where(is_call, call, put)
+    decay = -df * F * pdf * sigma / (2.0 * sqrt_t)
+    return {
+        "price": price,
+        "delta": np.where(is_call, df * nd1, -df * (1.0 - nd1)),
+        "gamma": df * pdf / (F * sigma * sqrt_t),
+        "vega": df * F * pdf * sqrt_t / 100.0,
+        "theta": (decay + r * price) / 365.0,
+    }
+
+
+def implied_vol(price, F, K, T, r, is_call, sigma0=None,
+                lo: float = 1e-4, hi: float = 5.0, tol: float = 1e-6, max_iter: int = 50) -> np.ndarray:
+    """価格の配列から IV を一括で解く。解けない要素は NaN。sigma0 は初期値（前回の IV など）。"""
+    price, F, K, T = np.broadcast_arrays(*(np.asarray(a, dtype=float) for a in (price, F, K, T)))
+    is_call = np.broadcast_to(np.asarray(is_call, dtype=bool), price.shape)
+    n = price.shape
+    df = np.exp(-r * T)
+    intrinsic = df * np.where(is_call, np.maximum(F - K, 0.0), np.maximum(K - F, 0.0))
+    upper = df * np.where(is_call, F, K)
+    # 時間価値が tol の桁しか無い要素は σ がほとんど効かず解が定まらないので除く
+    ok = np.isfinite(price) & (T > 0) & (F > 0) & (K > 0) & (price - intrinsic > 10 * tol) & (price < upper)
+
+    out = np.full(n, np.nan)
+    if not ok.any():
+        return out
+    p, f, k, t, c = price[ok], F[ok], K[ok], T[ok], is_call[ok]
+    a = np.full(p.shape, lo)
+    b = np.full(p.shape, hi)
+    if sigma0 is None:
+        s = np.full(p.shape, 0.2)
+    else:
+        s = np.broadcast_to(np.asarray(sigma0, dtype=float), n)[ok].copy()
+        s = np.where(np.isfinite(s) & (s > lo) & (s < hi), s, 0.2)
+    active = np.ones(p.shape, dtype=bool)
+    for _ in range(max_iter):
+        idx = np.nonzero(active)[0]
+        if idx.size == 0:
+            break
+        g = black76_greeks(f[idx], k[idx], t[idx], r, s[idx], c[idx])
+        diff = g["price"] - p[idx]
+        done = np.abs(diff) < tol
+        active[idx[done]] = False
+        # 価格はσについて単調増加 → 区間を縮める
+        a[idx] = np.where(diff < 0, s[idx], a[idx])
+        b[idx] = np.where(diff > 0, s[idx], b[idx])
+        vega = g["vega"] * 100.0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            newton = s[idx] - diff / vega
+        mid = 0.5 * (a[idx] + b[idx])
+        bad = ~np.isfinite(newton) | (newton <= a[idx]) | (newton >= b[idx]) | (vega < 1e-12)
+        s[idx] = np.where(done, s[idx], np.where(bad, mid, newton))
+    s[active] = np.nan   # 収束しなかった要素
+    out[ok] = s
+    return out
+
+
+def expiry_of(deriv_month: int) -> datetime:
+    """限月 yyyyMM の SQ 日（第2金曜日）9:00。祝日の前倒しは考慮しない。"""
+    return datetime.combine(sq_date(deriv_month), dtime(9, 0))
+
+
+class ChainGreeks:
+    def __init__(self, symbols: List[str], strikes: Iterable[float], is_call: Iterable[bool],
+                 expiry: datetime, multiplier: float = 1000.0, r: float = option_rate,
+                 underlying: Optional[str] = None):
+        self.symbols = [str(s) for s in symbols]
+        self.index = {s: i for i, s in enumerate(self.symbols)}
+        n = len(self.symbols)
+        self.K = np.asarray(list(strikes), dtype=float)
+        self.is_call = np.asarray(list(is_call), dtype=bool)
+        self.expiry = expiry
+        self.multiplier = float(multiplier)
+        self.r = float(r)
+        self.underlying = str(underlying) if underlying else None   # 原資産先物の銘柄コード（PUSH 用）
+        self.F = float("nan")
+        self.price = np.full(n, np.nan)
+        self.iv = np.full(n, np.nan)
+        self.delta = np.full(n, np.nan)
+        self.gamma = np.full(n, np.nan)
+        self.vega = np.full(n, np.nan)
+        self.theta = np.full(n, np.nan)
+        self._dirty = np.zeros(n, dtype=bool)
+        self.updated_at = 0.0
+
+    @classmethod
+    def from_chain(cls, chain, expiry: Optional[datetime] = None, underlying: Optional[str] = None,
+                   r: float = option_rate) -> "ChainGreeks":
+        """option_chain.OptionChain から作る（expiry 省略時は限月の SQ 日）。"""
+        keys = sorted(chain.codes, key=lambda k: (k[1], k[0]))
+        return cls([chain.codes[k]["Symbol"] for k in keys], [k[1] for k in keys], [k[0] == "C" for k in keys],
+                   expiry or expiry_of(chain.deriv_month), option_multipliers.get(chain.option_code, 1000.0),
+                   r, underlying)
+
+    # --- 入力 ---
+    @staticmethod
+    def board_price(board: Dict[str, Any]) -> float:
+        """気配の仲値（片側しか無ければ現在値）。"""
+        bid, ask = board.get("BidPrice"), board.get("AskPrice")
+        if bid and ask:
+            return 0.5 * (float(bid) + float(ask))
+        cur = board.get("CurrentPrice")
+        return float(cur) if cur else float("nan")
+
+    def update_underlying(self, price: float) -> None:
+        if price and price != self.F:
+            self.F = float(price)
+            self._dirty[:] = True
+
+    def update_price(self, symbol: str, price: float) -> bool:
+        i = self.index.get(str(symbol))
+        if i is None or price == self.price[i] or (np.isnan(price) and np.isnan(self.price[i])):
+            return False
+        self.price[i] = price
+        self._dirty[i] = True
+        return True
+
+    def on_push(self, board: Dict[str, Any]) -> bool:
+        """PUSH の板1件を反映する（チェーン外の銘柄は無視）。"""
+        sym = str(board.get("Symbol"))
+        if sym == self.underlying:
+            self.update_underlying(self.board_price(board))
+            return True
+        return self.update_price(sym, self.board_price(board))
+
+    # --- 計算 ---
+    def refresh(self, now: Optional[float] = None) -> int:
+        """変化のあった銘柄だけ IV・グリークスを計算し直し、計算した数を返す。"""
+        idx = np.nonzero(self._dirty)[0]
+        if idx.size == 0 or not np.isfinite(self.F):
+            return 0
+        now = time.time() if now is None else now
+        T = max((self.expiry.timestamp() - now) / YEAR_SEC, 1e-8)
+        K, c = self.K[idx], self.is_call[idx]
+        iv = implied_vol(self.price[idx], self.F, K, T, self.r, c, sigma0=self.iv[idx])
+        g = black76_greeks(self.F, K, T, self.r, np.where(np.isfinite(iv), iv, 0.2), c)
+        valid = np.isfinite(iv)
+        self.iv[idx] = iv
+        for name in ("delta", "gamma", "vega", "theta"):
+            getattr(self, name)[idx] = np.where(valid, g[name], np.nan)
+        self._dirty[idx] = False
+        self.updated_at = now
+        return int(idx.size)
+
+    def position_risk(self, positions: List[Dict[str, Any]]) -> Dict[str, float]:
+        """
+        /positions（product=3）の建玉を合計したリスク（円換算、買い建て +・売り建て −）。
+        チェーン外・IV が解けていない銘柄は unknown に数える。
+        """
+        risk = {"delta": 0.0, "gamma": 0.0, "vega": 0.0, "theta": 0.0, "unknown": 0}
+        for pos in positions or []:
+            i = self.index.get(str(pos.get("Symbol")))
+            qty = float(pos.get("LeavesQty") or 0)
+            if not qty:
+                continue
+            if i is None or not np.isfinite(self.delta[i]):
+                risk["unknown"] += 1
+                continue
+            sign = 1.0 if str(pos.get("Side")) == "2" else -1.0
+            w = sign * qty * self.multiplier
+            for name in ("delta", "gamma", "vega", "theta"):
+                risk[name] += w * float(getattr(self, name)[i])
+        return risk
+
+    def table(self) -> List[Dict[str, Any]]:
+        return [{"Symbol": s, "StrikePrice": float(self.K[i]), "PutOrCall": "C" if self.is_call[i] else "P",
+                 "price": float(self.price[i]), "iv": float(self.iv[i]), "delta": float(self.delta[i]),
+                 "gamma": float(self.gamma[i]), "vega": float(self.vega[i]), "theta": float(self.theta[i])}
+                for i, s in enumerate(self.symbols)]
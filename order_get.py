@@ -1,3 +1,4 @@
+import json
 from datetime import datetime
 from typing import Optional, Dict, Any, List
 
@@ -35,3 +36,25 @@ def latest_detail_of_latest_order(orders) -> bool:
     if side == 2 and state in (1, 2, 3, 4) and leaves > 0:
         return False
     return True
+
+
+def order_cum_qty(orders, order_id: str) -> float:
+    """
+    /orders の応答から order_id の約定数量(CumQty)を返す。見つからなければ 0。
+    CumQty が無い環境では Details の RecType=8（約定）の Qty を合算する。
+    """
+    if isinstance(orders, str):
+        orders = json.loads(orders)
+    for o in orders or []:
+        if o.get("ID") != order_id:
+            continue
+        cum = o.get("CumQty")
+        if cum is not None:
+            try:
+                return float(cum)
+            except (TypeError, ValueError):
+                pass
+        return sum(float(d.get("Qty") or 0.0)
+                   for d in (o.get("Details") or [])
+                   if int(d.get("RecType") or -1) == 8)
+    return 0.0
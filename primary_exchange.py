@@ -0,0 +1,83 @@
+"""
+銘柄コード → 優先市場（/primaryexchange）の解決キャッシュ。
+
+板・銘柄情報・規制・発注で使う "コード@市場" を手で "@1" と決め打ちせず、ここで引く。
+- prefetch() でユニバース全体をまとめて解決する（情報系 API の残り枠が低優先度分に
+  満たなければ残りは次回）。結果は const.primary_exchange_path に保存し、
+  primary_exchange_max_age_days 日より古いものだけ取り直す（上場市場はめったに変わらない）。
+- exchange() / board_key() はメモリだけを見る。未解決の銘柄は東証（1）として扱い、
+  known() で解決済みかを判定できる（候補の板巡回は解決済みの銘柄だけに絞る）。
+"""
+from typing import Optional, Dict, Any, Iterable
+import json
+import logging
+import time
+
+from const import primary_exchange_path, primary_exchange_max_age_days
+from kabusapi_primaryexchange import get_primary_exchange
+from state_store import atomic_write_json
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EXCHANGE = 1   # 東証
+
+
+class ExchangeResolver:
+    def __init__(self, path: str = primary_exchange_path, max_age_days: float = primary_exchange_max_age_days,
+                 fetch=get_primary_exchange, budget=None):
+        self.path = path
+        self.max_age_sec = float(max_age_days) * 86400.0
+        self._fetch = fetch
+        self.budget = budget   # api_budget.ApiBudget（prefetch を低優先度で行う）
+        self._map: Dict[str, Dict[str, Any]] = {}   # コード → {'exchange': 1, 'fetched_at': ...}
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self._map = {str(k): v for k, v in json.load(f).items()}
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"優先市場キャッシュを読めません: {e}")
+
+    def _save(self) -> None:
+        try:
+            atomic_write_json(self.path, self._map)
+        except Exception as e:
+            logger.warning(f"優先市場キャッシュを書き込めません: {e}")
+
+    # --- 参照（メモリのみ） ---
+    def known(self, symbol: str) -> bool:
+        return str(symbol) in self._map
+
+    def exchange(self, symbol: str) -> int:
+        e = self._map.get(str(symbol))
+        return int(e["exchange"]) if e else DEFAULT_EXCHANGE
+
+    def board_key(self, symbol: str) -> str:
+        return f"{symbol}@{self.exchange(symbol)}"
+
+    # --- 解決 ---
+    def prefetch(self, symbols: Iterable[str], now: Optional[float] = None) -> int:
+        """未解決・古い銘柄をまとめて解決し、解決できた数を返す（残り枠が無ければ次回に回す）。"""
+        now = time.time() if now is None else now
+        stale = [str(s) for s in dict.fromkeys(symbols)
+                 if now - float((self._map.get(str(s)) or {}).get("fetched_at", 0.0)) >= self.max_age_sec]
+        n = 0
+        for i, sym in enumerate(stale):
+            if self.budget is not None and not self.budget.allow("info", low_priority=True):
+                logger.info(f"情報系APIの残り枠が少ないため優先市場の解決を {len(stale) - i} 銘柄見送り")
+                break
+            res = self._fetch(sym)
+            ex = res.get("PrimaryExchange") if isinstance(res, dict) else None
+            if not isinstance(ex, int) or isinstance(ex, bool):
+                logger.warning(f"優先市場を解決できません: {sym} {res}")
+                continue
+            if sym in self._map and int(self._map[sym]["exchange"]) != ex:
+                logger.info(f"優先市場が変わりました: {sym} {self._map[sym]['exchange']} → {ex}")
+            self._map[sym] = {"exchange": ex, "fetched_at": now}
+            n += 1
+        if n:
+            self._save()
+        return n
@@ -0,0 +1,237 @@
+from collections import deque
+from dataclasses import dataclass, field, asdict, fields
+from typing import Optional, Dict, Any, Deque
+import math
+import time
+
+# QueueTracker.history に残す件数
+HISTORY_LEN = 20
+
+
+def level_qty_at(board: Dict[str, Any], side: str, price: float, depth: int = 10) -> Optional[float]:
+    """板の side(Buy/Sell) 1〜depth 本目から price と一致する気配の数量を返す。無ければ None。"""
+    for i in range(1, depth + 1):
+        lv = board.get(f"{side}{i}") or {}
+        p = lv.get("Price")
+        if p is None:
+            continue
+        try:
+            if abs(float(p) - price) < 1e-9:
+                return float(lv.get("Qty") or 0.0)
+        except Exception:
+            continue
+    return None
+
+
+def flow_share(bid_flow_share: float, side: str = "Buy") -> float:
+    """約定のうち side(Buy/Sell) の気配を消化する割合（Bid 側が bid_flow_share、Ask 側は残り）。"""
+    share = bid_flow_share if side == "Buy" else 1.0 - bid_flow_share
+    return min(1.0, max(0.0, share))
+
+
+def initial_bid_flow(board: Dict[str, Any], bid_flow_share: float = 0.5, side: str = "Buy") -> float:
+    """
+    side(Buy/Sell) の気配の消化速度(株/秒)の初期推定。
+    OneSecValue(円/秒) を現在値で割って株数に直し、その側に当たる割合（flow_share）を掛ける。
+    """
+    osv = float(board.get("OneSecValue") or 0.0)
+    px = float(board.get("CurrentPrice") or (board.get(f"{side}1") or {}).get("Price") or 0.0)
+    if osv <= 0 or px <= 0:
+        return 0.0
+    return (osv / px) * flow_share(bid_flow_share, side)
+
+
+@dataclass
+class QueueTracker:
+    """
+    Buy1 に join した指値（side='Sell' なら Sell1 に join した売り指値）の
+    「自分より前に並んでいる数量」を板更新ごとに追跡し、約定までの ETA と一定時間内の約定確率を推定する。
+
+    - 発注時の Buy1.Qty を先行量(ahead)とし、自分はその最後尾に並んだとみなす。
+    - 以降の板で同値の数量が減った分だけ ahead を減らす（増えた分は自分より後ろ）。
+    - 消化速度(株/秒)は ahead の減少量と、同値での出来高増分の EWMA で推定する。
+    - Buy1 が自分の値段より下がった（売りなら Sell1 が上がった＝値段が食われた）場合は約定済みとみなす。
+      古い板や発注が板に載る前の板だった場合に備え、自分の値段以上（売りなら以下）に気配が戻ったら traded_through を戻す。
+    """
+    symbol: str
+    price: float
+    qty: float
+    ahead: float
+    rate: float = 0.0               # 推定消化速度 (株/秒)
+    ewma_alpha: float = 0.3
+    started_at: float = field(default_factory=time.time)
+    last_at: float = field(default_factory=time.time)
+    last_level_qty: Optional[float] = None
+    last_volume: Optional[float] = None
+    traded_through: bool = False
+    history: Deque[Dict[str, float]] = field(default_factory=lambda: deque(maxlen=HISTORY_LEN))
+    side: str = "Buy"               # 並んでいる気配（Buy / Sell）
+
+    def __post_init__(self) -> None:
+        # from_state() で list が渡された場合も件数の上限を保つ
+        if not isinstance(self.history, deque) or self.history.maxlen != HISTORY_LEN:
+            self.history = deque(self.history, maxlen=HISTORY_LEN)
+
+    @classmethod
+    def from_entry(cls, symbol: str, price: float, qty: float, board: Dict[str, Any],
+                   bid_flow_share: float = 0.5, now: Optional[float] = None, side: str = "Buy") -> "QueueTracker":
+        """発注直前（または直後）の板から追跡を開始する。"""
+        now = time.time() if now is None else now
+        level_qty = level_qty_at(board, side, price)
+        if level_qty is None:
+            # 自分の値段が板に無い（Buy1 / Sell1 を改善した）→ 先行量ゼロ
+            level_qty = 0.0
+        vol = board.get("TradingVolume")
+        return cls(
+            symbol=symbol,
+            price=float(price),
+            qty=float(qty),
+            ahead=float(level_qty),
+            rate=initial_bid_flow(board, bid_flow_share, side),
+            started_at=now,
+            last_at=now,
+            last_level_qty=float(level_qty),
+            last_volume=float(vol) if vol is not None else None,
+            side=side,
+        )
+
+    @classmethod
+    def from_plan(cls, plan: Dict[str, Any], qty: float, bid_flow_share: float = 0.5,
+                  now: Optional[float] = None) -> "QueueTracker":
+        """
+        decide_prices_scalp の plan(notes.bid_qty / one_sec_value) から追跡を開始する（追加の板取得なし）。
+        売り建ての plan（side='sell'）は sell_price と notes.ask_qty で Sell1 の並びを追う。
+        """
+        now = time.time() if now is None else now
+        notes = plan.get("notes") or {}
+        short = plan.get("side") == "sell"
+        price = float(plan.get("sell_price" if short else "buy_price") or 0.0)
+        osv = float(notes.get("one_sec_value") or 0.0)
+        side = "Sell" if short else "Buy"
+        rate = (osv / price) * flow_share(bid_flow_share, side) if price > 0 and osv > 0 else 0.0
+        ahead = float(notes.get("ask_qty" if short else "bid_qty") or 0.0)
+        return cls(
+            symbol=plan.get("target_symbol", ""),
+            price=price,
+            qty=float(qty),
+            ahead=ahead,
+            rate=rate,
+            started_at=now,
+            last_at=now,
+            last_level_qty=ahead,
+            side=side,
+        )
+
+    def update(self, board: Dict[str, Any], now: Optional[float] = None) -> None:
+        """板スナップショットを取り込み、先行量と消化速度を更新する。"""
+        now = time.time() if now is None else now
+        dt = max(1e-3, now - self.last_at)
+
+        level_qty = level_qty_at(board, self.side, self.price)
+        best = (board.get(f"{self.side}1") or {}).get("Price")
+        if best is not None:
+            through = (float(best) < self.price - 1e-9 if self.side == "Buy"
+                       else float(best) > self.price + 1e-9)
+            if through:
+                # 自分の値段より下に Buy1（売りなら上に Sell1）がある＝自分の気配は消化された
+                self.traded_through = True
+                self.ahead = 0.0
+            elif self.traded_through:
+                # 気配が自分の値段以上に戻った＝さっきの板が古かった。並び直しとみなして追跡を続ける
+                self.traded_through = False
+                self.ahead = max(0.0, level_qty - self.qty) if level_qty is not None else 0.0
+                self.last_level_qty = level_qty
+
+        consumed = 0.0
+        if level_qty is not None and self.last_level_qty is not None:
+            # 自分の注文分(qty)は ahead に含めないので、気配数量から差し引いて上限にする
+            others = max(0.0, level_qty - self.qty)
+            if others < self.ahead:
+                consumed = self.ahead - others
+                self.ahead = others
+        if level_qty is not None:
+            self.last_level_qty = level_qty
+
+        # 同値での出来高増分（取消による減少と区別するための補助シグナル）
+        vol = board.get("TradingVolume")
+        cur = board.get("CurrentPrice")
+        if vol is not None:
+            vol = float(vol)
+            if self.last_volume is not None and cur is not None and abs(float(cur) - self.price) < 1e-9:
+                consumed = max(consumed, vol - self.last_volume)
+            self.last_volume = vol
+
+        inst = consumed / dt
+        self.rate = self.ewma_alpha * inst + (1.0 - self.ewma_alpha) * self.rate
+        self.last_at = now
+        self.history.append({"t": now, "ahead": self.ahead, "rate": self.rate})
+
+    def eta_sec(self) -> float:
+        """自分の注文が全量約定するまでの推定秒数。"""
+        if self.traded_through:
+            return 0.0
+        if self.rate <= 0:
+            return float("inf")
+        return (self.ahead + self.qty) / self.rate
+
+    def fill_probability(self, horizon_sec: float) -> float:
+        """
+        horizon_sec 秒以内に全量約定する確率。
+        消化をポアソン到着とみなし P = 1 - exp(-horizon / ETA) で近似する。
+        """
+        if self.traded_through:
+            return 1.0
+        eta = self.eta_sec()
+        if math.isinf(eta) or horizon_sec <= 0:
+            return 0.0
+        return 1.0 - math.exp(-horizon_sec / max(eta, 1e-9))
+
+    def elapsed(self, now: Optional[float] = None) -> float:
+        now = time.time() if now is None else now
+        return now - self.started_at
+
+    def should_cancel(self, max_eta_sec: float, min_fill_prob: float, hard_timeout_sec: float,
+                      warmup_sec: float = 3.0, now: Optional[float] = None) -> Optional[str]:
+        """
+        取消すべきなら理由文字列、待つべきなら None を返す。
+        - hard_timeout_sec 超過（約定済みとみなしていても、注文が残っている限り取り消す）
+        - (warmup 後) hard_timeout_sec までの残り時間内の約定確率が min_fill_prob 未満
+        - (warmup 後) ETA が max_eta_sec 超
+        """
+        el = self.elapsed(now)
+        if el >= hard_timeout_sec:
+            return f"timeout {el:.1f}s >= {hard_timeout_sec:.1f}s"
+        if self.traded_through or el < warmup_sec:
+            return None
+        eta = self.eta_sec()
+        remaining = max(0.0, hard_timeout_sec - el)
+        prob = self.fill_probability(remaining)
+        if prob < min_fill_prob:
+            return f"fill_prob {prob:.2f} < {min_fill_prob:.2f} (eta={eta:.1f}s, ahead={self.ahead:.0f})"
+        if eta > max_eta_sec:
+            return f"eta {eta:.1f}s > {max_eta_sec:.1f}s (ahead={self.ahead:.0f})"
+        return None
+
+    def to_state(self) -> Dict[str, Any]:
+        """再起動後に from_state() で戻せる状態（history は直近分のみ）。"""
+        d = asdict(self)
+        d["history"] = list(d["history"])
+        return d
+
+    @classmethod
+    def from_state(cls, d: Dict[str, Any]) -> "QueueTracker":
+        known = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in d.items() if k in known})
+
+    def snapshot(self) -> Dict[str, Any]:
+        """ログ/保存用の状態。"""
+        eta = self.eta_sec()
+        return {
+            "symbol": self.symbol,
+            "price": self.price,
+            "qty": self.qty,
+            "ahead": self.ahead,
+            "rate": round(self.rate, 3),
+            "eta_sec": None if math.isinf(eta) else round(eta, 2),
+            "traded_through": self.traded_through,
+        }
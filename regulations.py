@@ -0,0 +1,170 @@
+"""
+規制情報（/regulations）とプレミアム料（/margin/marginpremium）の先読みキャッシュ。
+
+- 取引時間帯の開始前（trade_daemon のウォームアップ）にユニバース全体を取得し、
+  以降は regulation_refresh_sec ごとに古くなった銘柄だけを低優先度で取り直す。
+- 発注経路は blocked() / premium_cost() でメモリ上の値だけを見る（API は呼ばない）。
+  未取得の銘柄は「規制なし・プレミアム料なし」として扱う。
+  MarginPremiumType が null の銘柄は一般信用（デイトレ）の非取扱なので、premium_cost() は None（見送り）を返す。
+
+規制（RegulationsInfo の各要素）:
+  Product … 0:全対象 1:現物 2:信用新規（制度） 3:信用新規（一般） 4:新規売り 5:信用新規（一般・デイトレ）
+  Side    … 0:全対象 1:売 2:買
+  Level   … 1:警告 2:エラー（発注不可）
+  LimitStartDay / LimitEndDay … 'YYYY/MM/DD HH:MM' の適用期間
+"""
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Iterable
+import logging
+import time
+
+from const import regulation_refresh_sec
+from kabusapi_regulations import get_regulations
+from kabusapi_marginpremium import get_margin_premium
+
+logger = logging.getLogger(__name__)
+
+# 発注の種類 → 該当する Product
+PRODUCTS = {
+    "cash": {0, 1},
+    "margin": {0, 2, 3, 4, 5},       # 信用新規
+    "margin_day": {0, 3, 4, 5},      # 一般信用（デイトレ）新規
+}
+SIDES = {"sell": {0, 1}, "buy": {0, 2}}
+PRODUCT_SHORT = 4                    # 新規売り（売り建てにだけ掛かる）
+
+LEVEL_WARNING = 1
+LEVEL_ERROR = 2
+
+
+def _parse_day(s: Any) -> Optional[datetime]:
+    if not s:
+        return None
+    for fmt in ("%Y/%m/%d %H:%M", "%Y/%m/%d", "%Y-%m-%dT%H:%M:%S"):
+        try:
+            return datetime.strptime(str(s), fmt)
+        except ValueError:
+            continue
+    return None
+
+
+@dataclass
+class Regulation:
+    product: int
+    side: int
+    level: int
+    reason: str = ""
+    start: Optional[datetime] = None
+    end: Optional[datetime] = None
+
+    @classmethod
+    def from_api(cls, r: Dict[str, Any]) -> "Regulation":
+        return cls(product=int(r.get("Product") or 0), side=int(r.get("Side") or 0),
+                   level=int(r.get("Level") or 0), reason=str(r.get("Reason") or ""),
+                   start=_parse_day(r.get("LimitStartDay")), end=_parse_day(r.get("LimitEndDay")))
+
+    def applies(self, product: str, side: str, now: datetime) -> bool:
+        if self.product not in PRODUCTS[product] or self.side not in SIDES[side]:
+            return False
+        if self.product == PRODUCT_SHORT and side != "sell":
+            return False
+        if self.start is not None and now < self.start:
+            return False
+        return self.end is None or now <= self.end
+
+
+@dataclass
+class SymbolRules:
+    symbol: str
+    regulations: List[Regulation] = field(default_factory=list)
+    # 'GeneralMargin' / 'DayTrade' → {'type': MarginPremiumType, 'premium': 1株あたりの料金}
+    premiums: Dict[str, Dict[str, Optional[float]]] = field(default_factory=dict)
+    fetched_at: float = 0.0
+
+
+class RegulationService:
+    def __init__(self, refresh_sec: float = regulation_refresh_sec,
+                 fetch_regulations=get_regulations, fetch_premium=get_margin_premium, budget=None,
+                 exchanges=None):
+        self.refresh_sec = refresh_sec
+        self._fetch_regulations = fetch_regulations
+        self._fetch_premium = fetch_premium
+        self.budget = budget   # api_budget.ApiBudget（定期の取り直しは低優先度）
+        self.exchanges = exchanges   # primary_exchange.ExchangeResolver（exchange 省略時の市場）
+        self._rules: Dict[str, SymbolRules] = {}
+
+    def _load_one(self, symbol: str, exchange: int, now: float) -> Optional[SymbolRules]:
+        reg = self._fetch_regulations(f"{symbol}@{exchange}")
+        prem = self._fetch_premium(symbol)
+        if not isinstance(reg, dict) or "RegulationsInfo" not in reg:
+            logger.warning(f"規制情報を取得できません: {symbol}@{exchange} {reg}")
+            return None
+        rules = SymbolRules(symbol=symbol, fetched_at=now,
+                            regulations=[Regulation.from_api(r) for r in reg.get("RegulationsInfo") or []])
+        if isinstance(prem, dict):
+            for kind in ("GeneralMargin", "DayTrade"):
+                p = prem.get(kind) or {}
+                v = p.get("MarginPremium")
+                rules.premiums[kind] = {"type": p.get("MarginPremiumType"),
+                                        "premium": float(v) if isinstance(v, (int, float)) else None}
+        self._rules[symbol] = rules
+        return rules
+
+    def refresh(self, symbols: Iterable[str], exchange: Optional[int] = None, now: Optional[float] = None,
+                low_priority: bool = True) -> int:
+        """
+        未取得・refresh_sec 以上古い銘柄を取り直し、取得できた数を返す。
+        low_priority なら残り枠が無い時点で次回に回し、そうでなければ枠が空くまで待つ（時間帯の開始前）。
+        """
+        now = time.time() if now is None else now
+        stale = [str(s) for s in symbols
+                 if now - (self._rules[str(s)].fetched_at if str(s) in self._rules else 0.0) >= self.refresh_sec]
+        n = 0
+        for i, sym in enumerate(stale):
+            # 1銘柄あたり /regulations と /margin/marginpremium の2回
+            if self.budget is not None and low_priority and not self.budget.allow("info", n=2, low_priority=True):
+                logger.info(f"情報系APIの残り枠が少ないため規制情報の取得を {len(stale) - i} 銘柄見送り")
+                break
+            while self.budget is not None and not low_priority and not self.budget.allow("info", n=2):
+                time.sleep(max(self.budget.wait("info"), 0.01))
+            ex = exchange if exchange is not None else (self.exchanges.exchange(sym) if self.exchanges else 1)
+            if self._load_one(sym, ex, now) is not None:
+                n += 1
+        return n
+
+    # --- 発注経路（メモリのみ） ---
+    def get(self, symbol: str) -> Optional[SymbolRules]:
+        return self._rules.get(str(symbol))
+
+    def blocked(self, symbol: str, side: str, product: str = "cash",
+                now: Optional[datetime] = None) -> Optional[str]:
+        """発注不可（Level=エラー）の規制があれば理由を、無ければ None を返す。警告はログのみ。"""
+        rules = self._rules.get(str(symbol))
+        if rules is None:
+            return None
+        now = now or datetime.now()
+        for r in rules.regulations:
+            if not r.applies(product, side, now):
+                continue
+            if r.level >= LEVEL_ERROR:
+                return r.reason or f"規制 (Product={r.product}, Side={r.side})"
+            logger.info(f"規制（警告）: {symbol} {side} {r.reason}")
+        return None
+
+    def premium_cost(self, symbol: str, qty: float, kind: str = "DayTrade") -> Optional[float]:
+        """
+        新規売り qty 株のプレミアム料（円）。料金なし・未取得なら 0、
+        非取扱（MarginPremiumType が null）や入札方式などで料金が未確定なら None（呼び出し側で見送りを判断する）。
+        """
+        rules = self._rules.get(str(symbol))
+        if rules is None or kind not in rules.premiums:
+            return 0.0
+        p = rules.premiums[kind]
+        if p.get("type") is None:
+            return None
+        if p.get("type") == 0:
+            return 0.0
+        if p.get("premium") is None:
+            return None
+        return float(p["premium"]) * float(qty)
@@ -0,0 +1,80 @@
+"""
+逆指値（ReverseLimitOrder）付きの発注内容を作る。取引所側で発動するので、発動を待つ間は板を見に行かない。
+
+- attach_reverse_limit() … 発注内容（現物・信用・先物・オプション）を FrontOrderType=30（逆指値）にして
+  ReverseLimitOrder を付ける。先物・オプション（TradeType がある発注内容）は TriggerSec を持たず、
+  発動後の注文は成行・指値のみ。
+- stop_exit() / take_profit_exit() … 建玉を守る損切り・利確の逆指値。建玉の売買から
+  以下/以上（UnderOver）を決める（買い建玉の損切りは「以下」、利確は「以上」。売り建玉は逆）。
+
+kabuステーション API には OCO が無く、同じ建玉に損切りと利確の注文を同時には置けない
+（売却可能数量・返済可能数量を取り合う）。TradeBot は exit_style='stop' のとき損切りを取引所側に置き、
+利確値に届いた板を見たら損切りを取り消して利確の指値に置き換える。
+"""
+from typing import Optional, Dict, Any
+from copy import deepcopy
+
+# TriggerSec（現物・信用のみ）
+TRIGGER_SYMBOL = 1      # 発注銘柄
+TRIGGER_NK225 = 2       # 日経平均
+TRIGGER_TOPIX = 3       # TOPIX
+
+# UnderOver
+UNDER = 1               # 以下
+OVER = 2                # 以上
+
+# AfterHitOrderType
+AFTER_MARKET = 1        # 成行
+AFTER_LIMIT = 2         # 指値
+AFTER_FUNARI = 3        # 不成（現物・信用のみ）
+
+FRONT_ORDER_TYPE_REVERSE_LIMIT = 30
+
+
+def _is_derivative(body: Dict[str, Any]) -> bool:
+    return "TradeType" in body
+
+
+def attach_reverse_limit(body: Dict[str, Any], trigger_price: float, under_over: int,
+                         after_hit_order_type: int = AFTER_MARKET, after_hit_price: float = 0,
+                         trigger_sec: int = TRIGGER_SYMBOL) -> Dict[str, Any]:
+    """body の写しを逆指値の発注内容にして返す（Price は 0、発動後の値段は after_hit_price）。"""
+    if under_over not in (UNDER, OVER):
+        raise ValueError(f"UnderOver は 1（以下）/ 2（以上）: {under_over}")
+    deriv = _is_derivative(body)
+    if after_hit_order_type not in ((AFTER_MARKET, AFTER_LIMIT) if deriv
+                                    else (AFTER_MARKET, AFTER_LIMIT, AFTER_FUNARI)):
+        raise ValueError(f"AfterHitOrderType が不正です: {after_hit_order_type}")
+    if after_hit_order_type == AFTER_MARKET:
+        after_hit_price = 0
+    elif not after_hit_price:
+        raise ValueError("発動後を指値・不成にするときは after_hit_price が必要です")
+    out = deepcopy(body)
+    out["FrontOrderType"] = FRONT_ORDER_TYPE_REVERSE_LIMIT
+    out["Price"] = 0
+    rl: Dict[str, Any] = {"TriggerPrice": trigger_price, "UnderOver": under_over,
+                          "AfterHitOrderType": after_hit_order_type, "AfterHitPrice": after_hit_price}
+    if not deriv:
+        rl = {"TriggerSec": trigger_sec, **rl}
+    out["ReverseLimitOrder"] = rl
+    return out
+
+
+def stop_exit(body: Dict[str, Any], position_side: str, stop_price: float,
+              limit_price: Optional[float] = None) -> Dict[str, Any]:
+    """
+    建玉 position_side（'buy' 買い建玉 / 'sell' 売り建玉）の損切り。買いは stop_price 以下、
+    売りは以上で発動し、成行（limit_price を指定すれば指値）で決済する。body は決済注文の発注内容。
+    """
+    return attach_reverse_limit(body, stop_price, UNDER if position_side == "buy" else OVER,
+                                AFTER_MARKET if limit_price is None else AFTER_LIMIT, limit_price or 0)
+
+
+def take_profit_exit(body: Dict[str, Any], position_side: str, take_profit_price: float,
+                     limit_price: Optional[float] = None) -> Dict[str, Any]:
+    """
+    建玉 position_side の利確。買いは take_profit_price 以上、売りは以下で発動し、
+    指値 limit_price（省略時は take_profit_price）で決済する。
+    """
+    return attach_reverse_limit(body, take_profit_price, OVER if position_side == "buy" else UNDER,
+                                AFTER_LIMIT, take_profit_price if limit_price is None else limit_price)
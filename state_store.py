@@ -0,0 +1,179 @@
+"""
+Bot の状態（銘柄別ポジション・直近約定価格など）をメモリに保持し、クラッシュに強い形で永続化する。
+
+- get/set はメモリ上の dict だけを操作する（ファイルには触れない）。
+- set された値は JSON 文字列にしてキューへ積み、バックグラウンドスレッドが
+  追記ジャーナル（1行1レコード, fsync 付き）へ書く。
+- ジャーナルが compact_every 行を超えたら、スナップショットを一時ファイル → os.replace で
+  原子的に書き換え、ジャーナルを空にする。
+- 起動時はスナップショットを読み、ジャーナルを順に再適用して復元する（途中で切れた最終行は捨てる）。
+"""
+from typing import Optional, Dict, Any
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import tempfile
+import threading
+
+from const import state_snapshot_path, state_journal_path
+
+logger = logging.getLogger(__name__)
+
+_DELETE = "__deleted__"
+
+
+def atomic_write_json(path: str, data: Any) -> None:
+    """一時ファイルに書いて fsync してから os.replace で置き換える。"""
+    d = os.path.dirname(os.path.abspath(path))
+    os.makedirs(d, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=".tmp_", dir=d)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except Exception:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+class StateStore:
+    def __init__(self, snapshot_path: str = state_snapshot_path, journal_path: str = state_journal_path,
+                 compact_every: int = 200, background: bool = True):
+        self.snapshot_path = snapshot_path
+        self.journal_path = journal_path
+        self.compact_every = max(1, int(compact_every))
+        self._data: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._journal_lines = 0
+        self._closed = False
+        self.recover()
+        self._thread: Optional[threading.Thread] = None
+        if background:
+            self._thread = threading.Thread(target=self._writer, name="state-store-writer", daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+
+    # --- 復元 ---
+    def recover(self) -> None:
+        data: Dict[str, Any] = {}
+        try:
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"状態スナップショットの読み込みに失敗しました: {e}")
+
+        n = 0
+        torn = False
+        try:
+            with open(self.journal_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        rec = json.loads(line)
+                    except ValueError:
+                        torn = True   # 書き込み途中で落ちた最終行
+                        break
+                    if rec.get("v") == _DELETE:
+                        data.pop(rec["k"], None)
+                    else:
+                        data[rec["k"]] = rec["v"]
+                    n += 1
+        except FileNotFoundError:
+            pass
+        self._data = data
+        self._journal_lines = n
+        if n:
+            logger.info(f"状態を復元しました（ジャーナル {n} 件を再適用）")
+        if torn:
+            # 壊れた行の後ろに追記しないよう、復元した状態でスナップショットを作り直す
+            self.compact()
+
+    # --- 参照/更新（メモリのみ） ---
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            return copy.deepcopy(self._data.get(key, default))
+
+    def set(self, key: str, value: Any) -> None:
+        line = json.dumps({"k": key, "v": value}, ensure_ascii=False)
+        with self._lock:
+            self._data[key] = json.loads(line)["v"]
+        self._enqueue(line)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+        self._enqueue(json.dumps({"k": key, "v": _DELETE}, ensure_ascii=False))
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return copy.deepcopy(self._data)
+
+    def _enqueue(self, line: str) -> None:
+        if self._thread is None:
+            self._append([line])
+        else:
+            self._queue.put(line)
+
+    # --- 永続化（バックグラウンド） ---
+    def _writer(self) -> None:
+        while True:
+            line = self._queue.get()
+            if line is None:
+                break
+            lines = [line]
+            # 溜まっている分はまとめて1回の fsync で書く
+            while True:
+                try:
+                    nxt = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if nxt is None:
+                    self._safe_append(lines)
+                    return
+                lines.append(nxt)
+            self._safe_append(lines)
+
+    def _safe_append(self, lines) -> None:
+        try:
+            self._append(lines)
+        except Exception as e:
+            logger.error(f"状態ジャーナルの書き込みに失敗しました: {e}")
+
+    def _append(self, lines) -> None:
+        d = os.path.dirname(os.path.abspath(self.journal_path))
+        os.makedirs(d, exist_ok=True)
+        with open(self.journal_path, "a", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._journal_lines += len(lines)
+        if self._journal_lines >= self.compact_every:
+            self.compact()
+
+    def compact(self) -> None:
+        """スナップショットを原子的に書き換え、ジャーナルを空にする。"""
+        atomic_write_json(self.snapshot_path, self.snapshot())
+        open(self.journal_path, "w").close()
+        self._journal_lines = 0
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout=5.0)
+        try:
+            self.compact()
+        except Exception as e:
+            logger.error(f"状態スナップショットの書き込みに失敗しました: {e}")
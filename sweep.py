@@ -0,0 +1,146 @@
+"""
+ScalpParams のパラメータ探索（グリッド / ランダム）をプロセスプールで並列実行する。
+
+- 各ワーカーは起動時に1回だけ backtest.load_board_log(lazy=True) で板ログを開き、以降の評価で使い回す。
+  .brd は np.memmap のまま持つので、配列はページキャッシュ上で全ワーカーが共有し、板 dict は再生中に
+  1件ずつ作る（ワーカーごとに全日分の dict を複製しない）。.jsonl は mmap で行単位に読んだ dict を持つ。
+- 損切り幅 sl_ticks は --use-stop のときだけ探索する（損切りなしの再生では結果が変わらないため）。
+- 1組のパラメータ = backtest.ReplayEngine で全日程を再生した結果1行。
+- 結果は指定の指標（既定: pnl）で降順に並べた表として出力する（--csv で保存も可）。
+
+使い方:
+  python sweep.py board_log/20250820 board_log/20250821 --procs 8
+  python sweep.py board_log/2025* --random 200 --seed 1 --csv sweep.csv
+"""
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import fields
+from typing import Optional, Dict, Any, List, Iterable, Sequence, Tuple, Union
+import argparse
+import csv
+import itertools
+import json
+import os
+import random
+import time
+
+from backtest import ReplayEngine, BoardRows, load_board_log
+from day_price_judge import ScalpParams
+
+# 既定の探索空間（リストは候補値、(lo, hi) タプルはランダム探索時の一様分布）
+DEFAULT_SPACE: Dict[str, Union[List[Any], Tuple[float, float]]] = {
+    "exit_eta_limit_sec": [10.0, 15.0, 20.0],
+    "depth_ratio_limit":  [1.5, 2.0, 3.0],
+    "max_queue_eta_sec":  [5.0, 10.0, 20.0],
+    "min_spread_ticks":   [1, 2],
+}
+# --use-stop のときだけ加える探索空間
+STOP_SPACE: Dict[str, Union[List[Any], Tuple[float, float]]] = {
+    "sl_ticks":           [1, 2],
+}
+
+# ワーカー内で1回だけ開く板データ
+_DAYS: List[Dict[str, BoardRows]] = []
+_ENGINE_KW: Dict[str, Any] = {}
+
+
+def _init_worker(day_dirs: Sequence[str], engine_kw: Dict[str, Any]) -> None:
+    global _DAYS, _ENGINE_KW
+    _DAYS = [load_board_log(d, lazy=True) for d in day_dirs]
+    _ENGINE_KW = dict(engine_kw)
+
+
+def _evaluate(overrides: Dict[str, Any]) -> Dict[str, Any]:
+    t0 = time.perf_counter()
+    engine = ReplayEngine(params=ScalpParams(**overrides), **_ENGINE_KW)
+    row = dict(overrides)
+    row.update(engine.run(_DAYS).summary())
+    row["elapsed_sec"] = round(time.perf_counter() - t0, 3)
+    return row
+
+
+def grid(space: Dict[str, Iterable[Any]]) -> List[Dict[str, Any]]:
+    """全組み合わせ。(lo, hi) の範囲指定はグリッドでは使えない。"""
+    keys = list(space)
+    ranges = [k for k in keys if isinstance(space[k], tuple)]
+    if ranges:
+        raise ValueError(f"範囲指定はランダム探索でのみ使えます: {ranges}")
+    return [dict(zip(keys, vals)) for vals in itertools.product(*(list(space[k]) for k in keys))]
+
+
+def random_search(space: Dict[str, Any], n: int, seed: Optional[int] = None) -> List[Dict[str, Any]]:
+    """リストからは一様に選び、(lo, hi) タプルは一様乱数（int 同士なら整数）で n 組生成する。"""
+    rng = random.Random(seed)
+    combos = []
+    for _ in range(n):
+        c = {}
+        for k, v in space.items():
+            if isinstance(v, tuple):
+                lo, hi = v
+                c[k] = rng.randint(lo, hi) if isinstance(lo, int) and isinstance(hi, int) else rng.uniform(lo, hi)
+            else:
+                c[k] = rng.choice(list(v))
+        combos.append(c)
+    return combos
+
+
+def _validate(space: Dict[str, Any]) -> None:
+    names = {f.name for f in fields(ScalpParams)}
+    unknown = [k for k in space if k not in names]
+    if unknown:
+        raise ValueError(f"ScalpParams に無い項目です: {unknown}")
+
+
+def run_sweep(day_dirs: Sequence[str], combos: List[Dict[str, Any]], processes: Optional[int] = None,
+              sort_by: str = "pnl", **engine_kw) -> List[Dict[str, Any]]:
+    """combos を並列に評価し、sort_by の降順に並べた結果行を返す。"""
+    if combos:
+        _validate(combos[0])
+    with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker,
+                             initargs=(list(day_dirs), engine_kw)) as ex:
+        rows = list(ex.map(_evaluate, combos, chunksize=max(1, len(combos) // ((processes or os.cpu_count() or 1) * 4))))
+    rows.sort(key=lambda r: r.get(sort_by, 0), reverse=True)
+    return rows
+
+
+def format_table(rows: List[Dict[str, Any]], keys: List[str], top: int = 20) -> str:
+    cols = ["rank"] + keys + ["pnl", "fill_rate", "trades", "win_rate", "avg_hold_sec"]
+    lines = ["\t".join(cols)]
+    for i, r in enumerate(rows[:top], 1):
+        vals = [str(i)] + [f"{r[k]:.4g}" if isinstance(r[k], float) else str(r[k]) for k in keys]
+        vals += [str(r.get(c)) for c in cols[len(keys) + 1:]]
+        lines.append("\t".join(vals))
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="ScalpParams parameter sweep over recorded boards")
+    ap.add_argument("days", nargs="+", help="板ログの日付ディレクトリ")
+    ap.add_argument("--space", help="探索空間の JSON ファイル（省略時は DEFAULT_SPACE）")
+    ap.add_argument("--random", type=int, default=0, help="ランダム探索の試行数（0 ならグリッド）")
+    ap.add_argument("--seed", type=int, default=None)
+    ap.add_argument("--procs", type=int, default=None, help="プロセス数（既定: CPU 数）")
+    ap.add_argument("--sort", default="pnl", help="並べ替えに使う指標")
+    ap.add_argument("--use-stop", action="store_true", help="損切り(sl_ticks)を有効にして再生する")
+    ap.add_argument("--top", type=int, default=20)
+    ap.add_argument("--csv", help="全結果を書き出す CSV パス")
+    args = ap.parse_args()
+
+    space = dict(DEFAULT_SPACE, **STOP_SPACE) if args.use_stop else DEFAULT_SPACE
+    if args.space:
+        with open(args.space, "r", encoding="utf-8") as f:
+            # {"sl_ticks": [1, 2], "depth_ratio_limit": {"lo": 1.0, "hi": 3.0}} の形式
+            space = {k: ((v["lo"], v["hi"]) if isinstance(v, dict) else v) for k, v in json.load(f).items()}
+    if "sl_ticks" in space and not args.use_stop:
+        print("注意: sl_ticks は --use-stop なしでは結果に影響しません")
+    combos = random_search(space, args.random, args.seed) if args.random else grid(space)
+
+    t0 = time.perf_counter()
+    rows = run_sweep(args.days, combos, args.procs, args.sort, use_stop=args.use_stop)
+    print(format_table(rows, list(space), args.top))
+    print(f"\n{len(rows)} 通り / {len(args.days)} 日 を {time.perf_counter() - t0:.1f} 秒で評価")
+
+    if args.csv and rows:
+        with open(args.csv, "w", newline="", encoding="utf-8") as f:
+            w = csv.DictWriter(f, fieldnames=list(rows[0]))
+            w.writeheader()
+            w.writerows(rows)
@@ -0,0 +1,204 @@
+"""
+銘柄情報（/symbol）の日次キャッシュ。
+
+- 売買単位・呼値グループ（→ 呼値テーブル）・値幅制限（上限/下限）・銘柄名を、
+  1 取引日につき1銘柄1回だけ取得する。
+- 取得結果はメモリに持ち、<symbol_meta_dir>/<YYYYMMDD>.json にも書き出す
+  （同じ日のうちに再起動しても取り直さない）。日付が変わったら前日分は使わない。
+- prefetch() でユニバース全体をまとめて取得する。情報系 API の残り枠（api_budget）が
+  低優先度分に満たないときは残りを次回に回す。
+- clamp_price() / round_price() で発注価格を値幅制限内・呼値単位に丸める。
+"""
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Iterable, Tuple
+import bisect
+import json
+import logging
+import math
+import os
+import time
+
+from const import symbol_meta_dir
+from kabusapi_symbol import get_symbol
+from state_store import atomic_write_json
+
+logger = logging.getLogger(__name__)
+
+# 呼値グループ → [(この価格以下, 呼値)]（最後の要素は上限なし）
+TICK_TABLES: Dict[str, List[Tuple[float, float]]] = {
+    # 通常（TOPIX500 以外の株式）
+    "10000": [(3_000, 1), (5_000, 5), (30_000, 10), (50_000, 50), (300_000, 100), (500_000, 500),
+              (3_000_000, 1_000), (5_000_000, 5_000), (30_000_000, 10_000), (50_000_000, 50_000),
+              (math.inf, 100_000)],
+    # TOPIX500 構成銘柄
+    "10003": [(1_000, 0.1), (3_000, 0.5), (10_000, 1), (30_000, 5), (100_000, 10), (300_000, 50),
+              (1_000_000, 100), (3_000_000, 500), (10_000_000, 1_000), (30_000_000, 5_000),
+              (math.inf, 10_000)],
+    "10118": [(math.inf, 10)],                   # 日経225先物
+    "10119": [(math.inf, 5)],                    # 日経225mini
+    "10318": [(100, 1), (math.inf, 5)],          # 日経225オプション
+    "10706": [(math.inf, 0.25)],                 # ミニTOPIX先物
+    "10718": [(math.inf, 0.5)],                  # TOPIX先物
+}
+
+
+def tick_size(price: float, group: Optional[str]) -> Optional[float]:
+    """呼値グループと価格から呼値を返す（未知のグループなら None）。"""
+    table = TICK_TABLES.get(str(group)) if group is not None else None
+    if not table:
+        return None
+    i = bisect.bisect_left([ub for ub, _ in table], price)
+    return float(table[min(i, len(table) - 1)][1])
+
+
+@dataclass
+class SymbolMeta:
+    symbol: str
+    exchange: int
+    name: str = ""
+    unit: float = 100.0
+    upper_limit: Optional[float] = None
+    lower_limit: Optional[float] = None
+    price_range_group: Optional[str] = None
+    fetched_at: float = 0.0
+
+    @classmethod
+    def from_api(cls, symbol: str, exchange: int, res: Dict[str, Any], now: Optional[float] = None) -> "SymbolMeta":
+        def f(k):
+            v = res.get(k)
+            return float(v) if isinstance(v, (int, float)) else None
+        return cls(
+            symbol=str(symbol),
+            exchange=int(exchange),
+            name=str(res.get("SymbolName") or res.get("DisplayName") or ""),
+            unit=f("TradingUnit") or 100.0,
+            upper_limit=f("UpperLimit"),
+            lower_limit=f("LowerLimit"),
+            price_range_group=str(res["PriceRangeGroup"]) if res.get("PriceRangeGroup") else None,
+            fetched_at=time.time() if now is None else now,
+        )
+
+    def tick_at(self, price: float) -> Optional[float]:
+        return tick_size(price, self.price_range_group)
+
+    def round_price(self, price: float, side: str) -> float:
+        """呼値単位に丸める（買いは切り下げ、売りは切り上げ。呼値が不明ならそのまま）。"""
+        tick = self.tick_at(price)
+        if not tick:
+            return price
+        n = price / tick
+        n = math.floor(n + 1e-9) if side == "buy" else math.ceil(n - 1e-9)
+        return round(n * tick, 6)
+
+    def clamp_price(self, price: float) -> float:
+        """値幅制限（ストップ高/安）の範囲に収める。"""
+        if self.upper_limit is not None and price > self.upper_limit:
+            return self.upper_limit
+        if self.lower_limit is not None and price < self.lower_limit:
+            return self.lower_limit
+        return price
+
+
+class SymbolMetaService:
+    def __init__(self, root: str = symbol_meta_dir, fetch=get_symbol, budget=None, exchanges=None):
+        self.root = root
+        self._fetch = fetch
+        self.budget = budget   # api_budget.ApiBudget（prefetch を低優先度で行う）
+        self.exchanges = exchanges   # primary_exchange.ExchangeResolver（exchange 省略時の市場）
+        self.day = ""
+        self._meta: Dict[str, SymbolMeta] = {}
+        self._roll()
+
+    @staticmethod
+    def _today() -> str:
+        return datetime.now().strftime("%Y%m%d")
+
+    def path_for(self, day: str) -> str:
+        return os.path.join(self.root, f"{day}.json")
+
+    def _roll(self) -> None:
+        """日付が変わっていれば当日のファイルを読み直す（前日分は捨てる）。"""
+        day = self._today()
+        if day == self.day:
+            return
+        self.day = day
+        self._meta = {}
+        try:
+            with open(self.path_for(day), "r", encoding="utf-8") as f:
+                for key, d in json.load(f).items():
+                    self._meta[key] = SymbolMeta(**d)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"銘柄情報キャッシュの読み込みに失敗しました: {e}")
+        if self._meta:
+            logger.info(f"銘柄情報キャッシュ {len(self._meta)} 銘柄を読み込みました ({day})")
+
+    def _save(self) -> None:
+        try:
+            atomic_write_json(self.path_for(self.day), {k: asdict(m) for k, m in self._meta.items()})
+        except Exception as e:
+            logger.warning(f"銘柄情報キャッシュの書き込みに失敗しました: {e}")
+
+    @staticmethod
+    def _key(symbol: str, exchange: int) -> str:
+        return f"{symbol}@{exchange}"
+
+    def _ex(self, symbol: str, exchange: Optional[int]) -> int:
+        if exchange is not None:
+            return exchange
+        return self.exchanges.exchange(symbol) if self.exchanges is not None else 1
+
+    def _load_one(self, symbol: str, exchange: int) -> Optional[SymbolMeta]:
+        res = self._fetch(self._key(symbol, exchange))
+        if not isinstance(res, dict) or not res.get("Symbol"):
+            logger.warning(f"銘柄情報を取得できません: {symbol}@{exchange} {res}")
+            return None
+        m = SymbolMeta.from_api(symbol, exchange, res)
+        self._meta[self._key(symbol, exchange)] = m
+        return m
+
+    # --- 参照 ---
+    def cached(self, symbol: str, exchange: Optional[int] = None) -> Optional[SymbolMeta]:
+        """メモリ上の情報だけを返す（API は呼ばない）。"""
+        self._roll()
+        return self._meta.get(self._key(str(symbol), self._ex(symbol, exchange)))
+
+    def get(self, symbol: str, exchange: Optional[int] = None) -> Optional[SymbolMeta]:
+        """当日の情報を返す。無ければ取得して保存する。"""
+        m = self.cached(symbol, exchange)
+        if m is None:
+            m = self._load_one(str(symbol), self._ex(symbol, exchange))
+            if m is not None:
+                self._save()
+        return m
+
+    def prefetch(self, symbols: Iterable[str], exchange: Optional[int] = None, interval: float = 0.0) -> int:
+        """未取得の銘柄をまとめて取得し、取得できた数を返す（残り枠が無ければ次回に回す）。"""
+        self._roll()
+        missing = [str(s) for s in symbols if self._key(str(s), self._ex(s, exchange)) not in self._meta]
+        n = 0
+        for i, sym in enumerate(missing):
+            if self.budget is not None and not self.budget.allow("info", low_priority=True):
+                logger.info(f"情報系APIの残り枠が少ないため銘柄情報の取得を {len(missing) - i} 銘柄見送り")
+                break
+            if i and interval > 0:
+                time.sleep(interval)
+            if self._load_one(sym, self._ex(sym, exchange)) is not None:
+                n += 1
+        if n:
+            self._save()
+        return n
+
+    # --- 発注価格 ---
+    def clamp_price(self, symbol: str, price: float, side: str, exchange: Optional[int] = None) -> float:
+        """値幅制限内に収め、呼値単位に丸めた価格を返す（情報が無ければそのまま）。"""
+        m = self.cached(symbol, exchange)
+        if m is None:
+            return price
+        px = m.clamp_price(m.round_price(price, side))
+        if px != price:
+            logger.info(f"発注価格を補正: {symbol} {side} {price} → {px} "
+                        f"(呼値={m.tick_at(price)}, 値幅={m.lower_limit}〜{m.upper_limit})")
+        return px
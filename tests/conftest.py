@@ -0,0 +1,6 @@
+import os
+import sys
+
+# const は import 時に API パスワードを環境変数から読む（テストでは API に接続しない）
+os.environ.setdefault("PRODUCTION_API_PASSWORD", "test")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
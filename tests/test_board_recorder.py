@@ -0,0 +1,134 @@
+import os
+import struct
+import threading
+
+import numpy as np
+import pytest
+
+from board_recorder import (BoardRecorder, BoardRecordWriter, BoardLogReader, BOARD_DTYPE_V1, HEADER_SIZE, MAGIC,
+                            encode_board, open_day)
+from day_price_judge import _one_sec_value
+
+
+def _board(**kw):
+    b = {
+        "Symbol": "6740",
+        "CurrentPrice": 101.0,
+        "CurrentPriceTime": "2025-08-20T13:01:33+09:00",
+        "TradingVolume": 1_250_000.0,
+        "TradingVolumeTime": "2025-08-20T13:01:30+09:00",
+        "TradingValue": 126_000_000.0,
+        "VWAP": 100.8,
+        "Sell1": {"Price": 102.0, "Qty": 3000.0},
+        "Buy1": {"Price": 101.0, "Qty": 5000.0},
+        "Buy2": {"Price": 100.0, "Qty": 8000.0},
+    }
+    b.update(kw)
+    return b
+
+
+def _round_trip(tmp_path, boards, ts=1755662493.0):
+    rec = BoardRecorder(root=str(tmp_path))
+    for i, b in enumerate(boards):
+        rec.record(b, ts + i)
+    rec.close()
+    (day,) = os.listdir(tmp_path)
+    return open_day(os.path.join(tmp_path, day))["6740"]
+
+
+def test_round_trip_restores_prices_and_times(tmp_path):
+    live = _board()
+    reader = _round_trip(tmp_path, [live])
+    assert len(reader) == 1
+    out = reader.board(0)
+    assert out["_ts"] == pytest.approx(1755662493.0)
+    assert out["CurrentPriceTime"] == live["CurrentPriceTime"]
+    assert out["TradingVolumeTime"] == live["TradingVolumeTime"]
+    assert out["Buy1"] == live["Buy1"] and out["Buy2"] == live["Buy2"] and out["Sell1"] == live["Sell1"]
+    assert "Sell2" not in out and "OneSecValue" not in out
+
+
+def test_round_trip_keeps_one_sec_value_estimate(tmp_path):
+    # OneSecValue が無い板は TradingValue / 当日経過秒 で近似する。往復で経過秒が失われてはいけない
+    live = _board()
+    out = _round_trip(tmp_path, [live]).board(0)
+    assert _one_sec_value(out) == pytest.approx(_one_sec_value(live))
+    assert _one_sec_value(out) < 1e5
+
+
+def test_naive_times_are_read_as_jst(tmp_path):
+    out = _round_trip(tmp_path, [_board(CurrentPriceTime="2025-08-20T09:00:05", TradingVolumeTime=None)]).board(0)
+    assert out["CurrentPriceTime"] == "2025-08-20T09:00:05+09:00"
+    assert "TradingVolumeTime" not in out
+
+
+def test_partial_tail_is_ignored_and_truncated_on_append(tmp_path):
+    reader = _round_trip(tmp_path, [_board(), _board(CurrentPrice=102.0)])
+    path = reader.path
+    del reader
+    with open(path, "ab") as f:
+        f.write(b"\x01" * 10)
+    assert len(BoardLogReader(path)) == 2
+    rec = BoardRecorder(root=str(tmp_path))
+    rec.record(_board(CurrentPrice=103.0), 1755662500.0)
+    rec.close()
+    reader = BoardLogReader(path)
+    assert [b["CurrentPrice"] for b in reader.to_boards()] == [101.0, 102.0, 103.0]
+
+
+def test_reads_version_1_files(tmp_path):
+    rec = np.zeros(1, dtype=BOARD_DTYPE_V1)
+    new = encode_board(_board(), 1755662493.0)
+    for name in BOARD_DTYPE_V1.names:
+        rec[name] = new[name]
+    path = tmp_path / "6740.brd"
+    head = MAGIC + struct.pack("<II", 1, BOARD_DTYPE_V1.itemsize)
+    path.write_bytes(head + b"\0" * (HEADER_SIZE - len(head)) + rec.tobytes())
+    out = BoardLogReader(str(path)).board(0)
+    assert out["CurrentPriceTime"] == "2025-08-20T13:01:33+09:00"
+    assert "TradingVolumeTime" not in out
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "x.brd"
+    path.write_bytes(b"JUNK" + b"\0" * 60)
+    with pytest.raises(ValueError):
+        BoardLogReader(str(path))
+
+
+def test_to_boards_matches_board(tmp_path):
+    boards = [_board(CurrentPrice=100.0 + i, Buy1={"Price": 100.0 + i, "Qty": 1000.0 + i}) for i in range(7)]
+    reader = _round_trip(tmp_path, boards)
+    assert list(reader.to_boards(chunk=3)) == [reader.board(i) for i in range(len(reader))]
+    assert list(reader) == list(reader.to_boards())
+
+
+def test_writer_records_in_background(tmp_path):
+    w = BoardRecordWriter(BoardRecorder(root=str(tmp_path), flush_every=1000))
+    for i in range(50):
+        w.put(_board(CurrentPrice=100.0 + i), 1755662493.0 + i)
+    w.close()
+    assert w.dropped == 0
+    (day,) = os.listdir(tmp_path)
+    reader = open_day(os.path.join(tmp_path, day))["6740"]
+    assert [b["CurrentPrice"] for b in reader] == [100.0 + i for i in range(50)]
+
+
+def test_writer_drops_when_queue_is_full(tmp_path):
+    rec = BoardRecorder(root=str(tmp_path))
+    gate = threading.Event()
+    original = rec.record
+
+    def slow(board, ts=None):
+        gate.wait()
+        original(board, ts)
+
+    rec.record = slow
+    w = BoardRecordWriter(rec, max_queue=2)
+    for i in range(10):
+        w.put(_board(), 1755662493.0 + i)
+    assert w.dropped > 0
+    gate.set()
+    w.close()
+    (day,) = os.listdir(tmp_path)
+    assert len(open_day(os.path.join(tmp_path, day))["6740"]) == 10 - w.dropped
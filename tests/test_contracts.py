@@ -0,0 +1,66 @@
+from datetime import date
+
+import pytest
+
+from contracts import ContractResolver, contract_months, last_trading_day, sq_date, weekly_series
+
+
+def test_sq_is_second_friday_and_last_trading_day_is_the_day_before():
+    assert sq_date(202612) == date(2026, 12, 11)
+    assert sq_date(202605) == date(2026, 5, 8)     # 1日が金曜日
+    assert last_trading_day(202612) == date(2026, 12, 10)
+    assert last_trading_day(202606) == date(2026, 6, 11)
+    assert sq_date(202608) == date(2026, 8, 14)    # 1日が土曜日
+
+@pytest.mark.parametrize("today, expected", [
+    (date(2026, 10, 19), [202612, 202703]),
+    (date(2026, 12, 10), [202612, 202703]),   # 最終取引日までは期近のまま
+    (date(2026, 12, 11), [202703, 202706]),   # SQ 日に乗り換え
+    (date(2026, 12, 31), [202703, 202706]),
+    (date(2027, 1, 4), [202703, 202706]),
+])
+def test_quarterly_contract_months_roll_after_last_trading_day(today, expected):
+    assert contract_months("NK225", today) == expected
+
+
+def test_monthly_contract_months_and_roll_days():
+    assert contract_months("NK225mini", date(2026, 10, 8)) == [202610, 202611]
+    assert contract_months("NK225mini", date(2026, 10, 9)) == [202611, 202612]
+    # 最終取引日（10/8 木）の 2 営業日前（10/6）を過ぎたら乗り換える
+    assert contract_months("NK225mini", date(2026, 10, 6), roll_days=2) == [202610, 202611]
+    assert contract_months("NK225mini", date(2026, 10, 7), roll_days=2) == [202611, 202612]
+
+
+def test_weekly_series_skips_monthly_sq_week():
+    # 2026/11 の金曜日: 6日（第1週）, 13日（第2週 = 月次 SQ）, 20日（第3週）
+    assert weekly_series(date(2026, 11, 5)) == [(202611, 1, date(2026, 11, 6)), (202611, 3, date(2026, 11, 20))]
+    # 満期の金曜日当日は最終取引日（前営業日）を過ぎている
+    assert weekly_series(date(2026, 11, 6)) == [(202611, 3, date(2026, 11, 20)), (202611, 4, date(2026, 11, 27))]
+
+
+def test_weekly_series_crosses_month_end():
+    assert weekly_series(date(2026, 10, 29)) == [(202610, 5, date(2026, 10, 30)), (202611, 1, date(2026, 11, 6))]
+    assert weekly_series(date(2026, 10, 30)) == [(202611, 1, date(2026, 11, 6)), (202611, 3, date(2026, 11, 20))]
+
+
+def test_resolver_caches_per_day(tmp_path):
+    calls = []
+
+    def fetch(code, month):
+        calls.append((code, month))
+        return {"Symbol": f"1{month}", "SymbolName": f"{code} {month}"}
+
+    today = date(2026, 12, 10)
+    r = ContractResolver(codes=["NK225"], root=str(tmp_path), fetch_future=fetch)
+    assert r.prepare(today) == 2
+    assert r.future("NK225", "front", today)["Symbol"] == "1202612"
+    assert r.future("NK225", "next", today)["Symbol"] == "1202703"
+
+    # 同じ日なら別のインスタンスでも当日ファイルから読み、API は呼ばない
+    r2 = ContractResolver(codes=["NK225"], root=str(tmp_path), fetch_future=fetch)
+    assert r2.prepare(today) == 0
+    assert len(calls) == 2
+    # 乗り換え後は未解決の次限月だけ取りに行く
+    assert r2.future("NK225", "next", date(2026, 12, 11)) is None
+    assert r2.prepare(date(2026, 12, 11)) == 2
+    assert r2.future("NK225", "front", date(2026, 12, 11))["Symbol"] == "1202703"
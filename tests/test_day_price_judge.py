@@ -0,0 +1,54 @@
+from day_price_judge import ScalpParams, decide_prices_scalp, decide_prices_scalp_short
+
+P = ScalpParams(max_queue_eta_sec=1e9)
+
+
+def _board(**kw):
+    b = {"Symbol": "6740", "CurrentPrice": 100.0, "OneSecValue": 1_000_000.0,
+         "AskPrice": 101.0, "BidPrice": 100.0, "AskQty": 1000.0, "BidQty": 1000.0,
+         "Sell1": {"Price": 101.0, "Qty": 1000.0}, "Buy1": {"Price": 100.0, "Qty": 1000.0}}
+    b.update(kw)
+    return b
+
+
+def test_missing_level_price_falls_back_to_ask_bid_on_both_sides():
+    b = _board(Sell1={"Qty": 1000.0}, Buy1={"Qty": 1000.0})
+    long, short = decide_prices_scalp(b, P), decide_prices_scalp_short(b, P)
+    assert (long["buy_price"], long["sell_price"], long["stop_price"]) == (100.0, 101.0, 99.0)
+    assert (short["sell_price"], short["buy_price"], short["stop_price"]) == (101.0, 100.0, 102.0)
+
+
+def test_short_queue_eta_uses_ask_side_flow():
+    # OneSecValue 100万円/秒 ÷ 100円 = 1万株/秒。Bid 側 10%・Ask 側 90%
+    p = ScalpParams(queue_bid_flow_share=0.1, max_queue_eta_sec=0.5)
+    b = _board(CurrentPrice=100.0, Sell1={"Price": 101.0, "Qty": 4000.0}, Buy1={"Price": 100.0, "Qty": 4000.0})
+    assert decide_prices_scalp(b, p) is None                # 4000 / 1000 = 4 秒
+    short = decide_prices_scalp_short(b, p)
+    assert short["notes"]["queue_eta_sec"] == 0.44          # 4000 / 9000
+
+
+def _mirror(b, c=200.0):
+    """売り買いを入れ替えた板（価格を c を中心に反転、数量はそのまま）。"""
+    m = dict(b, AskPrice=c - b["BidPrice"], BidPrice=c - b["AskPrice"], AskQty=b["BidQty"], BidQty=b["AskQty"])
+    for i in (1, 2):
+        if f"Buy{i}" in b:
+            m[f"Sell{i}"] = {"Price": c - b[f"Buy{i}"]["Price"], "Qty": b[f"Buy{i}"]["Qty"]}
+        if f"Sell{i}" in b:
+            m[f"Buy{i}"] = {"Price": c - b[f"Sell{i}"]["Price"], "Qty": b[f"Sell{i}"]["Qty"]}
+    return m
+
+
+def test_short_plan_mirrors_long_plan():
+    p = ScalpParams(max_queue_eta_sec=1e9, exit_eta_limit_sec=1e9, sl_ticks=2, depth_ratio_limit=1.5)
+    for sell_qty, buy_qty in ((1000.0, 1000.0), (1400.0, 1000.0), (1600.0, 1000.0), (500.0, 0.0)):
+        b = _board(Sell1={"Price": 101.0, "Qty": sell_qty}, Buy1={"Price": 100.0, "Qty": buy_qty},
+                   Sell2={"Price": 102.0, "Qty": 300.0}, Buy2={"Price": 99.0, "Qty": 700.0})
+        long, short = decide_prices_scalp(b, p), decide_prices_scalp_short(_mirror(b), p)
+        assert (long is None) == (short is None)
+        if long is None:
+            continue
+        assert (long["side"], short["side"]) == ("buy", "sell")
+        assert short["sell_price"] == 200.0 - long["buy_price"]
+        assert short["buy_price"] == 200.0 - long["sell_price"]
+        assert short["stop_price"] == 200.0 - long["stop_price"]
+        assert short["notes"]["queue_eta_sec"] == long["notes"]["queue_eta_sec"]
@@ -0,0 +1,88 @@
+import pytest
+
+from hold_index import HoldIndex
+
+
+def _pos(eid, day, price, qty=100, side="2", hold_qty=0, symbol="6740", mtt=3):
+    return {"ExecutionID": eid, "Symbol": symbol, "Side": side, "LeavesQty": qty, "HoldQty": hold_qty,
+            "Price": price, "ExecutionDay": day, "Exchange": 1, "MarginTradeType": mtt}
+
+
+# A/B は古い日、C/D は新しい日。A と D は建値が同じ
+POSITIONS = [
+    _pos("E-A", 20260105, 100.0),
+    _pos("E-B", 20260105, 110.0),
+    _pos("E-C", 20260106, 90.0),
+    _pos("E-D", 20260106, 100.0),
+]
+
+
+def _index(positions=POSITIONS):
+    idx = HoldIndex("margin")
+    idx.load(positions)
+    return idx
+
+
+# 買建ては建値が低いほど損益が高い
+@pytest.mark.parametrize("order, expected", [
+    (0, "ABCD"),   # 日付の古い順 → 損益の高い順
+    (1, "BADC"),   # 日付の古い順 → 損益の低い順
+    (2, "CDAB"),   # 日付の新しい順 → 損益の高い順
+    (3, "DCBA"),   # 日付の新しい順 → 損益の低い順
+    (4, "CADB"),   # 損益の高い順 → 日付の古い順
+    (5, "CDAB"),   # 損益の高い順 → 日付の新しい順
+    (6, "BADC"),   # 損益の低い順 → 日付の古い順
+    (7, "BDAC"),   # 損益の低い順 → 日付の新しい順
+])
+def test_allocate_follows_close_position_order(order, expected):
+    idx = _index()
+    picked = [idx.allocate("6740", "2", 100, order=order)[0]["HoldID"] for _ in range(4)]
+    assert "".join(h[-1] for h in picked) == expected
+    assert idx.allocate("6740", "2", 100, order=order) is None
+
+
+def test_short_holds_rank_high_price_as_high_pnl():
+    idx = _index([_pos("E-A", 20260105, 100.0, side="1"), _pos("E-B", 20260105, 110.0, side="1")])
+    assert idx.allocate("6740", "1", 100, order=0) == [{"HoldID": "E-B", "Qty": 100.0}]
+
+
+def test_allocate_splits_and_never_double_allocates_across_orders():
+    idx = _index()
+    first = idx.allocate("6740", "2", 150, order=0)
+    assert first == [{"HoldID": "E-A", "Qty": 100.0}, {"HoldID": "E-B", "Qty": 50.0}]
+    # 別の順で選んでも、使い切った A と B の使用分は出てこない
+    second = idx.allocate("6740", "2", 200, order=1)
+    assert second == [{"HoldID": "E-B", "Qty": 50.0}, {"HoldID": "E-D", "Qty": 100.0},
+                      {"HoldID": "E-C", "Qty": 50.0}]
+    assert idx.available("6740", "2") == 50.0
+    assert idx.allocate("6740", "2", 100, order=4) is None   # 足りなければ何も割り当てない
+    assert idx.available("6740", "2") == 50.0
+
+
+def test_release_returns_holds_to_every_order():
+    idx = _index()
+    a = idx.allocate("6740", "2", 100, order=0)
+    idx.allocate("6740", "2", 100, order=4)   # C
+    idx.release(a)
+    assert idx.available("6740", "2") == 300.0
+    assert idx.allocate("6740", "2", 100, order=4) == [{"HoldID": "E-A", "Qty": 100.0}]
+    assert idx.allocate("6740", "2", 100, order=0) == [{"HoldID": "E-B", "Qty": 100.0}]
+
+
+def test_load_skips_held_quantity_and_other_margin_types():
+    idx = HoldIndex("margin", margin_trade_type=3)
+    n = idx.load([_pos("E-A", 20260105, 100.0, hold_qty=100), _pos("E-B", 20260105, 110.0, qty=300, hold_qty=100),
+                  _pos("E-C", 20260105, 120.0, mtt=1)])
+    assert n == 1
+    assert idx.available("6740", "2") == 200.0
+
+
+def test_close_order_builds_close_positions_body():
+    idx = _index()
+    body = idx.close_order("6740", "2", 150, price=101.0, order=0)
+    assert body["Side"] == "1"
+    assert body["Qty"] == 150
+    assert body["Price"] == 101.0
+    assert body["MarginTradeType"] == 3
+    assert body["ClosePositions"] == [{"HoldID": "E-A", "Qty": 100}, {"HoldID": "E-B", "Qty": 50}]
+    assert "ClosePositionOrder" not in body
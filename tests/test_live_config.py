@@ -0,0 +1,67 @@
+import os
+
+import pytest
+
+from live_config import ConfigWatcher, validate_config
+
+
+def test_valid_config_is_coerced():
+    cfg = validate_config({
+        "params": {"take_profit_yen": 2, "sl_ticks": 3.0, "min_1s_value_take": None},
+        "universe": {"symbols": [1757, "9973"], "price_max": 400, "max_symbols": 8},
+        "total_limit": 1000000,
+        "max_positions": 3,
+        "intervals": {"tick_sec": 1, "board_sec": 0},
+    })
+    assert cfg["params"] == {"take_profit_yen": 2.0, "sl_ticks": 3, "min_1s_value_take": None}
+    assert isinstance(cfg["params"]["sl_ticks"], int)
+    assert cfg["universe"] == {"symbols": ["1757", "9973"], "price_max": 400.0, "max_symbols": 8}
+    assert cfg["total_limit"] == 1000000.0
+    assert cfg["max_positions"] == 3
+    assert cfg["intervals"] == {"tick_sec": 1.0, "board_sec": 0.0}
+
+
+def test_empty_config_is_valid():
+    assert validate_config({}) == {"params": {}, "universe": {}, "intervals": {}}
+
+
+@pytest.mark.parametrize("raw", [
+    [],                                                      # オブジェクトでない
+    {"unknown": 1},                                          # 不明な項目
+    {"params": {"no_such_param": 1}},                        # ScalpParams に無い
+    {"params": {"sl_ticks": 1.5}},                           # 整数でない
+    {"params": {"sl_ticks": True}},                          # bool を数値に取り違え
+    {"params": {"detect_tick_from_board": 1}},               # bool が必要
+    {"params": {"tick": 0}},                                 # tick は正
+    {"params": {"take_profit_yen": -1}},
+    {"universe": {"symbols": []}},                           # 空のリスト
+    {"universe": {"price_min": 500, "price_max": 400}},
+    {"universe": {"max_symbols": 0}},
+    {"universe": {"refresh_sec": 0}},
+    {"universe": {"bogus": 1}},
+    {"total_limit": 0},
+    {"max_positions": -1},
+    {"intervals": {"tick_sec": 0}},
+    {"intervals": {"board_sec": -0.1}},
+    {"intervals": {"tick_sec": "1"}},
+    {"intervals": {"other_sec": 1}},
+])
+def test_invalid_config_raises(raw):
+    with pytest.raises(ValueError):
+        validate_config(raw)
+
+
+def test_watcher_returns_config_only_on_valid_change(tmp_path):
+    path = tmp_path / "live.json"
+    w = ConfigWatcher(str(path))
+    assert w.poll() is None   # ファイルが無ければ何もしない
+
+    path.write_text('{"max_positions": 2}')
+    assert w.poll()["max_positions"] == 2
+    assert w.poll() is None   # 変更なし
+
+    path.write_text('{"max_positions": -1}')
+    os.utime(path, (1, 1))
+    assert w.poll() is None
+    assert w.errors == 1
+    assert w.current["max_positions"] == 2
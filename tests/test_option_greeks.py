@@ -0,0 +1,43 @@
+import math
+
+import numpy as np
+
+from option_greeks import black76_greeks, black76_price, implied_vol, norm_cdf
+
+
+def test_norm_cdf_matches_erfc():
+    x = np.linspace(-40.0, 40.0, 2001)
+    ref = np.array([0.5 * math.erfc(-v / math.sqrt(2.0)) for v in x])
+    assert np.allclose(norm_cdf(x), ref, rtol=1e-13, atol=1e-16)
+    assert norm_cdf(np.array([-np.inf, np.inf])).tolist() == [0.0, 1.0]
+
+
+def test_put_call_parity():
+    F, K, T, r, s = 27000.0, np.array([26000.0, 27000.0, 28000.0]), 7 / 365, 0.001, 0.2
+    call = black76_price(F, K, T, r, s, True)
+    put = black76_price(F, K, T, r, s, False)
+    assert np.allclose(call - put, math.exp(-r * T) * (F - K), atol=1e-8)
+
+
+def test_implied_vol_round_trip():
+    F = 27000.0
+    K = np.array([25500.0, 26500.0, 27000.0, 27250.0, 28000.0, 29000.0])
+    T = np.array([2, 5, 7, 14, 30, 60]) / 365
+    sigma = np.array([0.35, 0.25, 0.18, 0.2, 0.22, 0.3])
+    is_call = np.array([False, False, True, True, True, True])
+    price = black76_price(F, K, T, 0.0, sigma, is_call)
+    iv = implied_vol(price, F, K, T, 0.0, is_call, tol=1e-8)
+    assert np.allclose(iv, sigma, atol=1e-6)
+    # 前回の IV を初期値に渡しても同じ解
+    assert np.allclose(implied_vol(price, F, K, T, 0.0, is_call, sigma0=sigma * 1.1, tol=1e-8), sigma, atol=1e-6)
+    g = black76_greeks(F, K, T, 0.0, iv, is_call)
+    assert np.allclose(g["price"], price, atol=1e-6)
+
+
+def test_implied_vol_unsolvable_is_nan():
+    F, K, T = 27000.0, np.array([26000.0, 28000.0, 27000.0, 27000.0]), 7 / 365
+    # 本質価値以下・時間価値ほぼゼロ・上限以上・満期切れ
+    price = np.array([999.0, 1e-8, 27000.0, 100.0])
+    T = np.array([T, T, T, 0.0])
+    iv = implied_vol(price, F, K, T, 0.0, True)
+    assert np.isnan(iv).all()
@@ -0,0 +1,107 @@
+from queue_model import QueueTracker, HISTORY_LEN, initial_bid_flow
+
+
+def _board(bid=100.0, bid_qty=1000.0, vol=10_000.0, cur=100.0, osv=0.0):
+    return {"Buy1": {"Price": bid, "Qty": bid_qty}, "Buy2": {"Price": bid - 1, "Qty": 500.0},
+            "Sell1": {"Price": bid + 1, "Qty": 800.0},
+            "TradingVolume": vol, "CurrentPrice": cur, "OneSecValue": osv}
+
+
+def _tracker(rate=0.0, ahead=1000.0):
+    t = QueueTracker.from_entry("6740", 100.0, 100, _board(bid_qty=ahead), now=0.0)
+    t.rate = rate
+    return t
+
+
+# 取消判定の既定値（ScalpParams と同じ）
+MAX_ETA, MIN_PROB, HARD = 10.0, 0.3, 30.0
+
+
+def test_waits_during_warmup():
+    t = _tracker(rate=0.0)
+    assert t.should_cancel(MAX_ETA, MIN_PROB, HARD, now=1.0) is None
+
+
+def test_cancels_when_eta_exceeds_limit():
+    t = _tracker(rate=10.0)       # (1000 + 100) / 10 = 110 秒
+    reason = t.should_cancel(MAX_ETA, MIN_PROB, HARD, now=5.0)
+    assert reason and reason.startswith("fill_prob")
+
+
+def test_keeps_fast_queue_past_max_eta():
+    # ETA が短ければ max_eta_sec を過ぎても確率判定で取り消さず、hard timeout まで待つ
+    t = _tracker(rate=1100.0)     # ETA 1 秒
+    assert t.should_cancel(MAX_ETA, MIN_PROB, HARD, now=15.0) is None
+    assert t.should_cancel(MAX_ETA, MIN_PROB, HARD, now=25.0) is None
+    assert t.should_cancel(MAX_ETA, MIN_PROB, HARD, now=30.0).startswith("timeout")
+
+
+def test_hard_timeout_applies_after_traded_through():
+    t = _tracker(rate=0.0)
+    t.update(_board(bid=99.0), now=2.0)
+    assert t.traded_through and t.eta_sec() == 0.0
+    assert t.should_cancel(MAX_ETA, MIN_PROB, HARD, now=10.0) is None
+    assert t.should_cancel(MAX_ETA, MIN_PROB, HARD, now=31.0).startswith("timeout")
+
+
+def test_traded_through_resets_when_level_returns():
+    t = _tracker(rate=0.0)
+    t.update(_board(bid=99.0), now=1.0)       # 古い板 / 発注前の板
+    assert t.traded_through
+    t.update(_board(bid=100.0, bid_qty=700.0), now=2.0)
+    assert not t.traded_through
+    assert t.ahead == 600.0                   # 自分の 100 株を除いた分
+    assert t.should_cancel(MAX_ETA, MIN_PROB, HARD, now=5.0) is not None
+
+
+def test_better_bid_also_resets():
+    t = _tracker()
+    t.update(_board(bid=99.0), now=1.0)
+    b = _board(bid=101.0)
+    b["Buy2"] = {"Price": 100.0, "Qty": 400.0}
+    t.update(b, now=2.0)
+    assert not t.traded_through and t.ahead == 300.0
+
+
+def test_ahead_shrinks_and_rate_rises_with_consumption():
+    t = _tracker(rate=0.0)
+    t.update(_board(bid_qty=600.0, vol=10_400.0), now=1.0)
+    assert t.ahead == 500.0
+    assert t.rate > 0.0
+
+
+def test_sell_side_mirrors_buy_side():
+    b = _board()
+    t = QueueTracker.from_entry("6740", 101.0, 100, b, now=0.0, side="Sell")
+    assert t.ahead == 800.0
+    up = _board(bid=101.0)                    # Sell1 = 102 > 101 → 自分の売り気配は消化された
+    t.update(up, now=1.0)
+    assert t.traded_through
+
+
+def test_history_is_bounded_and_survives_state_round_trip():
+    t = _tracker()
+    for i in range(HISTORY_LEN * 5):
+        t.update(_board(), now=float(i + 1))
+    assert len(t.history) == HISTORY_LEN
+    back = QueueTracker.from_state(t.to_state())
+    assert list(back.history) == list(t.history)
+    back.update(_board(), now=1000.0)
+    assert len(back.history) == HISTORY_LEN
+
+
+def test_from_plan_short_tracks_sell_side():
+    plan = {"target_symbol": "6740", "side": "sell", "sell_price": 101.0, "buy_price": 100.0,
+            "notes": {"ask_qty": 800.0, "one_sec_value": 202_000.0}}
+    t = QueueTracker.from_plan(plan, 100, 0.5, now=0.0)
+    assert t.side == "Sell" and t.price == 101.0 and t.ahead == 800.0
+    assert t.rate == 1000.0
+
+
+def test_initial_flow_splits_one_sec_value_between_sides():
+    b = _board(osv=100_000.0)
+    assert initial_bid_flow(b, 0.3) == 300.0
+    assert initial_bid_flow(b, 0.3, "Sell") == 700.0
+    assert QueueTracker.from_entry("6740", 101.0, 100, b, 0.3, now=0.0, side="Sell").rate == 700.0
+    plan = {"target_symbol": "6740", "side": "sell", "sell_price": 100.0, "notes": {"one_sec_value": 100_000}}
+    assert QueueTracker.from_plan(plan, 100, 0.3, now=0.0).rate == 700.0
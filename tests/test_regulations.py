@@ -0,0 +1,62 @@
+from datetime import datetime
+
+from regulations import RegulationService
+
+NOW = datetime(2025, 8, 20, 10, 0)
+
+
+def _service(regs, premium=None):
+    svc = RegulationService(fetch_regulations=lambda key: {"Symbol": key.split("@")[0], "RegulationsInfo": regs},
+                            fetch_premium=lambda sym: premium)
+    svc.refresh(["6740"], exchange=1, now=1755651600.0)
+    return svc
+
+
+def _reg(product, side, level=2, reason="規制"):
+    return {"Exchange": 1, "Product": product, "Side": side, "Reason": reason,
+            "LimitStartDay": "2025/08/01 00:00", "LimitEndDay": "2025/08/31 23:59", "Level": level}
+
+
+def test_short_sale_regulation_blocks_margin_short_only():
+    svc = _service([_reg(4, 1, reason="空売り規制")])
+    assert svc.blocked("6740", "sell", "margin_day", NOW) == "空売り規制"
+    assert svc.blocked("6740", "sell", "margin", NOW) == "空売り規制"
+    assert svc.blocked("6740", "buy", "margin_day", NOW) is None
+    assert svc.blocked("6740", "sell", "cash", NOW) is None
+
+
+def test_short_sale_regulation_with_side_all_does_not_block_buys():
+    svc = _service([_reg(4, 0)])
+    assert svc.blocked("6740", "sell", "margin_day", NOW)
+    assert svc.blocked("6740", "buy", "margin_day", NOW) is None
+
+
+def test_warning_and_expired_regulations_do_not_block():
+    svc = _service([_reg(0, 0, level=1), dict(_reg(0, 0), LimitEndDay="2025/08/10 15:00")])
+    assert svc.blocked("6740", "buy", "cash", NOW) is None
+
+
+def test_cash_regulation_blocks_cash():
+    svc = _service([_reg(1, 2)])
+    assert svc.blocked("6740", "buy", "cash", NOW)
+    assert svc.blocked("6740", "buy", "margin_day", NOW) is None
+
+
+def _premium(kind_type, value):
+    return {"Symbol": "6740", "GeneralMargin": {"MarginPremiumType": None, "MarginPremium": None},
+            "DayTrade": {"MarginPremiumType": kind_type, "MarginPremium": value}}
+
+
+def test_premium_cost():
+    assert _service([], _premium(0, None)).premium_cost("6740", 100) == 0.0
+    assert _service([], _premium(1, 0.5)).premium_cost("6740", 100) == 50.0
+    assert _service([], _premium(2, None)).premium_cost("6740", 100) is None
+
+
+def test_not_eligible_for_day_trade_margin():
+    assert _service([], _premium(None, None)).premium_cost("6740", 100) is None
+
+
+def test_unknown_symbol_or_missing_premium_is_free():
+    assert _service([], None).premium_cost("6740", 100) == 0.0
+    assert _service([]).premium_cost("9999", 100) == 0.0
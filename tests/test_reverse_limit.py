@@ -0,0 +1,54 @@
+import pytest
+
+from const import buy_obj, future_close_obj
+from reverse_limit import (AFTER_FUNARI, AFTER_LIMIT, AFTER_MARKET, OVER, UNDER, attach_reverse_limit,
+                           stop_exit, take_profit_exit)
+
+
+def test_equity_body_gets_trigger_sec_and_zero_price():
+    body = dict(buy_obj, Price=101.0)
+    out = attach_reverse_limit(body, 99.0, UNDER, AFTER_FUNARI, 98.0)
+    assert out["FrontOrderType"] == 30
+    assert out["Price"] == 0
+    assert out["ReverseLimitOrder"] == {"TriggerSec": 1, "TriggerPrice": 99.0, "UnderOver": UNDER,
+                                        "AfterHitOrderType": AFTER_FUNARI, "AfterHitPrice": 98.0}
+    assert body["Price"] == 101.0   # 元の発注内容は変えない
+
+
+def test_derivative_body_omits_trigger_sec_and_rejects_funari():
+    out = attach_reverse_limit(future_close_obj, 27000, UNDER)
+    assert "TriggerSec" not in out["ReverseLimitOrder"]
+    assert out["ReverseLimitOrder"]["AfterHitPrice"] == 0
+    with pytest.raises(ValueError):
+        attach_reverse_limit(future_close_obj, 27000, UNDER, AFTER_FUNARI, 26990)
+
+
+@pytest.mark.parametrize("under_over", [0, 3])
+def test_bad_under_over(under_over):
+    with pytest.raises(ValueError):
+        attach_reverse_limit(buy_obj, 100.0, under_over)
+
+
+@pytest.mark.parametrize("after", [0, 4])
+def test_bad_after_hit_order_type(after):
+    with pytest.raises(ValueError):
+        attach_reverse_limit(buy_obj, 100.0, UNDER, after, 100.0)
+
+
+@pytest.mark.parametrize("after", [AFTER_LIMIT, AFTER_FUNARI])
+def test_limit_after_hit_needs_price(after):
+    with pytest.raises(ValueError):
+        attach_reverse_limit(buy_obj, 100.0, UNDER, after)
+
+
+def test_market_after_hit_ignores_price():
+    out = attach_reverse_limit(buy_obj, 100.0, OVER, AFTER_MARKET, 123.0)
+    assert out["ReverseLimitOrder"]["AfterHitPrice"] == 0
+
+
+def test_stop_and_take_profit_direction_follow_position_side():
+    assert stop_exit(buy_obj, "buy", 99.0)["ReverseLimitOrder"]["UnderOver"] == UNDER
+    assert stop_exit(buy_obj, "sell", 101.0)["ReverseLimitOrder"]["UnderOver"] == OVER
+    tp = take_profit_exit(buy_obj, "buy", 102.0)["ReverseLimitOrder"]
+    assert (tp["UnderOver"], tp["AfterHitOrderType"], tp["AfterHitPrice"]) == (OVER, AFTER_LIMIT, 102.0)
+    assert take_profit_exit(buy_obj, "sell", 98.0)["ReverseLimitOrder"]["UnderOver"] == UNDER
@@ -0,0 +1,61 @@
+import json
+
+from state_store import StateStore
+
+
+def _store(tmp_path, **kw):
+    return StateStore(snapshot_path=str(tmp_path / "state.json"), journal_path=str(tmp_path / "state.jsonl"),
+                      background=False, **kw)
+
+
+def test_journal_is_replayed_on_restart(tmp_path):
+    s = _store(tmp_path)
+    s.set("pos:1757", {"qty": 100, "price": 95.0})
+    s.set("last:1757", 96.0)
+    s.set("last:1757", 97.0)
+    s.delete("pos:1757")
+    # close() しない（クラッシュ）→ スナップショットは無く、ジャーナルだけから戻る
+    assert not (tmp_path / "state.json").exists()
+
+    r = _store(tmp_path)
+    assert r.snapshot() == {"last:1757": 97.0}
+
+
+def test_torn_last_line_is_dropped_and_compacted(tmp_path):
+    s = _store(tmp_path)
+    s.set("a", 1)
+    s.set("b", [1, 2])
+    with open(tmp_path / "state.jsonl", "a", encoding="utf-8") as f:
+        f.write('{"k": "c", "v": ')   # 書き込み途中で落ちた最終行
+
+    r = _store(tmp_path)
+    assert r.snapshot() == {"a": 1, "b": [1, 2]}
+    # 壊れた行の後ろに追記しないよう、スナップショットに畳んでジャーナルを空にしている
+    assert (tmp_path / "state.jsonl").read_text() == ""
+    r.set("c", 3)
+    assert _store(tmp_path).snapshot() == {"a": 1, "b": [1, 2], "c": 3}
+
+
+def test_compaction_keeps_snapshot_and_journal_consistent(tmp_path):
+    s = _store(tmp_path, compact_every=3)
+    for i in range(7):
+        s.set(f"k{i}", i)
+    assert json.loads((tmp_path / "state.json").read_text()) == {f"k{i}": i for i in range(6)}
+    assert len((tmp_path / "state.jsonl").read_text().splitlines()) == 1
+    assert _store(tmp_path).snapshot() == {f"k{i}": i for i in range(7)}
+
+
+def test_get_returns_copies(tmp_path):
+    s = _store(tmp_path)
+    s.set("pos", {"qty": 100})
+    s.get("pos")["qty"] = 0
+    assert s.get("pos") == {"qty": 100}
+    assert s.get("missing", 5) == 5
+
+
+def test_background_writer_flushes_on_close(tmp_path):
+    s = StateStore(snapshot_path=str(tmp_path / "state.json"), journal_path=str(tmp_path / "state.jsonl"))
+    for i in range(50):
+        s.set("n", i)
+    s.close()
+    assert _store(tmp_path).get("n") == 49
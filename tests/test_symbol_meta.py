@@ -0,0 +1,60 @@
+import pytest
+
+from symbol_meta import SymbolMeta, tick_size
+
+
+def _meta(group="10000", upper=None, lower=None):
+    return SymbolMeta(symbol="6740", exchange=1, upper_limit=upper, lower_limit=lower, price_range_group=group)
+
+
+@pytest.mark.parametrize("price, group, tick", [
+    (3000, "10000", 1.0),       # 上限は「以下」
+    (3001, "10000", 5.0),
+    (50_000, "10000", 50.0),
+    (50_001, "10000", 100.0),
+    (1000, "10003", 0.1),
+    (1000.5, "10003", 0.5),
+    (1e9, "10003", 10_000.0),   # 最後の段は上限なし
+    (100, "10318", 1.0),
+    (105, "10318", 5.0),
+    (27000, "10119", 5.0),
+])
+def test_tick_size_boundaries(price, group, tick):
+    assert tick_size(price, group) == tick
+
+
+def test_unknown_group_has_no_tick():
+    assert tick_size(100, "99999") is None
+    assert tick_size(100, None) is None
+    assert _meta(group=None).round_price(123.4, "buy") == 123.4
+
+
+@pytest.mark.parametrize("price, group, buy, sell", [
+    (3002, "10000", 3000, 3005),       # 3000 超は 5 円刻み
+    (3000, "10000", 3000, 3000),       # 刻みちょうどは動かさない
+    (2999.5, "10000", 2999, 3000),
+    (999.95, "10003", 999.9, 1000.0),
+    (123.4, "10003", 123.4, 123.4),    # 123.4 / 0.1 の誤差で 1 刻みずれない
+    (1000.3, "10003", 1000.0, 1000.5),
+    (27003, "10119", 27000, 27005),
+])
+def test_round_price_buy_down_sell_up(price, group, buy, sell):
+    m = _meta(group)
+    assert m.round_price(price, "buy") == buy
+    assert m.round_price(price, "sell") == sell
+
+
+def test_clamp_price_to_limits():
+    m = _meta(upper=380.0, lower=280.0)
+    assert m.clamp_price(381.0) == 380.0
+    assert m.clamp_price(380.0) == 380.0
+    assert m.clamp_price(279.0) == 280.0
+    assert m.clamp_price(300.0) == 300.0
+    assert _meta().clamp_price(1e9) == 1e9
+
+
+def test_from_api():
+    m = SymbolMeta.from_api("6740", 1, {"DisplayName": "ジャパンディスプレイ", "TradingUnit": 100.0,
+                                        "UpperLimit": 30, "LowerLimit": 10, "PriceRangeGroup": "10000"}, now=1.0)
+    assert (m.name, m.unit, m.upper_limit, m.lower_limit, m.price_range_group) == \
+        ("ジャパンディスプレイ", 100.0, 30.0, 10.0, "10000")
@@ -0,0 +1,34 @@
+from datetime import datetime
+
+import const
+from trade_daemon import SessionCalendar, TradeDaemon
+
+
+def _params():
+    return (const.buy_order_params, const.sell_order_params, const.order_params, const.order_params_by_id)
+
+
+def test_roll_day_advances_updtime_in_shared_params():
+    daemon = TradeDaemon.__new__(TradeDaemon)   # roll_day は const の状態だけを見る
+    try:
+        const.refresh_order_params(datetime(2026, 10, 16, 15, 0))
+        held = const.buy_order_params   # 他モジュールが import した dict と同じもの
+        daemon.roll_day(datetime(2026, 10, 16, 23, 59))
+        assert const.today_start == "20261016000000"
+
+        daemon.roll_day(datetime(2026, 10, 19, 8, 50))
+        assert const.today_start == "20261019000000"
+        assert held["updtime"] == "20261019000000"
+        assert all(p["updtime"] == "20261019000000" for p in _params())
+    finally:
+        const.refresh_order_params()
+
+
+def test_session_calendar():
+    cal = SessionCalendar([("09:00", "11:30"), ("12:30", "15:00")])
+    assert cal.in_session(datetime(2026, 10, 19, 9, 0))
+    assert not cal.in_session(datetime(2026, 10, 19, 11, 30))
+    assert not cal.in_session(datetime(2026, 10, 17, 10, 0))   # 土曜日
+    assert cal.next_start(datetime(2026, 10, 19, 11, 45)) == datetime(2026, 10, 19, 12, 30)
+    assert cal.next_start(datetime(2026, 10, 16, 15, 30)) == datetime(2026, 10, 19, 9, 0)
+    assert cal.day_closed(datetime(2026, 10, 19, 15, 0))
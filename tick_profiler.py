@@ -0,0 +1,270 @@
+"""
+売買ループ（TradeBot.run）の tick 計測とプロファイリング。
+
+- フェーズ別の所要時間（壁時計）は常に記録する。直近 window tick の p50/p99/max を保持し、
+  tick が予算を超えたらフェーズ内訳を WARNING で出す。予算は tick(budget_sec=...) に渡した
+  TradeBot.tick_interval_sec（live_config で変えた間隔に追従する）。渡さなければ最後の値のまま
+  （初期値 const.tick_budget_sec）。
+- 制御ファイル（const.profile_control_path）を tick の先頭で stat し、更新されていれば
+  その内容に従って次の N tick をプロファイルする。Bot を再起動せずに切り替えられる。
+
+    {"mode": "sample", "ticks": 30, "interval_ms": 5}   … サンプリング（フェーズ別 folded スタック）
+    {"mode": "cprofile", "ticks": 30}                    … cProfile（フェーズごとに .prof を出力）
+    {"mode": "phases"}                                   … フェーズ別統計だけを書き出す
+    {"mode": "off"}                                      … 実行中のプロファイルを打ち切って書き出す
+
+出力は const.profile_dir 配下:
+  <日時>_sample.folded   … "tick;<フェーズ>;関数;関数... 件数"（flamegraph.pl / speedscope で開ける）
+  <日時>_cprofile/<フェーズ>.prof, summary.txt
+  <日時>_phases.json
+"""
+from collections import Counter, deque
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Deque
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+
+from const import profile_control_path, profile_dir, tick_budget_sec
+
+logger = logging.getLogger(__name__)
+
+TICK = "tick"
+
+
+def _pct(xs: List[float], q: float) -> float:
+    if not xs:
+        return 0.0
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(round(q * (len(xs) - 1))))]
+
+
+class _Sampler:
+    """対象スレッドのスタックを interval ごとに採取し、現在のフェーズを先頭に付けて数える。"""
+
+    def __init__(self, owner: "TickProfiler", thread_id: int, interval_sec: float):
+        self.owner = owner
+        self.thread_id = thread_id
+        self.interval_sec = max(0.001, interval_sec)
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="tick-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join(timeout=2.0)
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval_sec):
+            phases = list(self.owner._stack)
+            if not phases:
+                continue   # tick の外（sleep 中）は数えない
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None:
+                co = frame.f_code
+                names.append(f"{co.co_name} ({os.path.basename(co.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            names.reverse()
+            self.stacks[";".join(phases + names)] += 1
+
+
+class TickProfiler:
+    def __init__(self, control_path: str = profile_control_path, out_dir: str = profile_dir,
+                 budget_sec: float = tick_budget_sec, window: int = 300):
+        self.control_path = control_path
+        self.out_dir = out_dir
+        self.budget_sec = budget_sec
+        self.window = window
+        self.phase_ms: Dict[str, Deque[float]] = {}
+        self.ticks = 0
+        self.slow_ticks = 0
+        self._stack: List[str] = []
+        self._tick_ms: Dict[str, float] = {}
+        self._control_mtime: Optional[float] = None
+        # 実行中のプロファイル
+        self.mode: Optional[str] = None
+        self._remaining = 0
+        self._started = ""
+        self._sampler: Optional[_Sampler] = None
+        self._cprofs: Dict[str, cProfile.Profile] = {}
+        self._cp_active: Optional[cProfile.Profile] = None
+        self._poll_control(initial=True)
+
+    # --- 制御 ---
+    def _poll_control(self, initial: bool = False) -> None:
+        try:
+            mtime = os.stat(self.control_path).st_mtime
+        except OSError:
+            return
+        if mtime == self._control_mtime:
+            return
+        self._control_mtime = mtime
+        if initial:
+            return   # 起動前から置いてあるファイルには反応しない
+        try:
+            with open(self.control_path, "r", encoding="utf-8") as f:
+                ctl = json.load(f)
+        except Exception as e:
+            logger.warning(f"プロファイル制御ファイルを読めません: {e}")
+            return
+        mode = str(ctl.get("mode", "off"))
+        if mode == "phases":
+            self.dump_phases()
+        elif mode == "off":
+            if self.mode:
+                self.finish()
+        elif mode in ("sample", "cprofile"):
+            self.start(mode, int(ctl.get("ticks", 30)), float(ctl.get("interval_ms", 5)) / 1000.0)
+        else:
+            logger.warning(f"不明なプロファイルモード: {mode}")
+
+    def start(self, mode: str, ticks: int, interval_sec: float = 0.005) -> None:
+        """次の ticks 回分を mode（"sample" / "cprofile"）でプロファイルする。"""
+        if self.mode:
+            self.finish()
+        self.mode = mode
+        self._remaining = max(1, ticks)
+        self._started = datetime.now().strftime("%Y%m%d_%H%M%S")
+        if mode == "sample":
+            self._sampler = _Sampler(self, threading.get_ident(), interval_sec)
+            self._sampler.start()
+        else:
+            self._cprofs = {}
+        logger.info(f"プロファイル開始: mode={mode} ticks={self._remaining}")
+
+    def finish(self) -> Optional[str]:
+        """実行中のプロファイルを止めて書き出し、出力パスを返す。"""
+        mode, self.mode = self.mode, None
+        path = None
+        try:
+            os.makedirs(self.out_dir, exist_ok=True)
+            if mode == "sample" and self._sampler is not None:
+                self._sampler.stop()
+                path = os.path.join(self.out_dir, f"{self._started}_sample.folded")
+                with open(path, "w", encoding="utf-8") as f:
+                    for stack, n in self._sampler.stacks.most_common():
+                        f.write(f"{stack} {n}\n")
+            elif mode == "cprofile":
+                self._cp_switch(None)
+                path = os.path.join(self.out_dir, f"{self._started}_cprofile")
+                os.makedirs(path, exist_ok=True)
+                buf = io.StringIO()
+                for name, prof in self._cprofs.items():
+                    prof.dump_stats(os.path.join(path, f"{name}.prof"))
+                    buf.write(f"===== {name} =====\n")
+                    pstats.Stats(prof, stream=buf).sort_stats("cumulative").print_stats(25)
+                with open(os.path.join(path, "summary.txt"), "w", encoding="utf-8") as f:
+                    f.write(buf.getvalue())
+            self.dump_phases()
+        except Exception as e:
+            logger.error(f"プロファイルの書き出しに失敗しました: {e}")
+        finally:
+            self._sampler = None
+            self._cprofs = {}
+        if path:
+            logger.info(f"プロファイル出力: {path}")
+        return path
+
+    # --- cProfile はフェーズごとに別の Profile を有効化する ---
+    def _cp_switch(self, name: Optional[str]) -> None:
+        if self._cp_active is not None:
+            self._cp_active.disable()
+            self._cp_active = None
+        if name is not None and self.mode == "cprofile":
+            prof = self._cprofs.get(name)
+            if prof is None:
+                prof = self._cprofs[name] = cProfile.Profile()
+            prof.enable()
+            self._cp_active = prof
+
+    # --- 計測 ---
+    @contextmanager
+    def tick(self, budget_sec: Optional[float] = None):
+        """1 tick を囲む。フェーズ別時間を記録し、予算（budget_sec を渡せばその秒数）超過を警告する。"""
+        if budget_sec is not None:
+            self.budget_sec = float(budget_sec)
+        self._poll_control()
+        self._tick_ms = {}
+        t0 = time.perf_counter()
+        self._push(TICK)
+        try:
+            yield
+        finally:
+            self._pop(TICK)
+            total = (time.perf_counter() - t0) * 1000.0
+            self._record(TICK, total)
+            for name, ms in self._tick_ms.items():
+                self._record(name, ms)
+            self.ticks += 1
+            if total > self.budget_sec * 1000.0:
+                self.slow_ticks += 1
+                parts = ", ".join(f"{k}={v:.0f}ms" for k, v in
+                                  sorted(self._tick_ms.items(), key=lambda kv: -kv[1]))
+                logger.warning(f"tick が予算超過: {total:.0f}ms > {self.budget_sec * 1000:.0f}ms ({parts})")
+            if self.mode:
+                self._remaining -= 1
+                if self._remaining <= 0:
+                    self.finish()
+
+    @contextmanager
+    def phase(self, name: str):
+        """tick 内のフェーズを囲む（同名フェーズは tick 内で合算）。"""
+        t0 = time.perf_counter()
+        self._push(name)
+        try:
+            yield
+        finally:
+            self._pop(name)
+            self._tick_ms[name] = self._tick_ms.get(name, 0.0) + (time.perf_counter() - t0) * 1000.0
+
+    def _push(self, name: str) -> None:
+        self._stack.append(name)
+        if self.mode == "cprofile":
+            self._cp_switch(name)
+
+    def _pop(self, name: str) -> None:
+        if self._stack and self._stack[-1] == name:
+            self._stack.pop()
+        if self.mode == "cprofile":
+            self._cp_switch(self._stack[-1] if self._stack else None)
+
+    def _record(self, name: str, ms: float) -> None:
+        d = self.phase_ms.get(name)
+        if d is None:
+            d = self.phase_ms[name] = deque(maxlen=self.window)
+        d.append(ms)
+
+    # --- 集計 ---
+    def summary(self) -> Dict[str, Any]:
+        """直近 window tick のフェーズ別 p50/p99/max/mean (ms)。"""
+        phases = {}
+        for name, d in self.phase_ms.items():
+            xs = list(d)
+            phases[name] = {
+                "n": len(xs),
+                "p50_ms": round(_pct(xs, 0.50), 2),
+                "p99_ms": round(_pct(xs, 0.99), 2),
+                "max_ms": round(max(xs), 2) if xs else 0.0,
+                "mean_ms": round(sum(xs) / len(xs), 2) if xs else 0.0,
+            }
+        return {"ticks": self.ticks, "slow_ticks": self.slow_ticks,
+                "budget_ms": self.budget_sec * 1000.0, "phases": phases}
+
+    def dump_phases(self) -> str:
+        os.makedirs(self.out_dir, exist_ok=True)
+        path = os.path.join(self.out_dir, f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_phases.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.summary(), f, ensure_ascii=False, indent=2)
+        logger.info(f"フェーズ別統計を出力: {path}")
+        return path
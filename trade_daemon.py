@@ -0,0 +1,212 @@
+"""
+常駐トレードデーモン。run_time.bat が 5 秒ごとに main.py を起動し直す方式の置き換え。
+
+- 1 プロセスで 1 日（以降の営業日も）動き続け、取引時間帯 const.session_windows
+  （既定 9:00〜11:30 / 12:30〜15:00）の間だけ tick を回す。
+- トークン（kabusapi_token のキャッシュ）・ユニバース・優先市場・銘柄情報・規制情報・API 予算・状態ストア・プロファイラは
+  プロセス内に保持し続ける。時間帯の開始 session_warmup_sec 前にトークンとユニバースを温め、
+  先物の期近・次限月の銘柄コードを当日分解決しておく（contracts.py）。
+- tick は開始時刻基準で TradeBot.tick_interval_sec ごとに回す（処理時間の分だけ待ちを縮める）。
+  間隔・しきい値は live_config の設定ファイルで稼働中に変えられる。
+- 戦略（TradeBot）が strategy_max_failures 回続けて例外を出したら、TradeBot だけを
+  作り直す（状態ストア等は引き継ぐので、保有・発注中の銘柄はそのまま管理を続ける）。
+- 注文照会の updtime（当日分の注文だけを数える）は日付が変わったら const.refresh_order_params() で更新する。
+- 土日は取引しない。Ctrl+C / SIGTERM で状態を書き出して終了する。
+
+使い方: python trade_daemon.py [--exit-after-close]
+"""
+from datetime import datetime, date, time as dtime, timedelta
+from typing import Optional, List, Tuple, Callable
+import argparse
+import logging
+import signal
+import threading
+import time
+
+import const
+from const import (
+    refresh_order_params,
+    session_windows,
+    session_warmup_sec,
+    strategy_max_failures,
+    strategy_restart_backoff_sec,
+)
+from kabusapi_token import get_token
+from contracts import ContractResolver
+from main import TradeBot
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_windows(windows) -> List[Tuple[dtime, dtime]]:
+    out = []
+    for start, end in windows:
+        out.append((dtime.fromisoformat(start) if isinstance(start, str) else start,
+                    dtime.fromisoformat(end) if isinstance(end, str) else end))
+    return sorted(out)
+
+
+class SessionCalendar:
+    """取引時間帯の判定（土日は休み。祝日は考慮しない）。"""
+
+    def __init__(self, windows=session_windows):
+        self.windows = _parse_windows(windows)
+
+    @staticmethod
+    def is_trading_day(d: date) -> bool:
+        return d.weekday() < 5
+
+    def in_session(self, now: datetime) -> bool:
+        if not self.is_trading_day(now.date()):
+            return False
+        t = now.time()
+        return any(s <= t < e for s, e in self.windows)
+
+    def next_start(self, now: datetime) -> datetime:
+        """now 以降で最初に始まる時間帯の開始時刻（時間帯の中なら now）。"""
+        if self.in_session(now):
+            return now
+        d = now.date()
+        for _ in range(8):
+            if self.is_trading_day(d):
+                for s, _e in self.windows:
+                    start = datetime.combine(d, s)
+                    if start > now:
+                        return start
+            d += timedelta(days=1)
+        raise RuntimeError("取引時間帯が見つかりません")
+
+    def day_closed(self, now: datetime) -> bool:
+        """当日の最後の時間帯が終わったか。"""
+        return now.time() >= self.windows[-1][1]
+
+
+class TradeDaemon:
+    def __init__(self, bot_factory: Callable[..., TradeBot] = TradeBot,
+                 calendar: Optional[SessionCalendar] = None,
+                 interval_sec: Optional[float] = None,
+                 warmup_sec: float = session_warmup_sec,
+                 max_failures: int = strategy_max_failures,
+                 restart_backoff_sec: float = strategy_restart_backoff_sec,
+                 exit_after_close: bool = False):
+        self.bot_factory = bot_factory
+        self.calendar = calendar or SessionCalendar()
+        self.interval_sec = interval_sec
+        self.warmup_sec = warmup_sec
+        self.max_failures = max(1, int(max_failures))
+        self.restart_backoff_sec = restart_backoff_sec
+        self.exit_after_close = exit_after_close
+        self.bot: TradeBot = bot_factory()
+        self.contracts = ContractResolver()   # 先物・オプションの発注スクリプトが当日ファイルを読む
+        self.failures = 0
+        self.restarts = 0
+        self._stop = threading.Event()
+        self._warmed_for: Optional[datetime] = None
+
+    # --- 戦略の実行と作り直し ---
+    def roll_day(self, now: Optional[datetime] = None) -> None:
+        """日付が変わっていたら注文照会の updtime を当日に進める（前日までの注文を上限・集計に数えない）。"""
+        now = now or datetime.now()
+        if now.strftime('%Y%m%d000000') != const.today_start:
+            logger.info(f"日付が変わりました: 注文照会の updtime を {refresh_order_params(now)} に更新")
+
+    def tick(self) -> None:
+        self.roll_day()
+        bot = self.bot
+        bot.reload_config()
+        interval = self.interval_sec if self.interval_sec is not None else bot.tick_interval_sec
+        with bot.profiler.tick(interval):
+            try:
+                bot.execute_trade()
+            except Exception as e:
+                self.failures += 1
+                logger.error(f"トレード処理中にエラーが発生しました ({self.failures}/{self.max_failures}): {e}")
+            else:
+                self.failures = 0
+        bot.warm.maybe_save(bot)
+        if self.failures >= self.max_failures:
+            self.restart_strategy()
+
+    def restart_strategy(self) -> None:
+        """TradeBot だけを作り直す（状態ストア・ユニバース・プロファイラ・優先市場・銘柄情報・規制情報・取引余力は引き継ぐ）。"""
+        old = self.bot
+        self.restarts += 1
+        logger.warning(f"戦略を作り直します（{self.restarts} 回目）")
+        self._stop.wait(self.restart_backoff_sec)
+        try:
+            old.warm.close()
+            self.bot = self.bot_factory(store=old.store, universe=old.universe, profiler=old.profiler,
+                                        meta=old.meta, rules=old.rules, exchanges=old.exchanges,
+                                        margin=old.margin)
+            self.failures = 0
+        except Exception as e:
+            # 作り直しにも失敗したら旧インスタンスのまま次の tick で再試行
+            logger.error(f"戦略の作り直しに失敗しました: {e}")
+
+    # --- 時間帯 ---
+    def warm_up(self) -> None:
+        """時間帯の開始前にトークン・ユニバースと、その優先市場・銘柄情報（売買単位・値幅制限）・規制情報を取得しておく。"""
+        self.roll_day()
+        try:
+            get_token()
+            symbols = self.bot.universe.symbols()
+            self.bot.exchanges.prefetch(symbols)
+            self.bot.meta.prefetch(symbols)
+            self.bot.rules.refresh(symbols, low_priority=False)
+            self.contracts.prepare()
+            logger.info("時間帯開始前のウォームアップ完了")
+        except Exception as e:
+            logger.warning(f"ウォームアップに失敗しました: {e}")
+
+    def _sleep_until(self, target: datetime, max_chunk: float = 60.0) -> None:
+        wait = (target - datetime.now()).total_seconds()
+        if wait > 0:
+            self._stop.wait(min(wait, max_chunk))
+
+    def run(self) -> None:
+        logger.info(f"常駐デーモン開始: windows={[(s.isoformat('minutes'), e.isoformat('minutes')) for s, e in self.calendar.windows]}")
+        try:
+            while not self._stop.is_set():
+                now = datetime.now()
+                if self.calendar.in_session(now):
+                    t0 = time.monotonic()
+                    self.tick()
+                    interval = self.interval_sec if self.interval_sec is not None else self.bot.tick_interval_sec
+                    self._stop.wait(max(0.0, interval - (time.monotonic() - t0)))
+                    continue
+
+                if self.exit_after_close and self.calendar.day_closed(now):
+                    logger.info("取引時間終了のため常駐デーモンを停止します。")
+                    break
+                start = self.calendar.next_start(now)
+                warm_at = start - timedelta(seconds=self.warmup_sec)
+                if now >= warm_at and self._warmed_for != start:
+                    self.warm_up()
+                    self._warmed_for = start
+                    continue
+                self._sleep_until(warm_at if now < warm_at else start)
+        finally:
+            self.close()
+
+    def stop(self, *_args) -> None:
+        self._stop.set()
+
+    def close(self) -> None:
+        try:
+            self.bot.warm.maybe_save(self.bot, force=True)
+            self.bot.warm.close()
+            self.bot.store.close()
+        except Exception as e:
+            logger.error(f"状態の書き出しに失敗しました: {e}")
+        logger.info(f"常駐デーモン終了（戦略の作り直し {self.restarts} 回）")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="resident trading daemon")
+    ap.add_argument("--exit-after-close", action="store_true", help="当日の最後の時間帯が終わったら終了する")
+    args = ap.parse_args()
+
+    daemon = TradeDaemon(exit_after_close=args.exit_after_close)
+    signal.signal(signal.SIGINT, daemon.stop)
+    signal.signal(signal.SIGTERM, daemon.stop)
+    daemon.run()
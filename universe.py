@@ -0,0 +1,174 @@
+from typing import Optional, Dict, Any, List, Iterable
+import time
+import logging
+from kabusapi_ranking import get_ranking
+from const import (
+    symbol_list,
+    universe_ranking_types,
+    universe_exchange_division,
+    universe_price_min,
+    universe_price_max,
+    universe_min_trading_value,
+    universe_max_symbols,
+    universe_refresh_sec,
+    info_api_rate_per_sec,
+    universe_budget_share,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _to_float(v: Any) -> float:
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _trading_value(row: Dict[str, Any]) -> float:
+    """
+    ランキング行から当日売買代金(円)を推定する。
+    売買代金系は TradingValue、それ以外は CurrentPrice × TradingVolume で近似。
+    """
+    tv = _to_float(row.get("TradingValue"))
+    if tv > 0:
+        return tv
+    return _to_float(row.get("CurrentPrice")) * _to_float(row.get("TradingVolume"))
+
+
+def merge_rankings(rankings: Dict[int, List[Dict[str, Any]]],
+                   price_min: float = universe_price_min,
+                   price_max: float = universe_price_max,
+                   min_trading_value: float = universe_min_trading_value,
+                   max_symbols: int = universe_max_symbols) -> List[str]:
+    """
+    ランキング種別ごとの行リストをマージし、価格帯・流動性で絞った銘柄コードを返す。
+    並び順: 出現したランキング数が多い → 最良順位が小さい → 売買代金が大きい。
+    """
+    merged: Dict[str, Dict[str, Any]] = {}
+    for rtype, rows in rankings.items():
+        for i, row in enumerate(rows or []):
+            code = str(row.get("Symbol") or "")
+            if not code:
+                continue
+            rank = int(_to_float(row.get("No")) or (i + 1))
+            m = merged.setdefault(code, {"hits": 0, "best_rank": rank, "price": 0.0, "value": 0.0})
+            m["hits"] += 1
+            m["best_rank"] = min(m["best_rank"], rank)
+            m["price"] = _to_float(row.get("CurrentPrice")) or m["price"]
+            m["value"] = max(m["value"], _trading_value(row))
+
+    picked = []
+    for code, m in merged.items():
+        if not (price_min <= m["price"] <= price_max):
+            continue
+        if m["value"] < min_trading_value:
+            continue
+        picked.append((code, m))
+
+    picked.sort(key=lambda x: (-x[1]["hits"], x[1]["best_rank"], -x[1]["value"]))
+    return [code for code, _ in picked[:max_symbols]]
+
+
+class UniverseService:
+    """
+    ランキングAPI（TICK回数/売買高急増/売買代金急増 等）から売買対象の銘柄群を作り、キャッシュする。
+    - symbols() は前回取得から refresh_sec 経過していれば再取得し、そうでなければキャッシュを返す。
+    - refresh_sec は情報系APIの秒間上限 × budget_share に収まるよう下限を設ける。
+    - budget を渡すと、情報系APIの残り枠が低優先度分に満たない間は更新を次回に回す。
+    - 取得失敗や該当ゼロの場合は直前のキャッシュ（無ければ const.symbol_list）を使う。
+    """
+
+    def __init__(self,
+                 ranking_types: Iterable[int] = universe_ranking_types,
+                 exchange_division: str = universe_exchange_division,
+                 price_min: float = universe_price_min,
+                 price_max: float = universe_price_max,
+                 min_trading_value: float = universe_min_trading_value,
+                 max_symbols: int = universe_max_symbols,
+                 refresh_sec: float = universe_refresh_sec,
+                 rate_per_sec: float = info_api_rate_per_sec,
+                 budget_share: float = universe_budget_share,
+                 fallback: Optional[List[str]] = None,
+                 fetch=get_ranking,
+                 budget=None):
+        self.ranking_types = list(ranking_types)
+        self.exchange_division = exchange_division
+        self.price_min = price_min
+        self.price_max = price_max
+        self.min_trading_value = min_trading_value
+        self.max_symbols = max_symbols
+        self.rate_per_sec = rate_per_sec
+        self.budget_share = budget_share
+        self.refresh_sec = max(float(refresh_sec), self.min_refresh_sec())
+        self.fallback = list(fallback if fallback is not None else symbol_list)
+        self._fetch = fetch
+        self.budget = budget   # api_budget.ApiBudget（あれば残り枠が少ない間は更新を見送る）
+        self._symbols: List[str] = []
+        self._fetched_at: float = 0.0
+
+    def min_refresh_sec(self) -> float:
+        """1回の更新で ranking_types 件のリクエストを使う前提で、予算内に収まる最短間隔。"""
+        per_sec = max(1e-9, float(self.rate_per_sec) * float(self.budget_share))
+        return len(self.ranking_types) / per_sec
+
+    def is_stale(self, now: Optional[float] = None) -> bool:
+        now = time.time() if now is None else now
+        return self._fetched_at <= 0.0 or (now - self._fetched_at) >= self.refresh_sec
+
+    def invalidate(self) -> None:
+        """次の symbols() で再取得させる（絞り込み条件を変えたとき）。"""
+        self._fetched_at = 0.0
+
+    def state(self) -> Dict[str, Any]:
+        return {"symbols": list(self._symbols), "fetched_at": self._fetched_at}
+
+    def restore(self, state: Dict[str, Any], now: Optional[float] = None) -> bool:
+        """保存した取得結果を、refresh_sec 以内のものなら取り込む（ウォームスタート用）。"""
+        now = time.time() if now is None else now
+        fetched_at = float(state.get("fetched_at") or 0.0)
+        symbols = [str(s) for s in state.get("symbols") or []]
+        if not symbols or fetched_at <= self._fetched_at or now - fetched_at >= self.refresh_sec:
+            return False
+        self._symbols = symbols
+        self._fetched_at = fetched_at
+        return True
+
+    def refresh(self, now: Optional[float] = None) -> List[str]:
+        """ランキングを取得・マージしてキャッシュを更新する。"""
+        now = time.time() if now is None else now
+        rankings: Dict[int, List[Dict[str, Any]]] = {}
+        for i, rtype in enumerate(self.ranking_types):
+            if i:
+                time.sleep(1.0 / max(1e-9, float(self.rate_per_sec)))
+            res = self._fetch({'type': rtype, 'ExchangeDivision': self.exchange_division})
+            rows = res.get("Ranking") if isinstance(res, dict) else None
+            if rows:
+                rankings[rtype] = rows
+
+        symbols = merge_rankings(rankings, self.price_min, self.price_max,
+                                 self.min_trading_value, self.max_symbols) if rankings else []
+        # 失敗しても次回まで再取得しない（予算を守るため）
+        self._fetched_at = now
+        if symbols:
+            self._symbols = symbols
+            logger.info(f"ユニバース更新: {symbols}")
+        else:
+            logger.info("ユニバース更新: 該当なし／取得失敗のため前回値を使用します。")
+        return self.symbols_cached()
+
+    def symbols_cached(self) -> List[str]:
+        return list(self._symbols or self.fallback)
+
+    def symbols(self, now: Optional[float] = None) -> List[str]:
+        """売買対象の銘柄コード（取引所なし）を返す。必要なら再取得する。"""
+        if self.is_stale(now):
+            if self.budget is not None and not self.budget.allow("info", len(self.ranking_types), low_priority=True):
+                logger.info("ユニバース更新: 情報系APIの残り枠が少ないため見送ります。")
+                return self.symbols_cached()
+            try:
+                return self.refresh(now)
+            except Exception as e:
+                logger.warning(f"ユニバース更新に失敗しました: {e}")
+                self._fetched_at = time.time() if now is None else now
+        return self.symbols_cached()
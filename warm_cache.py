@@ -0,0 +1,197 @@
+"""
+再起動時のウォームスタート用キャッシュ。
+
+tick の終わりに（warm_cache_save_sec ごと）次の内容を const.warm_cache_path へ書き出し、
+起動時に読み戻す。tick のスレッドでは参照を集めるだけにし、JSON 化と書き込みは
+バックグラウンドスレッドで行う（tick の待ち時間には含めない）。
+
+  soft_limits… /apisoftlimit の結果（同じ日付なら再利用）
+  universe   … ランキングから作った銘柄群（refresh_sec 以内なら再利用）
+  trackers   … entry 中の銘柄の並び位置推定 QueueTracker（warm_cache_tracker_max_age_sec 以内）
+  tick       … 直前 tick の注文一覧・残高・板・日次上限判定
+               （warm_cache_tick_max_age_sec 以内なら、再起動後最初の tick で管理中の銘柄にだけ使う。
+               その tick では新規を出さず、次の tick で /orders・/board を取り直してから判断する）
+
+鮮度が足りないものは捨てて通常どおり取得する。銘柄のポジション状態そのものは StateStore が持つ。
+API トークンは平文でファイルに残さない（ウォームアップで取り直す。1 回の呼び出しで済む）。
+"""
+from datetime import datetime
+from typing import Optional, Dict, Any
+import atexit
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+from const import (
+    warm_cache_path,
+    warm_cache_save_sec,
+    warm_cache_tick_max_age_sec,
+    warm_cache_tracker_max_age_sec,
+)
+from queue_model import QueueTracker
+
+logger = logging.getLogger(__name__)
+
+VERSION = 1
+
+
+def _replace_text(path: str, text: str) -> None:
+    """一時ファイルに書いて os.replace で置き換える（キャッシュなので fsync はしない）。"""
+    d = os.path.dirname(os.path.abspath(path))
+    os.makedirs(d, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=".tmp_", dir=d)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp, path)
+    except Exception:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+class WarmCache:
+    def __init__(self, path: str = warm_cache_path, save_sec: float = warm_cache_save_sec,
+                 tick_max_age_sec: float = warm_cache_tick_max_age_sec,
+                 tracker_max_age_sec: float = warm_cache_tracker_max_age_sec,
+                 background: bool = True):
+        self.path = path
+        self.save_sec = save_sec
+        self.tick_max_age_sec = tick_max_age_sec
+        self.tracker_max_age_sec = tracker_max_age_sec
+        self._saved_at = 0.0
+        self._pending: Optional[Dict[str, Any]] = None
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+        if background:
+            self._thread = threading.Thread(target=self._writer, name="warm-cache-writer", daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+
+    # --- 書き出し ---
+    def capture(self, bot, now: Optional[float] = None) -> Dict[str, Any]:
+        """
+        保存する内容を集める（JSON 化はしない）。直前 tick の取得結果は tick ごとに作り直される
+        dict / list なので参照のまま渡し、tick 中に書き換わる状態（tracker・ソフトリミット・ユニバース）は写しを取る。
+        """
+        now = time.time() if now is None else now
+        trackers = {sym: st["tracker"].to_state() for sym, st in bot.positions.items()
+                    if isinstance(st.get("tracker"), QueueTracker)}
+        return {
+            "version": VERSION,
+            "saved_at": now,
+            "day": datetime.fromtimestamp(now).strftime("%Y%m%d"),
+            "soft_limits": dict(bot.budget.soft_limits),
+            "universe": bot.universe.state(),
+            "trackers": trackers,
+            "tick": dict(getattr(bot, "last_tick", None) or {}),
+        }
+
+    def maybe_save(self, bot, now: Optional[float] = None, force: bool = False) -> bool:
+        """前回から save_sec 経っていれば（force なら常に）スナップショットを集めて書き出しに回す。"""
+        now = time.time() if now is None else now
+        if not force and now - self._saved_at < self.save_sec:
+            return False
+        self._saved_at = now
+        try:
+            data = self.capture(bot, now)
+        except Exception as e:
+            logger.warning(f"ウォームキャッシュの作成に失敗しました: {e}")
+            return False
+        if self._thread is None:
+            self._write(data)
+        else:
+            with self._cond:
+                self._pending = data   # 書き込みが追いつかなければ最新だけを書く
+                self._cond.notify()
+        return True
+
+    def _writer(self) -> None:
+        while True:
+            with self._cond:
+                while self._pending is None and not self._closed:
+                    self._cond.wait()
+                data, self._pending = self._pending, None
+                closed = self._closed
+            if data is not None:
+                self._write(data)
+            if closed:
+                return
+
+    def _write(self, data: Dict[str, Any]) -> None:
+        try:
+            _replace_text(self.path, json.dumps(data, ensure_ascii=False))
+        except Exception as e:
+            logger.warning(f"ウォームキャッシュの書き込みに失敗しました: {e}")
+
+    def close(self) -> None:
+        if self._thread is None or self._closed:
+            return
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join(timeout=5.0)
+
+    # --- 読み戻し ---
+    def load(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"ウォームキャッシュを読めません: {e}")
+            return None
+        if not isinstance(data, dict) or data.get("version") != VERSION:
+            return None
+        return data
+
+    def restore(self, bot, now: Optional[float] = None) -> Dict[str, Any]:
+        """
+        鮮度を満たすものだけ bot に戻し、最初の tick で使う注文・残高・板を返す
+        （使えるものが無ければ空 dict）。
+        """
+        now = time.time() if now is None else now
+        data = self.load()
+        if data is None:
+            return {}
+        age = now - float(data.get("saved_at") or 0.0)
+        restored = []
+
+        if data.get("day") == datetime.fromtimestamp(now).strftime("%Y%m%d") and data.get("soft_limits") \
+                and not bot.budget.soft_limits:
+            bot.budget.soft_limits = {k: float(v) for k, v in data["soft_limits"].items()}
+            restored.append("soft_limits")
+
+        if bot.universe.restore(data.get("universe") or {}, now):
+            restored.append("universe")
+
+        n = 0
+        for sym, t in (data.get("trackers") or {}).items():
+            st = bot.positions.get(sym)
+            if not st or st.get("state") != "entry" or st.get("tracker") is not None:
+                continue
+            try:
+                tr = QueueTracker.from_state(t)
+            except Exception:
+                continue
+            if now - tr.last_at <= self.tracker_max_age_sec:
+                st["tracker"] = tr
+                n += 1
+        if n:
+            restored.append(f"trackers={n}")
+
+        seed: Dict[str, Any] = {}
+        tick = data.get("tick") or {}
+        if tick and 0.0 <= age <= self.tick_max_age_sec:
+            seed = tick
+            restored.append("tick")
+
+        logger.info(f"ウォームスタート（{age:.1f} 秒前のキャッシュ）: {restored or 'なし'}")
+        return seed